@@ -0,0 +1,240 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Local SQLite indexer of payments.
+
+`Indexer` ingests transactions through `jsonrpc.AsyncClient`, decodes `receivedpayment` events and their
+metadata (by `txnmetadata.decode_structure`), and stores one normalized row per payment in SQLite:
+
+| column          | description                                                      |
+|-----------------|------------------------------------------------------------------|
+| version         | transaction version                                              |
+| event_index     | index of the event in the transaction events                     |
+| sender          | sender account address hex                                       |
+| receiver        | receiver account address hex                                     |
+| from_subaddress | sender subaddress hex from general metadata                      |
+| to_subaddress   | receiver subaddress hex from general metadata                    |
+| amount          | amount in microunits                                             |
+| currency        | currency code                                                    |
+| reference_id    | off-chain reference id of travel rule metadata or payment metadata  |
+| refund_version  | refunded transaction version of refund metadata                     |
+
+Rows and the last indexed version are committed in one SQLite transaction per page, so the index is
+consistent after restarts and `catch_up` continues from the last indexed version:
+
+```python
+from diem import indexer, testing
+
+async with testing.create_client() as client:
+    index = indexer.Indexer(client, "payments.db")
+    await index.catch_up()
+    for payment in index.received_payments(<address>, since_version=1000):
+        ...
+```
+"""
+
+from dataclasses import dataclass, fields
+from logging import Logger, getLogger
+import asyncio, sqlite3, typing, uuid
+
+from . import diem_types, jsonrpc, txnmetadata, utils
+from .jsonrpc import transactions_fetcher
+
+
+DEFAULT_PAGE_SIZE: int = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS payments (
+    version INTEGER NOT NULL,
+    event_index INTEGER NOT NULL,
+    sender TEXT NOT NULL,
+    receiver TEXT NOT NULL,
+    from_subaddress TEXT,
+    to_subaddress TEXT,
+    amount INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    reference_id TEXT,
+    refund_version INTEGER,
+    PRIMARY KEY (version, event_index)
+);
+CREATE INDEX IF NOT EXISTS payments_receiver ON payments (receiver, version);
+CREATE INDEX IF NOT EXISTS payments_sender ON payments (sender, version);
+CREATE INDEX IF NOT EXISTS payments_to_subaddress ON payments (to_subaddress);
+CREATE INDEX IF NOT EXISTS payments_reference_id ON payments (reference_id);
+CREATE TABLE IF NOT EXISTS indexer_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+@dataclass
+class Payment:
+    version: int
+    event_index: int
+    sender: str
+    receiver: str
+    from_subaddress: typing.Optional[str]
+    to_subaddress: typing.Optional[str]
+    amount: int
+    currency: str
+    reference_id: typing.Optional[str]
+    refund_version: typing.Optional[int]
+
+
+_COLUMNS: str = ", ".join(f.name for f in fields(Payment))
+
+
+def decode_payments(txn: jsonrpc.Transaction) -> typing.List[Payment]:
+    """decode payments from `receivedpayment` events of the given transaction"""
+
+    ret = []
+    for i, event in enumerate(txn.events):
+        if event.data.type != jsonrpc.EVENT_DATA_RECEIVED_PAYMENT:
+            continue
+        payment = Payment(
+            version=txn.version,
+            event_index=i,
+            sender=event.data.sender.lower(),
+            receiver=event.data.receiver.lower(),
+            from_subaddress=None,
+            to_subaddress=None,
+            amount=event.data.amount.amount,
+            currency=event.data.amount.currency,
+            reference_id=None,
+            refund_version=None,
+        )
+        metadata = txnmetadata.decode_structure(event.data.metadata)
+        if isinstance(metadata, diem_types.GeneralMetadataV0):
+            payment.from_subaddress = utils.hex(metadata.from_subaddress) if metadata.from_subaddress else None
+            payment.to_subaddress = utils.hex(metadata.to_subaddress) if metadata.to_subaddress else None
+        elif isinstance(metadata, diem_types.TravelRuleMetadataV0):
+            payment.reference_id = metadata.off_chain_reference_id
+        elif isinstance(metadata, diem_types.RefundMetadataV0):
+            payment.refund_version = int(metadata.transaction_version)
+        elif isinstance(metadata, diem_types.PaymentMetadataV0):
+            payment.reference_id = str(uuid.UUID(bytes=bytes(metadata.reference_id)))
+        ret.append(payment)
+    return ret
+
+
+class Indexer:
+    """Indexer indexes payments into SQLite database at `path`, see module document for details
+
+    Database writes are executed in the event loop thread; they are batched by page and are short.
+    """
+
+    def __init__(
+        self,
+        client: jsonrpc.AsyncClient,
+        path: str = ":memory:",
+        start_version: int = 0,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        concurrency: int = transactions_fetcher.DEFAULT_CONCURRENCY,
+        logger: typing.Optional[Logger] = None,
+    ) -> None:
+        self._client = client
+        self._db: sqlite3.Connection = sqlite3.connect(path)
+        self._db.executescript(_SCHEMA)
+        self._start_version = start_version
+        self._page_size = page_size
+        self._concurrency = concurrency
+        self._logger: Logger = logger or getLogger(__name__)
+
+    def close(self) -> None:
+        self._db.close()
+
+    @property
+    def last_version(self) -> typing.Optional[int]:
+        """the last indexed version, None if nothing is indexed"""
+
+        row = self._db.execute("SELECT value FROM indexer_state WHERE name = 'last_version'").fetchone()
+        return row[0] if row else None
+
+    async def catch_up(self, end_version: typing.Optional[int] = None) -> int:
+        """index transactions after the last indexed version up to `end_version` (exclusive, default ledger tip)
+
+        Returns number of indexed payments.
+        """
+
+        last = self.last_version
+        start = self._start_version if last is None else last + 1
+        count, page = 0, []
+        txns = self._client.iter_transactions(
+            start, end_version, True, chunk_size=self._page_size, concurrency=self._concurrency
+        )
+        async for txn in txns:
+            page.append(txn)
+            if len(page) >= self._page_size:
+                count += self._index_page(page)
+                page = []
+        if page:
+            count += self._index_page(page)
+        return count
+
+    async def follow(self, poll_interval_secs: float = jsonrpc.DEFAULT_EVENTS_POLL_INTERVAL_SECS) -> None:
+        """catch up and poll new transactions until cancelled
+
+        Sleeps `poll_interval_secs` only when a catch up indexed no new version, i.e. the indexer is at the
+        ledger tip.
+        """
+
+        while True:
+            last_version = self.last_version
+            await self.catch_up()
+            if self.last_version == last_version:
+                await asyncio.sleep(poll_interval_secs)
+
+    def received_payments(
+        self, receiver: typing.Union[diem_types.AccountAddress, str], since_version: int = 0
+    ) -> typing.List[Payment]:
+        """payments received by the given account address since the given version, ordered by version"""
+
+        return self._query(
+            "receiver = ? AND version >= ? ORDER BY version, event_index",
+            (utils.account_address_hex(receiver), since_version),
+        )
+
+    def sent_payments(
+        self, sender: typing.Union[diem_types.AccountAddress, str], since_version: int = 0
+    ) -> typing.List[Payment]:
+        """payments sent by the given account address since the given version, ordered by version"""
+
+        return self._query(
+            "sender = ? AND version >= ? ORDER BY version, event_index",
+            (utils.account_address_hex(sender), since_version),
+        )
+
+    def payments_to_subaddress(self, subaddress: typing.Union[bytes, str]) -> typing.List[Payment]:
+        """payments with general metadata to the given receiver subaddress, ordered by version"""
+
+        return self._query("to_subaddress = ? ORDER BY version, event_index", (utils.sub_address(subaddress).hex(),))
+
+    def payments_by_reference_id(self, reference_id: str) -> typing.List[Payment]:
+        """payments with travel rule or payment metadata of the given reference id, ordered by version"""
+
+        return self._query("reference_id = ? ORDER BY version, event_index", (reference_id,))
+
+    def payment(self, version: int) -> typing.Optional[Payment]:
+        """returns the first payment of the transaction version"""
+
+        ret = self._query("version = ? ORDER BY event_index LIMIT 1", (version,))
+        return ret[0] if ret else None
+
+    def _query(self, where: str, params: typing.Tuple[typing.Any, ...]) -> typing.List[Payment]:  # pyre-ignore
+        rows = self._db.execute(f"SELECT {_COLUMNS} FROM payments WHERE {where}", params).fetchall()
+        return [Payment(*row) for row in rows]
+
+    def _index_page(self, txns: typing.List[jsonrpc.Transaction]) -> int:
+        payments = [p for txn in txns for p in decode_payments(txn)]
+        placeholders = ", ".join("?" * len(fields(Payment)))
+        with self._db:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO payments ({_COLUMNS}) VALUES ({placeholders})",
+                [tuple(p.__dict__.values()) for p in payments],
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO indexer_state (name, value) VALUES ('last_version', ?)", (txns[-1].version,)
+            )
+        self._logger.debug("indexed %s payments up to version %s", len(payments), txns[-1].version)
+        return len(payments)
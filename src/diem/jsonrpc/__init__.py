@@ -35,6 +35,13 @@ from .client import (
     RequestStrategy,
     RequestWithBackups,
 )
+from .retry import RetryPolicy, RetryBudget, ExponentialBackoff
+from .decoders import Decoder, FastDecoder, LazyDecoder, LazyMessage
+from .http_pool import HTTPPoolConfig, PooledHTTPAdapter, PoolMetrics
+from .http_recorder import Recorder, Replay, Exchange, ReplayMissError
+from .metrics import Metrics, InMemoryMetrics, Histogram
+from .request_logger import RequestLogger, LazyBody, DEFAULT_MAX_LOG_BODY_SIZE
+from .rate_limiter import RateLimit, RateLimiter, METHOD_CLASS_READ, METHOD_CLASS_SUBMIT
 from .errors import (
     JsonRpcError,
     NetworkError,
@@ -47,6 +54,11 @@ from .errors import (
     AccountNotFoundError,
 )
 from .async_client import AsyncClient
+from .account_submitter import AsyncAccountSubmitter, SubmitterStats
+from .ledger_cache import LedgerCache
+from .ledger_tailer import LedgerTailer, CheckpointStore, FileCheckpointStore
+from .vasp_domain_index import VaspDomainIndex
+from .transaction_waiter import TransactionWaiter, AsyncTransactionWaiter
 from .jsonrpc_pb2 import (
     Amount,
     Metadata,
@@ -70,6 +82,10 @@ from .constants import (
     DEFAULT_RETRY_DELAY,
     DEFAULT_WAIT_FOR_TRANSACTION_TIMEOUT_SECS,
     DEFAULT_WAIT_FOR_TRANSACTION_WAIT_DURATION_SECS,
+    DEFAULT_EVENTS_PAGE_SIZE,
+    DEFAULT_EVENTS_PREFETCH_PAGES,
+    DEFAULT_EVENTS_POLL_INTERVAL_SECS,
+    DEFAULT_GET_ACCOUNTS_CONCURRENCY,
     USER_AGENT_HTTP_HEADER,
     # AccountRole#type field values
     ACCOUNT_ROLE_UNKNOWN,
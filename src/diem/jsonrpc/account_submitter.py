@@ -0,0 +1,211 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Per account transaction submitter allocating sequence numbers locally.
+
+Getting account sequence number by `get_account` before every submit serializes submissions of an account,
+and concurrent coroutines submitting from the same account race on the same sequence number.
+`AsyncAccountSubmitter` gets the account sequence number once, then allocates sequence numbers locally so that
+many transactions of the account can be in flight:
+
+1. On `SEQUENCE_NUMBER_TOO_OLD` / `SEQUENCE_NUMBER_TOO_NEW` submit errors, the submitter resyncs the sequence
+   number from chain and re-signs the transaction with a new sequence number.
+2. Sequence numbers of transactions failed to submit or expired are gaps that block later transactions of the
+   account; they are found on resync and allocated to the next transactions first.
+3. `submit_and_wait` resubmits the payload when the transaction is expired or its sequence number is taken by
+   another transaction.
+
+One submitter should be shared by all coroutines submitting transactions for the account, and the account should
+not submit transactions by other means, otherwise sequence numbers are resynced on errors.
+
+```python
+from diem import jsonrpc, testing
+
+client = testing.create_client()
+account = testing.LocalAccount.generate()
+submitter = account.submitter(client)
+txns = await asyncio.gather(*[submitter.submit_and_wait(payload) for payload in payloads])
+print(submitter.stats.throughput())
+```
+"""
+
+from dataclasses import dataclass, field
+from logging import Logger, getLogger
+import asyncio, collections, heapq, time, typing
+
+from diem import diem_types, utils
+from diem.jsonrpc import jsonrpc_pb2 as rpc
+from diem.jsonrpc.errors import (
+    JsonRpcError,
+    TransactionExecutionFailed,
+    TransactionExpired,
+    TransactionHashMismatchError,
+)
+
+if typing.TYPE_CHECKING:
+    from diem.jsonrpc.async_client import AsyncClient
+
+
+DEFAULT_MAX_RESUBMITS: int = 3
+DEFAULT_THROUGHPUT_WINDOW_SECS: float = 60.0
+
+SEQUENCE_NUMBER_TOO_OLD: str = "SEQUENCE_NUMBER_TOO_OLD"
+SEQUENCE_NUMBER_TOO_NEW: str = "SEQUENCE_NUMBER_TOO_NEW"
+
+CreateSignedTxn = typing.Callable[[int, diem_types.TransactionPayload], diem_types.SignedTransaction]
+
+
+def is_sequence_number_error(e: Exception) -> bool:
+    msg = str(e)
+    return isinstance(e, JsonRpcError) and (SEQUENCE_NUMBER_TOO_OLD in msg or SEQUENCE_NUMBER_TOO_NEW in msg)
+
+
+@dataclass
+class SubmitterStats:
+    """SubmitterStats is the counters of an account submitter"""
+
+    submitted: int = 0
+    executed: int = 0
+    failed: int = 0
+    resubmitted: int = 0
+    resyncs: int = 0
+    gaps_detected: int = 0
+    executed_at: typing.Deque[float] = field(default_factory=lambda: collections.deque(maxlen=100_000), repr=False)
+
+    def throughput(self, window_secs: float = DEFAULT_THROUGHPUT_WINDOW_SECS) -> float:
+        """executed transactions per second in the last `window_secs`"""
+
+        since = time.time() - window_secs
+        return sum(1 for t in self.executed_at if t >= since) / window_secs
+
+
+class AsyncAccountSubmitter:
+    """AsyncAccountSubmitter submits transactions of an account, see module document for details
+
+    `create_signed_txn` creates signed transaction for the given sequence number and payload,
+    e.g. `LocalAccount.create_signed_txn`.
+    """
+
+    def __init__(
+        self,
+        client: "AsyncClient",
+        sender: diem_types.AccountAddress,
+        create_signed_txn: CreateSignedTxn,
+        max_resubmits: int = DEFAULT_MAX_RESUBMITS,
+        logger: typing.Optional[Logger] = None,
+    ) -> None:
+        self._client = client
+        self._sender = sender
+        self._create_signed_txn = create_signed_txn
+        self._max_resubmits = max_resubmits
+        self._logger: Logger = logger or getLogger(__name__)
+        self._lock = asyncio.Lock()
+        self._next_seq: typing.Optional[int] = None
+        self._gaps: typing.List[int] = []
+        self._submitted: typing.Dict[int, diem_types.SignedTransaction] = {}
+        self.stats = SubmitterStats()
+
+    @property
+    def sender(self) -> diem_types.AccountAddress:
+        return self._sender
+
+    @property
+    def in_flight(self) -> int:
+        """number of submitted transactions not known as executed or expired"""
+
+        return len(self._submitted)
+
+    async def submit(self, payload: diem_types.TransactionPayload) -> diem_types.SignedTransaction:
+        """sign and submit transaction with a locally allocated sequence number
+
+        The transaction is re-signed with a new sequence number after resync, if the submit fails with sequence
+        number errors. Other errors are raised and the sequence number is released for next transactions.
+        """
+
+        tries = 0
+        while True:
+            tries += 1
+            seq = await self._allocate()
+            txn = self._create_signed_txn(seq, payload)
+            self._submitted[seq] = txn
+            try:
+                await self._client.submit(txn)
+                self.stats.submitted += 1
+                return txn
+            except Exception as e:
+                del self._submitted[seq]
+                if is_sequence_number_error(e) and tries <= self._max_resubmits:
+                    self._logger.info("resync sequence number of %s: %s", utils.account_address_hex(self._sender), e)
+                    self.stats.resubmitted += 1
+                    await self.resync()
+                    continue
+                self.stats.failed += 1
+                if not is_sequence_number_error(e):
+                    heapq.heappush(self._gaps, seq)
+                raise e
+
+    async def submit_and_wait(
+        self, payload: diem_types.TransactionPayload, timeout_secs: typing.Optional[float] = None
+    ) -> rpc.Transaction:
+        """submit transaction and wait for it executed
+
+        The payload is resubmitted if the transaction is expired, or the sequence number is taken by another
+        transaction (`TransactionHashMismatchError`).
+        """
+
+        txn = await self.submit(payload)
+        tries = 0
+        while True:
+            tries += 1
+            seq = txn.raw_txn.sequence_number
+            try:
+                ret = await self._client.wait_for_transaction(txn, timeout_secs)
+            except (TransactionExpired, TransactionHashMismatchError) as e:
+                self._submitted.pop(seq, None)
+                if tries > self._max_resubmits:
+                    self.stats.failed += 1
+                    raise e
+                self._logger.info("resubmit %s transaction %s: %s", utils.account_address_hex(self._sender), seq, e)
+                self.stats.resubmitted += 1
+                await self.resync()
+                txn = await self.submit(payload)
+                continue
+            except TransactionExecutionFailed:
+                # the sequence number is consumed by the transaction executed with failure
+                self._on_executed(seq)
+                raise
+            self._on_executed(seq)
+            return ret
+
+    async def resync(self) -> None:
+        """resync sequence number from chain, and find gaps of expired transactions"""
+
+        async with self._lock:
+            self.stats.resyncs += 1
+            seq = await self._client.get_account_sequence(self._sender)
+            now = self._client.get_last_known_state().timestamp_usecs / 1_000_000
+            for s, txn in list(self._submitted.items()):
+                if s < seq:
+                    self._on_executed(s)
+                elif txn.raw_txn.expiration_timestamp_secs < now:
+                    del self._submitted[s]
+            next_seq = max([seq, self._next_seq or 0] + [s + 1 for s in self._submitted])
+            gaps = set(range(seq, next_seq)) - set(self._submitted)
+            self.stats.gaps_detected += len(gaps - set(self._gaps))
+            self._gaps = sorted(gaps)
+            self._next_seq = next_seq
+
+    async def _allocate(self) -> int:
+        async with self._lock:
+            if self._gaps:
+                return heapq.heappop(self._gaps)
+            if self._next_seq is None:
+                self._next_seq = await self._client.get_account_sequence(self._sender)
+            seq = self._next_seq
+            self._next_seq += 1
+            return seq
+
+    def _on_executed(self, seq: int) -> None:
+        if self._submitted.pop(seq, None) is not None:
+            self.stats.executed += 1
+            self.stats.executed_at.append(time.time())
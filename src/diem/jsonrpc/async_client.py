@@ -4,12 +4,12 @@
 
 import time
 import copy
-import dataclasses
 import google.protobuf.json_format as parser
 import asyncio, aiohttp
 import typing
 import random
 import functools
+import collections
 
 from aiohttp import ClientSession
 from asyncio import as_completed
@@ -26,6 +26,10 @@ from diem.jsonrpc.constants import (
     DEFAULT_RETRY_DELAY,
     DEFAULT_WAIT_FOR_TRANSACTION_TIMEOUT_SECS,
     DEFAULT_WAIT_FOR_TRANSACTION_WAIT_DURATION_SECS,
+    DEFAULT_EVENTS_PAGE_SIZE,
+    DEFAULT_EVENTS_PREFETCH_PAGES,
+    DEFAULT_EVENTS_POLL_INTERVAL_SECS,
+    DEFAULT_GET_ACCOUNTS_CONCURRENCY,
     USER_AGENT_HTTP_HEADER,
 )
 from diem.jsonrpc.errors import (
@@ -39,16 +43,21 @@ from diem.jsonrpc.errors import (
     AccountNotFoundError,
 )
 from diem.jsonrpc.state import State
+from diem.jsonrpc.retry import RetryPolicy, observe_async_retries
+from diem.jsonrpc.decoders import Decoder
+from diem.jsonrpc.metrics import Metrics, PHASE_SEND, PHASE_RECEIVE, PHASE_DECODE, PHASE_PARSE, PHASE_TOTAL
+from diem.jsonrpc.request_logger import RequestLogger, LazyBody
+from diem.jsonrpc.ledger_cache import LedgerCache, caching_parser
+from diem.jsonrpc.rate_limiter import RateLimiter
+from diem.jsonrpc.transaction_waiter import AsyncTransactionWaiter
+from diem.jsonrpc import transactions_fetcher
 
 
-@dataclasses.dataclass
-class Retry:
-    max_retries: int
-    delay_secs: float
-    exception: typing.Type[Exception]
+class Retry(RetryPolicy):
+    """Retry is a `RetryPolicy` executing coroutine function, see `diem.jsonrpc.retry` for details"""
 
     async def execute(self, coro):  # pyre-ignore
-        return await utils.with_retry(coro, self.max_retries, self.delay_secs, self.exception)
+        return await self.execute_async(coro)
 
 
 class RequestStrategy:
@@ -140,17 +149,28 @@ class AsyncClient:
     def __init__(
         self,
         server_url: str,
-        retry: typing.Optional[Retry] = None,
+        retry: typing.Optional[RetryPolicy] = None,
         rs: typing.Optional[RequestStrategy] = None,
         logger: typing.Optional[Logger] = None,
         session_factory: typing.Callable[[], ClientSession] = ClientSession,
+        rate_limiter: typing.Optional[RateLimiter] = None,
+        decoder: typing.Optional[Decoder] = None,
+        metrics: typing.Optional[Metrics] = None,
+        request_logger: typing.Optional[RequestLogger] = None,
+        cache: typing.Optional[LedgerCache] = None,
     ) -> None:
         self._url: str = server_url
         self._last_known_server_state: State = State(chain_id=-1, version=-1, timestamp_usecs=-1)
-        self._retry: Retry = retry or Retry(DEFAULT_MAX_RETRIES, DEFAULT_RETRY_DELAY, StaleResponseError)
+        self._retry: RetryPolicy = retry or Retry(DEFAULT_MAX_RETRIES, DEFAULT_RETRY_DELAY, StaleResponseError)
         self._rs: RequestStrategy = rs or RequestStrategy()
         self._logger: Logger = logger or getLogger(__name__)
+        self._request_logger: RequestLogger = request_logger or RequestLogger(self._logger)
         self._session: aiohttp.ClientSession = session_factory()
+        self._rate_limiter: typing.Optional[RateLimiter] = rate_limiter
+        self._decoder: Decoder = decoder or Decoder()
+        self._metrics: Metrics = metrics or Metrics()
+        self._cache: typing.Optional[LedgerCache] = cache
+        self._transaction_waiter: typing.Optional[AsyncTransactionWaiter] = None
 
     async def close(self) -> None:
         await self._session.close()
@@ -276,7 +296,7 @@ class AsyncClient:
         """
 
         params = [int(version)] if version else []
-        return await self.execute("get_metadata", params, _parse_obj(lambda: rpc.Metadata()))
+        return await self.execute("get_metadata", params, self._decoder.parse_obj(lambda: rpc.Metadata()))
 
     async def get_currencies(self) -> typing.List[rpc.CurrencyInfo]:
         """get currencies
@@ -284,7 +304,7 @@ class AsyncClient:
         See [JSON-RPC API Doc](https://github.com/diem/diem/blob/master/json-rpc/docs/method_get_currencies.md)
         """
 
-        return await self.execute("get_currencies", [], _parse_list(lambda: rpc.CurrencyInfo()))
+        return await self.execute("get_currencies", [], self._decoder.parse_list(lambda: rpc.CurrencyInfo()))
 
     async def get_account(
         self, account_address: typing.Union[diem_types.AccountAddress, str]
@@ -296,7 +316,29 @@ class AsyncClient:
         """
 
         address = utils.account_address_hex(account_address)
-        return await self.execute("get_account", [address], _parse_obj(lambda: rpc.Account()))
+        return await self.execute("get_account", [address], self._decoder.parse_obj(lambda: rpc.Account()))
+
+    async def get_accounts(
+        self,
+        account_addresses: typing.Iterable[typing.Union[diem_types.AccountAddress, str]],
+        concurrency: int = DEFAULT_GET_ACCOUNTS_CONCURRENCY,
+    ) -> typing.List[typing.Optional[rpc.Account]]:
+        """get on-chain accounts information by `get_account` with at most `concurrency` requests in flight
+
+        Returns accounts in the order of given addresses, None if account not found.
+        Repeated addresses are fetched once.
+        """
+
+        addresses = [utils.account_address_hex(address) for address in account_addresses]
+        unique = list(dict.fromkeys(addresses))
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def fetch(address: str) -> typing.Optional[rpc.Account]:
+            async with semaphore:
+                return await self.get_account(address)
+
+        accounts = dict(zip(unique, await asyncio.gather(*map(fetch, unique))))
+        return [accounts[address] for address in addresses]
 
     async def get_account_transaction(
         self,
@@ -313,7 +355,7 @@ class AsyncClient:
 
         address = utils.account_address_hex(account_address)
         params = [address, int(sequence), bool(include_events)]
-        return await self.execute("get_account_transaction", params, _parse_obj(lambda: rpc.Transaction()))
+        return await self.execute("get_account_transaction", params, self._decoder.parse_obj(lambda: rpc.Transaction()))
 
     async def get_account_transactions(
         self,
@@ -331,7 +373,9 @@ class AsyncClient:
 
         address = utils.account_address_hex(account_address)
         params = [address, int(sequence), int(limit), bool(include_events)]
-        return await self.execute("get_account_transactions", params, _parse_list(lambda: rpc.Transaction()))
+        return await self.execute(
+            "get_account_transactions", params, self._decoder.parse_list(lambda: rpc.Transaction())
+        )
 
     async def get_transactions(
         self,
@@ -347,7 +391,36 @@ class AsyncClient:
         """
 
         params = [int(start_version), int(limit), bool(include_events)]
-        return await self.execute("get_transactions", params, _parse_list(lambda: rpc.Transaction()))
+        parse = self._decoder.parse_list(lambda: rpc.Transaction())
+        if self._cache:
+            cached = self._cache.get_transactions(params[0], params[1], params[2])
+            if cached is not None:
+                try:
+                    return parse(cached)
+                except parser.ParseError:
+                    # invalid cached transactions, fetch them from the server
+                    self._cache.discard_transactions(params[0], params[1])
+            cache_put = functools.partial(self._cache.put_transactions, include_events=params[2])
+            parse = caching_parser(parse, cache_put)
+        return await self.execute("get_transactions", params, parse)
+
+    def iter_transactions(
+        self,
+        start_version: int,
+        end_version: typing.Optional[int] = None,
+        include_events: bool = False,
+        chunk_size: int = transactions_fetcher.DEFAULT_CHUNK_SIZE,
+        concurrency: int = transactions_fetcher.DEFAULT_CONCURRENCY,
+        retry: typing.Optional[RetryPolicy] = None,
+    ) -> typing.AsyncIterator[rpc.Transaction]:
+        """iterate transactions in version range [start_version, end_version) in version order
+
+        Chunks of the range are fetched concurrently, see `diem.jsonrpc.transactions_fetcher` for details.
+        """
+
+        return transactions_fetcher.async_iter_transactions(
+            self, start_version, end_version, include_events, chunk_size, concurrency, retry
+        )
 
     async def get_events(self, event_stream_key: str, start: int, limit: int) -> typing.List[rpc.Event]:
         """get events
@@ -358,11 +431,65 @@ class AsyncClient:
         """
 
         params = [event_stream_key, int(start), int(limit)]
-        return await self.execute("get_events", params, _parse_list(lambda: rpc.Event()))
+        parse = self._decoder.parse_list(lambda: rpc.Event())
+        if self._cache:
+            cached = self._cache.get_events(event_stream_key, params[1], params[2])
+            if cached is not None:
+                try:
+                    return parse(cached)
+                except parser.ParseError:
+                    # invalid cached events, fetch them from the server
+                    self._cache.discard_events(event_stream_key, params[1], params[2])
+            parse = caching_parser(parse, self._cache.put_events)
+        return await self.execute("get_events", params, parse)
+
+    async def iter_events(
+        self,
+        event_stream_key: str,
+        start: int = 0,
+        page_size: int = DEFAULT_EVENTS_PAGE_SIZE,
+        prefetch: int = DEFAULT_EVENTS_PREFETCH_PAGES,
+        follow: bool = False,
+        poll_interval_secs: typing.Optional[float] = None,
+    ) -> typing.AsyncIterator[rpc.Event]:
+        """iterate events of the event stream from the `start` sequence number
+
+        Keeps up to `prefetch` pages of `get_events` requests in flight, and yields events in
+        sequence number order.
+        A page that has less than `page_size` events is the end of the stream: the iteration stops,
+        or when `follow` is True, keeps polling the stream for new events every `poll_interval_secs`.
+        Prefetched pages that are not consumed are cancelled, and their errors are discarded.
+        """
+
+        pending: typing.Deque[typing.Tuple[int, asyncio.Task]] = collections.deque()
+        next_page = start
+        at_tail = False
+        try:
+            while True:
+                # only one request in flight when following the end of the stream
+                while len(pending) < (1 if at_tail else max(prefetch, 1)):
+                    task = asyncio.create_task(self.get_events(event_stream_key, next_page, page_size))
+                    pending.append((next_page, task))
+                    next_page += page_size
+                seq, task = pending.popleft()
+                events = await task
+                for event in events:
+                    yield event
+                at_tail = len(events) < page_size
+                if at_tail:
+                    transactions_fetcher.discard_tasks([t for _, t in pending])
+                    pending.clear()
+                    if not follow:
+                        return
+                    next_page = seq + len(events)
+                    if not events:
+                        await asyncio.sleep(poll_interval_secs or DEFAULT_EVENTS_POLL_INTERVAL_SECS)
+        finally:
+            transactions_fetcher.discard_tasks([t for _, t in pending])
 
     async def get_state_proof(self, version: int) -> rpc.StateProof:
         params = [int(version)]
-        return await self.execute("get_state_proof", params, _parse_obj(lambda: rpc.StateProof()))
+        return await self.execute("get_state_proof", params, self._decoder.parse_obj(lambda: rpc.StateProof()))
 
     async def get_account_state_with_proof(
         self,
@@ -373,24 +500,18 @@ class AsyncClient:
         address = utils.account_address_hex(account_address)
         params = [address, version, ledger_version]
         return await self.execute(
-            "get_account_state_with_proof", params, _parse_obj(lambda: rpc.AccountStateWithProof())
+            "get_account_state_with_proof", params, self._decoder.parse_obj(lambda: rpc.AccountStateWithProof())
         )
 
     async def get_vasp_domain_map(self, batch_size: int = 100) -> typing.Dict[str, str]:
         domain_map = {}
-        event_index = 0
         tc_account = await self.must_get_account(TREASURY_ADDRESS)
         event_stream_key = tc_account.role.vasp_domain_events_key
-        while True:
-            events = await self.get_events(event_stream_key, event_index, batch_size)
-            for event in events:
-                if event.data.removed:
-                    del domain_map[event.data.domain]
-                else:
-                    domain_map[event.data.domain] = event.data.address
-            if len(events) == 0 or len(events) < batch_size:
-                break
-            event_index += batch_size
+        async for event in self.iter_events(event_stream_key, 0, batch_size):
+            if event.data.removed:
+                del domain_map[event.data.domain]
+            else:
+                domain_map[event.data.domain] = event.data.address
         return domain_map
 
     async def support_diem_id(self) -> bool:
@@ -519,6 +640,17 @@ class AsyncClient:
 
         raise WaitForTransactionTimeout(start_time, time.time())
 
+    def transaction_waiter(self) -> AsyncTransactionWaiter:
+        """returns the client shared transaction waiter service
+
+        The waiter multiplexes waiting for many pending transactions into one polling loop,
+        see `diem.jsonrpc.transaction_waiter` for details.
+        """
+
+        if self._transaction_waiter is None:
+            self._transaction_waiter = AsyncTransactionWaiter(self, logger=self._logger)
+        return self._transaction_waiter
+
     # pyre-ignore
     async def execute(
         self,
@@ -533,9 +665,18 @@ class AsyncClient:
         Should only be called by get methods.
         """
 
-        return await self._retry.execute(
-            functools.partial(self.execute_without_retry, method, params, result_parser, ignore_stale_response)
-        )
+        start = time.perf_counter()
+        try:
+            fn = observe_async_retries(
+                functools.partial(self.execute_without_retry, method, params, result_parser, ignore_stale_response),
+                lambda e: self._metrics.inc_retry(method, e),
+            )
+            # `Retry.execute` may be overridden by subclasses
+            if isinstance(self._retry, Retry):
+                return await self._retry.execute(fn)
+            return await self._retry.execute_async(fn)
+        finally:
+            self._metrics.observe_latency(method, PHASE_TOTAL, time.perf_counter() - start)
 
     # pyre-ignore
     async def execute_without_retry(
@@ -573,7 +714,10 @@ class AsyncClient:
 
             if "result" in json:
                 if result_parser:
-                    return result_parser(json["result"])
+                    start = time.perf_counter()
+                    result = result_parser(json["result"])
+                    self._metrics.observe_latency(method, PHASE_PARSE, time.perf_counter() - start)
+                    return result
                 return
 
             raise InvalidServerResponse(f"No error or result in response: {json}")
@@ -586,15 +730,34 @@ class AsyncClient:
         request: typing.Dict[str, typing.Any],
         ignore_stale_response: bool,
     ) -> typing.Dict[str, typing.Any]:
-        self._logger.debug("http request body: %s", request)
+        if self._rate_limiter:
+            await self._rate_limiter.acquire_async(url, request["method"])
+        method = request["method"]
+        log = self._request_logger.sample(method)
+        if log:
+            self._request_logger.log_request(url, request)
         headers = {"User-Agent": USER_AGENT_HTTP_HEADER}
-        async with self._session.post(url, json=request, headers=headers) as response:
-            self._logger.debug("http response body: %s", response.text)
-            response.raise_for_status()
-            try:
-                json = await response.json()
-            except ValueError as e:
-                raise InvalidServerResponse(f"Parse response as json failed: {e}, response: {response.text}")
+        self._metrics.add_in_flight(method, 1)
+        try:
+            start = time.perf_counter()
+            async with self._session.post(url, json=request, headers=headers) as response:
+                received_headers = time.perf_counter()
+                self._metrics.observe_latency(method, PHASE_SEND, received_headers - start)
+                body = await response.read()
+                self._metrics.observe_latency(method, PHASE_RECEIVE, time.perf_counter() - received_headers)
+                self._metrics.observe_response_size(method, len(body))
+                if log:
+                    self._request_logger.log_response(url, method, response.status, body, time.perf_counter() - start)
+                response.raise_for_status()
+                try:
+                    start = time.perf_counter()
+                    json = await response.json(loads=self._decoder.loads)
+                    self._metrics.observe_latency(method, PHASE_DECODE, time.perf_counter() - start)
+                except ValueError as e:
+                    text = LazyBody(body, self._request_logger.max_body_size)
+                    raise InvalidServerResponse(f"Parse response as json failed: {e}, response: {text}")
+        finally:
+            self._metrics.add_in_flight(method, -1)
 
         # check stable response before check jsonrpc error
         try:
@@ -604,16 +767,8 @@ class AsyncClient:
                 json.get("diem_ledger_timestampusec"),
             )
         except StaleResponseError as e:
+            self._metrics.inc_stale_response(method)
             if not ignore_stale_response:
                 raise e
 
         return json
-
-
-def _parse_obj(factory):  # pyre-ignore
-    return lambda result: parser.ParseDict(result, factory(), ignore_unknown_fields=True) if result else None
-
-
-def _parse_list(factory):  # pyre-ignore
-    parser = _parse_obj(factory)
-    return lambda result: list(map(parser, result)) if result else []
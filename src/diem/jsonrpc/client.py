@@ -4,12 +4,13 @@
 
 import time
 import copy
-import dataclasses
 import google.protobuf.json_format as parser
 import requests
 import threading
 import typing
 import random
+import collections
+import functools
 
 from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
@@ -27,6 +28,10 @@ from diem.jsonrpc.constants import (
     DEFAULT_RETRY_DELAY,
     DEFAULT_WAIT_FOR_TRANSACTION_TIMEOUT_SECS,
     DEFAULT_WAIT_FOR_TRANSACTION_WAIT_DURATION_SECS,
+    DEFAULT_EVENTS_PAGE_SIZE,
+    DEFAULT_EVENTS_PREFETCH_PAGES,
+    DEFAULT_EVENTS_POLL_INTERVAL_SECS,
+    DEFAULT_GET_ACCOUNTS_CONCURRENCY,
     USER_AGENT_HTTP_HEADER,
 )
 from diem.jsonrpc.errors import (
@@ -41,26 +46,22 @@ from diem.jsonrpc.errors import (
     AccountNotFoundError,
 )
 from diem.jsonrpc.state import State
+from diem.jsonrpc.retry import RetryPolicy, observe_retries
+from diem.jsonrpc.decoders import Decoder
+from diem.jsonrpc.metrics import Metrics, PHASE_SEND, PHASE_RECEIVE, PHASE_DECODE, PHASE_PARSE, PHASE_TOTAL
+from diem.jsonrpc.http_pool import HTTPPoolConfig, PooledHTTPAdapter, PoolMetrics
+from diem.jsonrpc.request_logger import RequestLogger, LazyBody
+from diem.jsonrpc.ledger_cache import LedgerCache, caching_parser
+from diem.jsonrpc.rate_limiter import RateLimiter
+from diem.jsonrpc.transaction_waiter import TransactionWaiter
+from diem.jsonrpc import transactions_fetcher
 
 
-@dataclasses.dataclass
-class Retry:
-    max_retries: int
-    delay_secs: float
-    exception: typing.Type[Exception]
+class Retry(RetryPolicy):
+    """Retry is a `RetryPolicy` executing sync function, see `diem.jsonrpc.retry` for details"""
 
     def execute(self, fn: typing.Callable):  # pyre-ignore
-        tries = 0
-        while tries < self.max_retries:
-            tries += 1
-            try:
-                return fn()
-            except self.exception as e:
-                if tries < self.max_retries:
-                    # simplest backoff strategy: tries * delay
-                    time.sleep(self.delay_secs * tries)
-                else:
-                    raise e
+        return self.execute_sync(fn)
 
 
 class RequestStrategy:
@@ -74,6 +75,16 @@ class RequestStrategy:
     ) -> typing.Dict[str, typing.Any]:
         return client._send_http_request(client._url, request, ignore_stale_response)
 
+    def hosts(self) -> int:
+        """number of servers requests are sent to"""
+
+        return 1
+
+    def max_concurrency(self) -> int:
+        """max number of concurrent requests sent to a server by the strategy, 0 for unknown"""
+
+        return 0
+
 
 class RequestWithBackups(RequestStrategy):
     """RequestWithBackups implements strategies for primary-backup model.
@@ -113,6 +124,13 @@ class RequestWithBackups(RequestStrategy):
         self._executor = executor
         self._fallback = fallback
 
+    def hosts(self) -> int:
+        return 1 + len(self._backups)
+
+    def max_concurrency(self) -> int:
+        # ThreadPoolExecutor has no public accessor for max workers
+        return getattr(self._executor, "_max_workers", 0)
+
     def send_request(
         self, client: "Client", request: typing.Dict[str, typing.Any], ignore_stale_response: bool
     ) -> typing.Dict[str, typing.Any]:
@@ -151,19 +169,55 @@ class Client:
         server_url: str,
         session: typing.Optional[requests.Session] = None,
         timeout: typing.Optional[typing.Tuple[float, float]] = None,
-        retry: typing.Optional[Retry] = None,
+        retry: typing.Optional[RetryPolicy] = None,
         rs: typing.Optional[RequestStrategy] = None,
         logger: typing.Optional[Logger] = None,
+        rate_limiter: typing.Optional[RateLimiter] = None,
+        decoder: typing.Optional[Decoder] = None,
+        pool: typing.Optional[HTTPPoolConfig] = None,
+        metrics: typing.Optional[Metrics] = None,
+        request_logger: typing.Optional[RequestLogger] = None,
+        cache: typing.Optional[LedgerCache] = None,
     ) -> None:
         self._url: str = server_url
-        self._session: requests.Session = session or requests.Session()
+        self._rs: RequestStrategy = rs or RequestStrategy()
+        self._session: requests.Session = self._init_session(session, pool)
         self._session.headers.update({"User-Agent": USER_AGENT_HTTP_HEADER})
         self._timeout: typing.Tuple[float, float] = timeout or (DEFAULT_CONNECT_TIMEOUT_SECS, DEFAULT_TIMEOUT_SECS)
         self._last_known_server_state: State = State(chain_id=-1, version=-1, timestamp_usecs=-1)
         self._lock = threading.Lock()
-        self._retry: Retry = retry or Retry(DEFAULT_MAX_RETRIES, DEFAULT_RETRY_DELAY, StaleResponseError)
-        self._rs: RequestStrategy = rs or RequestStrategy()
+        self._retry: RetryPolicy = retry or Retry(DEFAULT_MAX_RETRIES, DEFAULT_RETRY_DELAY, StaleResponseError)
         self._logger: Logger = logger or getLogger(__name__)
+        self._request_logger: RequestLogger = request_logger or RequestLogger(self._logger)
+        self._rate_limiter: typing.Optional[RateLimiter] = rate_limiter
+        self._decoder: Decoder = decoder or Decoder()
+        self._metrics: Metrics = metrics or Metrics()
+        self._cache: typing.Optional[LedgerCache] = cache
+        self._transaction_waiter: typing.Optional[TransactionWaiter] = None
+
+    def _init_session(
+        self, session: typing.Optional[requests.Session], pool: typing.Optional[HTTPPoolConfig]
+    ) -> requests.Session:
+        if session is not None and pool is None:
+            return session
+        pool = pool or HTTPPoolConfig()
+        pool_maxsize = max(pool.pool_maxsize, self._rs.max_concurrency())
+        if session is None:
+            return pool.session(self._rs.hosts(), pool_maxsize)
+        pool.mount(session, self._rs.hosts(), pool_maxsize)
+        return session
+
+    def pool_metrics(self) -> typing.Dict[str, PoolMetrics]:
+        """returns connection pool metrics by host key `<host>:<port>`
+
+        Empty if the session is given without `HTTPPoolConfig`.
+        """
+
+        ret = {}
+        for adapter in {id(a): a for a in self._session.adapters.values()}.values():
+            if isinstance(adapter, PooledHTTPAdapter):
+                ret.update(adapter.metrics())
+        return ret
 
     # high level functions
 
@@ -272,7 +326,7 @@ class Client:
         """
 
         params = [int(version)] if version else []
-        return self.execute("get_metadata", params, _parse_obj(lambda: rpc.Metadata()))
+        return self.execute("get_metadata", params, self._decoder.parse_obj(lambda: rpc.Metadata()))
 
     def get_currencies(self) -> typing.List[rpc.CurrencyInfo]:
         """get currencies
@@ -280,7 +334,7 @@ class Client:
         See [JSON-RPC API Doc](https://github.com/diem/diem/blob/master/json-rpc/docs/method_get_currencies.md)
         """
 
-        return self.execute("get_currencies", [], _parse_list(lambda: rpc.CurrencyInfo()))
+        return self.execute("get_currencies", [], self._decoder.parse_list(lambda: rpc.CurrencyInfo()))
 
     def get_account(
         self, account_address: typing.Union[diem_types.AccountAddress, str]
@@ -292,7 +346,33 @@ class Client:
         """
 
         address = utils.account_address_hex(account_address)
-        return self.execute("get_account", [address], _parse_obj(lambda: rpc.Account()))
+        return self.execute("get_account", [address], self._decoder.parse_obj(lambda: rpc.Account()))
+
+    def get_accounts(
+        self,
+        account_addresses: typing.Iterable[typing.Union[diem_types.AccountAddress, str]],
+        concurrency: int = DEFAULT_GET_ACCOUNTS_CONCURRENCY,
+        executor: typing.Optional[ThreadPoolExecutor] = None,
+    ) -> typing.List[typing.Optional[rpc.Account]]:
+        """get on-chain accounts information by `get_account` concurrently
+
+        Requests are sent in the given `executor`, a `ThreadPoolExecutor(concurrency)` is created
+        for the call if `executor` is not provided. All requests share the client session connection pool.
+        Returns accounts in the order of given addresses, None if account not found.
+        Repeated addresses are fetched once.
+        """
+
+        addresses = [utils.account_address_hex(address) for address in account_addresses]
+        unique = list(dict.fromkeys(addresses))
+        if not unique:
+            return []
+        pool = executor or ThreadPoolExecutor(max(min(concurrency, len(unique)), 1))
+        try:
+            accounts = dict(zip(unique, pool.map(self.get_account, unique)))
+        finally:
+            if executor is None:
+                pool.shutdown(wait=False)
+        return [accounts[address] for address in addresses]
 
     def get_account_transaction(
         self,
@@ -309,7 +389,7 @@ class Client:
 
         address = utils.account_address_hex(account_address)
         params = [address, int(sequence), bool(include_events)]
-        return self.execute("get_account_transaction", params, _parse_obj(lambda: rpc.Transaction()))
+        return self.execute("get_account_transaction", params, self._decoder.parse_obj(lambda: rpc.Transaction()))
 
     def get_account_transactions(
         self,
@@ -327,7 +407,7 @@ class Client:
 
         address = utils.account_address_hex(account_address)
         params = [address, int(sequence), int(limit), bool(include_events)]
-        return self.execute("get_account_transactions", params, _parse_list(lambda: rpc.Transaction()))
+        return self.execute("get_account_transactions", params, self._decoder.parse_list(lambda: rpc.Transaction()))
 
     def get_transactions(
         self, start_version: int, limit: int, include_events: typing.Optional[bool] = None
@@ -340,7 +420,38 @@ class Client:
         """
 
         params = [int(start_version), int(limit), bool(include_events)]
-        return self.execute("get_transactions", params, _parse_list(lambda: rpc.Transaction()))
+        parse = self._decoder.parse_list(lambda: rpc.Transaction())
+        if self._cache:
+            cached = self._cache.get_transactions(params[0], params[1], params[2])
+            if cached is not None:
+                try:
+                    return parse(cached)
+                except parser.ParseError:
+                    # invalid cached transactions, fetch them from the server
+                    self._cache.discard_transactions(params[0], params[1])
+            cache_put = functools.partial(self._cache.put_transactions, include_events=params[2])
+            parse = caching_parser(parse, cache_put)
+        return self.execute("get_transactions", params, parse)
+
+    def iter_transactions(
+        self,
+        start_version: int,
+        end_version: typing.Optional[int] = None,
+        include_events: bool = False,
+        chunk_size: int = transactions_fetcher.DEFAULT_CHUNK_SIZE,
+        concurrency: int = transactions_fetcher.DEFAULT_CONCURRENCY,
+        retry: typing.Optional[RetryPolicy] = None,
+        executor: typing.Optional[ThreadPoolExecutor] = None,
+    ) -> typing.Iterator[rpc.Transaction]:
+        """iterate transactions in version range [start_version, end_version) in version order
+
+        Chunks of the range are fetched concurrently in a thread pool, see `diem.jsonrpc.transactions_fetcher`
+        for details.
+        """
+
+        return transactions_fetcher.iter_transactions(
+            self, start_version, end_version, include_events, chunk_size, concurrency, retry, executor
+        )
 
     def get_events(self, event_stream_key: str, start: int, limit: int) -> typing.List[rpc.Event]:
         """get events
@@ -351,11 +462,71 @@ class Client:
         """
 
         params = [event_stream_key, int(start), int(limit)]
-        return self.execute("get_events", params, _parse_list(lambda: rpc.Event()))
+        parse = self._decoder.parse_list(lambda: rpc.Event())
+        if self._cache:
+            cached = self._cache.get_events(event_stream_key, params[1], params[2])
+            if cached is not None:
+                try:
+                    return parse(cached)
+                except parser.ParseError:
+                    # invalid cached events, fetch them from the server
+                    self._cache.discard_events(event_stream_key, params[1], params[2])
+            parse = caching_parser(parse, self._cache.put_events)
+        return self.execute("get_events", params, parse)
+
+    def iter_events(
+        self,
+        event_stream_key: str,
+        start: int = 0,
+        page_size: int = DEFAULT_EVENTS_PAGE_SIZE,
+        prefetch: int = DEFAULT_EVENTS_PREFETCH_PAGES,
+        follow: bool = False,
+        poll_interval_secs: typing.Optional[float] = None,
+        executor: typing.Optional[ThreadPoolExecutor] = None,
+    ) -> typing.Iterator[rpc.Event]:
+        """iterate events of the event stream from the `start` sequence number
+
+        Keeps up to `prefetch` pages of `get_events` requests in flight in the given `executor`,
+        a `ThreadPoolExecutor(prefetch)` is created for the iteration if `executor` is not provided.
+        Events are yielded in sequence number order.
+        A page that has less than `page_size` events is the end of the stream: the iteration stops,
+        or when `follow` is True, keeps polling the stream for new events every `poll_interval_secs`.
+        """
+
+        pool = executor or ThreadPoolExecutor(max(prefetch, 1))
+        pending: typing.Deque[typing.Tuple[int, Future]] = collections.deque()
+        next_page = start
+        at_tail = False
+        try:
+            while True:
+                # only one request in flight when following the end of the stream
+                while len(pending) < (1 if at_tail else max(prefetch, 1)):
+                    future = pool.submit(self.get_events, event_stream_key, next_page, page_size)
+                    pending.append((next_page, future))
+                    next_page += page_size
+                seq, future = pending.popleft()
+                events = future.result()
+                for event in events:
+                    yield event
+                at_tail = len(events) < page_size
+                if at_tail:
+                    for _, f in pending:
+                        f.cancel()
+                    pending.clear()
+                    if not follow:
+                        return
+                    next_page = seq + len(events)
+                    if not events:
+                        time.sleep(poll_interval_secs or DEFAULT_EVENTS_POLL_INTERVAL_SECS)
+        finally:
+            for _, f in pending:
+                f.cancel()
+            if executor is None:
+                pool.shutdown(wait=False)
 
     def get_state_proof(self, version: int) -> rpc.StateProof:
         params = [int(version)]
-        return self.execute("get_state_proof", params, _parse_obj(lambda: rpc.StateProof()))
+        return self.execute("get_state_proof", params, self._decoder.parse_obj(lambda: rpc.StateProof()))
 
     def get_account_state_with_proof(
         self,
@@ -365,23 +536,19 @@ class Client:
     ) -> rpc.AccountStateWithProof:
         address = utils.account_address_hex(account_address)
         params = [address, version, ledger_version]
-        return self.execute("get_account_state_with_proof", params, _parse_obj(lambda: rpc.AccountStateWithProof()))
+        return self.execute(
+            "get_account_state_with_proof", params, self._decoder.parse_obj(lambda: rpc.AccountStateWithProof())
+        )
 
     def get_vasp_domain_map(self, batch_size: int = 100) -> typing.Dict[str, str]:
         domain_map = {}
-        event_index = 0
         tc_account = self.must_get_account(utils.account_address(TREASURY_ADDRESS))
         event_stream_key = tc_account.role.vasp_domain_events_key
-        while True:
-            events = self.get_events(event_stream_key, event_index, batch_size)
-            for event in events:
-                if event.data.removed:
-                    del domain_map[event.data.domain]
-                else:
-                    domain_map[event.data.domain] = event.data.address
-            if len(events) < batch_size:
-                break
-            event_index += batch_size
+        for event in self.iter_events(event_stream_key, 0, batch_size):
+            if event.data.removed:
+                del domain_map[event.data.domain]
+            else:
+                domain_map[event.data.domain] = event.data.address
         return domain_map
 
     def support_diem_id(self) -> bool:
@@ -507,6 +674,17 @@ class Client:
 
         raise WaitForTransactionTimeout(start_time, time.time())
 
+    def transaction_waiter(self) -> TransactionWaiter:
+        """returns the client shared transaction waiter service
+
+        The waiter multiplexes waiting for many pending transactions into one polling loop,
+        see `diem.jsonrpc.transaction_waiter` for details.
+        """
+
+        if self._transaction_waiter is None:
+            self._transaction_waiter = TransactionWaiter(self, logger=self._logger)
+        return self._transaction_waiter
+
     # pyre-ignore
     def execute(
         self,
@@ -521,9 +699,18 @@ class Client:
         Should only be called by get methods.
         """
 
-        return self._retry.execute(
-            lambda: self.execute_without_retry(method, params, result_parser, ignore_stale_response)
-        )
+        start = time.perf_counter()
+        try:
+            fn = observe_retries(
+                lambda: self.execute_without_retry(method, params, result_parser, ignore_stale_response),
+                lambda e: self._metrics.inc_retry(method, e),
+            )
+            # `Retry.execute` may be overridden by subclasses
+            if isinstance(self._retry, Retry):
+                return self._retry.execute(fn)
+            return self._retry.execute_sync(fn)
+        finally:
+            self._metrics.observe_latency(method, PHASE_TOTAL, time.perf_counter() - start)
 
     # pyre-ignore
     def execute_without_retry(
@@ -557,26 +744,49 @@ class Client:
 
             if "result" in json:
                 if result_parser:
-                    return result_parser(json["result"])
+                    start = time.perf_counter()
+                    result = result_parser(json["result"])
+                    self._metrics.observe_latency(method, PHASE_PARSE, time.perf_counter() - start)
+                    return result
                 return
 
             raise InvalidServerResponse(f"No error or result in response: {json}")
         except requests.RequestException as e:
-            raise NetworkError(f"Error in connecting to server: {e}\nPlease retry...")
+            raise NetworkError(f"Error in connecting to server: {e}\nPlease retry...") from e
         except parser.ParseError as e:
             raise InvalidServerResponse(f"Parse result failed: {e}, response: {json}")
 
     def _send_http_request(
         self, url: str, request: typing.Dict[str, typing.Any], ignore_stale_response: bool
     ) -> typing.Dict[str, typing.Any]:
-        self._logger.debug("http request body: %s", request)
-        response = self._session.post(url, json=request, timeout=self._timeout)
-        self._logger.debug("http response body: %s", response.text)
+        if self._rate_limiter:
+            self._rate_limiter.acquire(url, request["method"])
+        method = request["method"]
+        log = self._request_logger.sample(method)
+        if log:
+            self._request_logger.log_request(url, request)
+        self._metrics.add_in_flight(method, 1)
+        try:
+            start = time.perf_counter()
+            response = self._session.post(url, json=request, timeout=self._timeout)
+            duration = time.perf_counter() - start
+        finally:
+            self._metrics.add_in_flight(method, -1)
+        # response.elapsed is the time until response headers are parsed, body is read after it
+        send = min(response.elapsed.total_seconds(), duration)
+        self._metrics.observe_latency(method, PHASE_SEND, send)
+        self._metrics.observe_latency(method, PHASE_RECEIVE, duration - send)
+        self._metrics.observe_response_size(method, len(response.content))
+        if log:
+            self._request_logger.log_response(url, method, response.status_code, response.content, duration)
         response.raise_for_status()
         try:
-            json = response.json()
+            start = time.perf_counter()
+            json = self._decoder.loads(response.content)
+            self._metrics.observe_latency(method, PHASE_DECODE, time.perf_counter() - start)
         except ValueError as e:
-            raise InvalidServerResponse(f"Parse response as json failed: {e}, response: {response.text}")
+            text = LazyBody(response.content, self._request_logger.max_body_size)
+            raise InvalidServerResponse(f"Parse response as json failed: {e}, response: {text}")
 
         # check stable response before check jsonrpc error
         try:
@@ -584,16 +794,8 @@ class Client:
                 json.get("diem_chain_id"), json.get("diem_ledger_version"), json.get("diem_ledger_timestampusec")
             )
         except StaleResponseError as e:
+            self._metrics.inc_stale_response(method)
             if not ignore_stale_response:
                 raise e
 
         return json
-
-
-def _parse_obj(factory):  # pyre-ignore
-    return lambda result: parser.ParseDict(result, factory(), ignore_unknown_fields=True) if result else None
-
-
-def _parse_list(factory):  # pyre-ignore
-    parser = _parse_obj(factory)
-    return lambda result: list(map(parser, result)) if result else []
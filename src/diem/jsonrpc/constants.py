@@ -69,4 +69,8 @@ DEFAULT_MAX_RETRIES: int = 15
 DEFAULT_RETRY_DELAY: float = 0.2
 DEFAULT_WAIT_FOR_TRANSACTION_TIMEOUT_SECS: float = 30.0
 DEFAULT_WAIT_FOR_TRANSACTION_WAIT_DURATION_SECS: float = 0.2
+DEFAULT_EVENTS_PAGE_SIZE: int = 100
+DEFAULT_EVENTS_PREFETCH_PAGES: int = 2
+DEFAULT_EVENTS_POLL_INTERVAL_SECS: float = 1.0
+DEFAULT_GET_ACCOUNTS_CONCURRENCY: int = 8
 USER_AGENT_HTTP_HEADER: str = "diem-client-sdk-python / %s" % VERSION
@@ -0,0 +1,299 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""JSON-RPC response decoders.
+
+A decoder decodes http response body into JSON and converts JSON-RPC result into protobuf messages
+defined in `diem.jsonrpc.jsonrpc_pb2`.
+
+1. `Decoder` is the default decoder, it uses `json.loads` and `google.protobuf.json_format.ParseDict`.
+2. `FastDecoder` compiles a setter function for each field of the protobuf message types on first use,
+   and assigns field values directly without `ParseDict` reflection. It uses `orjson.loads` for decoding
+   JSON when `orjson` is installed.
+3. `LazyDecoder` returns `LazyMessage` results, which keep the raw JSON object and convert a field on first
+   access. It is for callers who only read a few fields of large responses, e.g. `version` and `hash` of
+   `get_transactions` results with events.
+
+Decoder is selected per client:
+
+```python
+from diem import jsonrpc
+
+client = jsonrpc.AsyncClient(<json-rpc-server-url>, decoder=jsonrpc.FastDecoder())
+```
+"""
+
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+from google.protobuf.message import Message
+import google.protobuf.json_format as parser
+import json, typing
+
+
+JsonLoads = typing.Callable[[typing.Union[str, bytes]], typing.Any]  # pyre-ignore
+MessageFactory = typing.Callable[[], Message]
+ResultParser = typing.Callable[[typing.Any], typing.Any]  # pyre-ignore
+
+
+class Decoder:
+    """Decoder decodes JSON by `json_loads` (default `json.loads`) and result by protobuf `ParseDict`"""
+
+    def __init__(self, json_loads: typing.Optional[JsonLoads] = None) -> None:
+        self.loads: JsonLoads = json_loads or json.loads
+
+    def parse_obj(self, factory: MessageFactory) -> ResultParser:
+        return lambda result: self.parse(result, factory()) if result else None
+
+    def parse_list(self, factory: MessageFactory) -> ResultParser:
+        parse = self.parse_obj(factory)
+        return lambda result: list(map(parse, result)) if result else []
+
+    def parse(self, result: typing.Any, msg: Message) -> Message:  # pyre-ignore
+        """parse JSON result into given message, raises `google.protobuf.json_format.ParseError` for invalid result"""
+
+        return parser.ParseDict(result, msg, ignore_unknown_fields=True)
+
+
+FieldSetter = typing.Callable[[Message, typing.Any], None]  # pyre-ignore
+
+
+class FastDecoder(Decoder):
+    """FastDecoder assigns protobuf message fields by compiled setter functions
+
+    Unknown fields and null values are ignored, same with `ParseDict(ignore_unknown_fields=True)`.
+    """
+
+    def __init__(self, json_loads: typing.Optional[JsonLoads] = None) -> None:
+        super().__init__(json_loads or _fast_json_loads())
+        self._setters: typing.Dict[str, typing.Dict[str, FieldSetter]] = {}
+
+    def parse(self, result: typing.Any, msg: Message) -> Message:  # pyre-ignore
+        if not isinstance(result, dict):
+            raise parser.ParseError(f"Message type {msg.DESCRIPTOR.full_name} expects object, but got {result!r}")
+        setters = self._message_setters(msg.DESCRIPTOR)
+        for name, value in result.items():
+            setter = setters.get(name)
+            if setter is None or value is None:
+                continue
+            try:
+                setter(msg, value)
+            except (parser.ParseError, TypeError, ValueError, AttributeError) as e:
+                raise parser.ParseError(f"Failed to parse {name} field: {e}")
+        return msg
+
+    def _message_setters(self, descriptor: Descriptor) -> typing.Dict[str, FieldSetter]:
+        setters = self._setters.get(descriptor.full_name)
+        if setters is None:
+            setters = {}
+            # register first to support recursive message types
+            self._setters[descriptor.full_name] = setters
+            for field in descriptor.fields:
+                setter = self._field_setter(field)
+                setters[field.name] = setter
+                setters[field.json_name] = setter
+        return setters
+
+    def _field_setter(self, field: FieldDescriptor) -> FieldSetter:
+        name = field.name
+        repeated = field.label == FieldDescriptor.LABEL_REPEATED
+
+        if field.type == FieldDescriptor.TYPE_MESSAGE:
+            parse = self.parse
+
+            if repeated:
+
+                def set_messages(msg: Message, value: typing.Any) -> None:  # pyre-ignore
+                    container = getattr(msg, name)
+                    for item in _list(value):
+                        parse(item, container.add())
+
+                return set_messages
+
+            def set_message(msg: Message, value: typing.Any) -> None:  # pyre-ignore
+                sub = getattr(msg, name)
+                sub.SetInParent()
+                parse(value, sub)
+
+            return set_message
+
+        convert = _SCALAR_CONVERTERS.get(field.type)
+        if convert is None:
+            raise NotImplementedError(f"unsupported field type {field.type} of {field.full_name}")
+
+        if repeated:
+
+            def set_scalars(msg: Message, value: typing.Any) -> None:  # pyre-ignore
+                getattr(msg, name).extend([convert(item) for item in _list(value)])
+
+            return set_scalars
+
+        def set_scalar(msg: Message, value: typing.Any) -> None:  # pyre-ignore
+            setattr(msg, name, convert(value))
+
+        return set_scalar
+
+
+class LazyDecoder(FastDecoder):
+    """LazyDecoder decodes results into `LazyMessage`
+
+    Result is not validated until fields are accessed, invalid field value raises
+    `google.protobuf.json_format.ParseError` when it is accessed.
+    """
+
+    def parse_obj(self, factory: MessageFactory) -> ResultParser:
+        return lambda result: LazyMessage(result, _message_class(factory), self) if result else None
+
+
+class LazyMessage:
+    """LazyMessage is a read-only protobuf message view of a JSON object
+
+    Fields are converted on first access and cached: scalar fields return python values,
+    message fields return `LazyMessage`, repeated fields return list. Missing fields return the
+    protobuf default values.
+    `materialize` converts the JSON object into the protobuf message; `isinstance` checks against
+    protobuf message types should be done on the materialized message.
+    """
+
+    __slots__ = ("_raw", "_message_class", "_decoder", "_cache")
+
+    def __init__(
+        self,
+        raw: typing.Dict[str, typing.Any],
+        message_class: typing.Type[Message],
+        decoder: FastDecoder,  # pyre-ignore
+    ) -> None:
+        if not isinstance(raw, dict):
+            raise parser.ParseError(
+                f"Message type {message_class.DESCRIPTOR.full_name} expects object, but got {raw!r}"
+            )
+        self._raw = raw
+        self._message_class = message_class
+        self._decoder = decoder
+        self._cache: typing.Dict[str, typing.Any] = {}  # pyre-ignore
+
+    @property
+    def DESCRIPTOR(self) -> Descriptor:  # noqa: N802
+        return self._message_class.DESCRIPTOR
+
+    def __getattr__(self, name: str) -> typing.Any:  # pyre-ignore
+        if name.startswith("_"):
+            raise AttributeError(name)
+        cache = self._cache
+        if name in cache:
+            return cache[name]
+        field = self._message_class.DESCRIPTOR.fields_by_name.get(name)
+        if field is None:
+            raise AttributeError(f"{self._message_class.DESCRIPTOR.full_name} has no field {name}")
+        try:
+            value = self._convert(field, self._raw.get(name))
+        except (parser.ParseError, TypeError, ValueError) as e:
+            raise parser.ParseError(f"Failed to parse {name} field: {e}")
+        cache[name] = value
+        return value
+
+    def _convert(self, field: FieldDescriptor, value: typing.Any) -> typing.Any:  # pyre-ignore
+        repeated = field.label == FieldDescriptor.LABEL_REPEATED
+        if field.type == FieldDescriptor.TYPE_MESSAGE:
+            cls = _field_message_class(self._message_class, field)
+            if repeated:
+                return [LazyMessage(item, cls, self._decoder) for item in _list(value)] if value is not None else []
+            return LazyMessage(value if value is not None else {}, cls, self._decoder)
+        if value is None:
+            return [] if repeated else field.default_value
+        convert = _SCALAR_CONVERTERS[field.type]
+        return [convert(item) for item in _list(value)] if repeated else convert(value)
+
+    def HasField(self, name: str) -> bool:  # noqa: N802
+        return self._raw.get(name) is not None
+
+    def materialize(self) -> Message:
+        return self._decoder.parse(self._raw, self._message_class())
+
+    def SerializeToString(self) -> bytes:  # noqa: N802
+        return self.materialize().SerializeToString()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyMessage):
+            return self.materialize() == other.materialize()
+        return self.materialize() == other
+
+    def __str__(self) -> str:
+        return str(self.materialize())
+
+    def __repr__(self) -> str:
+        return f"LazyMessage<{self._message_class.DESCRIPTOR.full_name}>({self._raw!r})"
+
+
+_MESSAGE_CLASSES: typing.Dict[typing.Tuple[str, str], typing.Type[Message]] = {}
+
+
+def _message_class(factory: MessageFactory) -> typing.Type[Message]:
+    return type(factory())
+
+
+def _field_message_class(cls: typing.Type[Message], field: FieldDescriptor) -> typing.Type[Message]:
+    key = (cls.DESCRIPTOR.full_name, field.name)
+    ret = _MESSAGE_CLASSES.get(key)
+    if ret is None:
+        value = getattr(cls(), field.name)
+        ret = type(value.add()) if field.label == FieldDescriptor.LABEL_REPEATED else type(value)
+        _MESSAGE_CLASSES[key] = ret
+    return ret
+
+
+def _list(value: typing.Any) -> typing.List[typing.Any]:  # pyre-ignore
+    if not isinstance(value, list):
+        raise parser.ParseError(f"repeated field expects list, but got {value!r}")
+    return value
+
+
+def _int(value: typing.Any) -> int:  # pyre-ignore
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return int(value)
+    raise parser.ParseError(f"Couldn't parse integer: {value!r}")
+
+
+def _float(value: typing.Any) -> float:  # pyre-ignore
+    if isinstance(value, bool):
+        raise parser.ParseError(f"Couldn't parse float: {value!r}")
+    return float(value)
+
+
+def _bool(value: typing.Any) -> bool:  # pyre-ignore
+    if isinstance(value, bool):
+        return value
+    raise parser.ParseError(f"Expected true or false without quotes, but got {value!r}")
+
+
+def _str(value: typing.Any) -> str:  # pyre-ignore
+    if isinstance(value, str):
+        return value
+    raise parser.ParseError(f"Expected string, but got {value!r}")
+
+
+_SCALAR_CONVERTERS: typing.Dict[int, typing.Callable[[typing.Any], typing.Any]] = {  # pyre-ignore
+    FieldDescriptor.TYPE_UINT64: _int,
+    FieldDescriptor.TYPE_UINT32: _int,
+    FieldDescriptor.TYPE_INT64: _int,
+    FieldDescriptor.TYPE_INT32: _int,
+    FieldDescriptor.TYPE_SINT64: _int,
+    FieldDescriptor.TYPE_SINT32: _int,
+    FieldDescriptor.TYPE_FIXED64: _int,
+    FieldDescriptor.TYPE_FIXED32: _int,
+    FieldDescriptor.TYPE_DOUBLE: _float,
+    FieldDescriptor.TYPE_FLOAT: _float,
+    FieldDescriptor.TYPE_BOOL: _bool,
+    FieldDescriptor.TYPE_STRING: _str,
+}
+
+
+def _fast_json_loads() -> JsonLoads:
+    try:
+        import orjson
+
+        return orjson.loads
+    except ImportError:
+        return json.loads
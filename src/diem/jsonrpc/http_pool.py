@@ -0,0 +1,199 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""HTTP connection pool configuration for the sync `Client`.
+
+`requests` mounts `HTTPAdapter` with 10 connections per host, concurrent requests more than the pool size
+open new connections and discard them after the response is read ("Connection pool is full" warning).
+`HTTPPoolConfig` configures the pool size, TCP keep-alive, TCP_NODELAY and socket layer retries:
+
+```python
+from diem import jsonrpc
+
+client = jsonrpc.Client(<json-rpc-server-url>, pool=jsonrpc.HTTPPoolConfig(pool_maxsize=32))
+...
+print(client.pool_metrics())
+```
+
+When `RequestWithBackups` is used, the pool size is raised to the executor max workers, so that every
+executor thread can hold a connection of each server.
+"""
+
+from dataclasses import dataclass, field
+import requests, socket, threading, typing
+
+from requests.adapters import HTTPAdapter
+from urllib3.util import parse_url
+
+
+DEFAULT_POOL_MAXSIZE: int = 10
+DEFAULT_KEEP_ALIVE_IDLE_SECS: int = 60
+
+
+@dataclass
+class HTTPPoolConfig:
+    """HTTPPoolConfig configures connection pools of the `Client` session
+
+    - pool_maxsize: max number of connections kept for reuse per host.
+    - pool_block: block requests when all connections of the host are in use, instead of opening
+      connections that will be discarded.
+    - keep_alive: enable TCP keep-alive (SO_KEEPALIVE), probing idle connections after `keep_alive_idle_secs`.
+    - tcp_nodelay: disable Nagle's algorithm (TCP_NODELAY).
+    - max_retries: number of retries for connection errors at the socket layer, requests are not retried
+      after the data is sent to the server.
+    """
+
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+    pool_block: bool = False
+    keep_alive: bool = True
+    keep_alive_idle_secs: int = DEFAULT_KEEP_ALIVE_IDLE_SECS
+    tcp_nodelay: bool = True
+    max_retries: int = 0
+
+    def socket_options(self) -> typing.List[typing.Tuple[int, int, int]]:
+        options = []
+        if self.tcp_nodelay:
+            options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+        if self.keep_alive:
+            options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+            # TCP_KEEPIDLE is not available on all platforms, e.g. macOS
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, self.keep_alive_idle_secs))
+        return options
+
+    def session(self, hosts: int = 1, pool_maxsize: typing.Optional[int] = None) -> requests.Session:
+        """create `requests.Session` with `PooledHTTPAdapter` mounted for http and https
+
+        `hosts` is the number of host pools to keep, `pool_maxsize` overrides the configured pool size.
+        """
+
+        session = requests.Session()
+        self.mount(session, hosts, pool_maxsize)
+        return session
+
+    def mount(self, session: requests.Session, hosts: int = 1, pool_maxsize: typing.Optional[int] = None) -> None:
+        adapter = PooledHTTPAdapter(self, hosts, pool_maxsize or self.pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+
+@dataclass
+class PoolMetrics:
+    """PoolMetrics is connection pool utilisation of a host
+
+    `in_use` counts connections held by responses, a connection is in use until the response body is read
+    or the response is closed (`stream=True` responses).
+    `pool_full` counts requests sent when all `maxsize` connections were in use, these requests
+    either blocked (`pool_block=True`) or opened a connection discarded afterwards.
+    """
+
+    maxsize: int
+    in_use: int = 0
+    idle: int = 0
+    peak_in_use: int = 0
+    requests: int = 0
+    pool_full: int = 0
+
+
+@dataclass
+class _HostStats:
+    in_use: int = 0
+    peak_in_use: int = 0
+    requests: int = 0
+    pool_full: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """PooledHTTPAdapter is `HTTPAdapter` configured by `HTTPPoolConfig`, and tracks pool utilisation"""
+
+    def __init__(self, config: HTTPPoolConfig, hosts: int, pool_maxsize: int) -> None:
+        self._config = config
+        self._stats: typing.Dict[str, _HostStats] = {}
+        self._stats_lock = threading.Lock()
+        super().__init__(
+            pool_connections=max(hosts, 1),
+            pool_maxsize=pool_maxsize,
+            max_retries=config.max_retries,
+            pool_block=config.pool_block,
+        )
+
+    @property
+    def pool_maxsize(self) -> int:
+        return self._pool_maxsize
+
+    def init_poolmanager(self, *args, **kwargs) -> None:  # pyre-ignore
+        kwargs["socket_options"] = self._config.socket_options()
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request: requests.PreparedRequest, *args, **kwargs) -> requests.Response:  # pyre-ignore
+        stats = self._host_stats(_host_key(request.url))
+        with stats.lock:
+            stats.requests += 1
+            if stats.in_use >= self._pool_maxsize:
+                stats.pool_full += 1
+            stats.in_use += 1
+            stats.peak_in_use = max(stats.peak_in_use, stats.in_use)
+        try:
+            resp = super().send(request, *args, **kwargs)
+        except BaseException:
+            with stats.lock:
+                stats.in_use -= 1
+            raise
+        # the connection is returned to the pool after the response body is read or the response is closed,
+        # urllib3 calls `release_conn` of the raw response for both.
+        raw = resp.raw
+        release_conn = getattr(raw, "release_conn", None)
+        if release_conn is None:
+            with stats.lock:
+                stats.in_use -= 1
+            return resp
+        released = [False]
+
+        def release() -> None:
+            with stats.lock:
+                if not released[0]:
+                    released[0] = True
+                    stats.in_use -= 1
+            release_conn()
+
+        raw.release_conn = release
+        return resp
+
+    def metrics(self) -> typing.Dict[str, PoolMetrics]:
+        """returns pool metrics by host key `<host>:<port>`"""
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+        ret = {}
+        for host, s in stats.items():
+            with s.lock:
+                ret[host] = PoolMetrics(
+                    maxsize=self._pool_maxsize,
+                    in_use=s.in_use,
+                    peak_in_use=s.peak_in_use,
+                    requests=s.requests,
+                    pool_full=s.pool_full,
+                )
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            host = "%s:%s" % (pool.host, pool.port)
+            metrics = ret.setdefault(host, PoolMetrics(maxsize=self._pool_maxsize))
+            # the pool queue is filled with None placeholders for connections not created yet
+            metrics.idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        return ret
+
+    def _host_stats(self, host: str) -> _HostStats:
+        with self._stats_lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = _HostStats()
+            return stats
+
+
+def _host_key(url: typing.Optional[str]) -> str:
+    u = parse_url(url or "")
+    return "%s:%s" % (u.host, u.port or (443 if u.scheme == "https" else 80))
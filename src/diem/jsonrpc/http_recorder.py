@@ -0,0 +1,406 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Record and replay HTTP traffic of JSON-RPC clients and the off-chain client.
+
+`Recorder` records request and response pairs with timings into a gzip compressed JSON lines file,
+`Replay` serves recorded responses without network, so that benchmarks of response parsing, off-chain command
+processing and application code are repeatable and independent of network variance:
+
+```python
+from diem import jsonrpc, offchain
+
+with jsonrpc.Recorder("traffic.jsonl.gz") as recorder:
+    client = jsonrpc.AsyncClient(<json-rpc-server-url>, session_factory=recorder.session_factory())
+    offchain_client = offchain.Client(<address>, client, <hrp>, session_factory=recorder.session_factory())
+    ...
+    await offchain_client.close()
+    await client.close()
+
+replay = jsonrpc.Replay.load("traffic.jsonl.gz", time_scale=0)
+client = jsonrpc.AsyncClient(<json-rpc-server-url>, session_factory=replay.session_factory())
+```
+
+`Recorder.session()` and `Replay.session()` create `requests.Session` with recording / replaying transport adapters
+mounted for the sync `Client`.
+
+Requests are matched with recorded exchanges by a key computed by the `matcher` of `Replay`, exchanges with the same
+key are served in the recorded order. The default matcher `request_key` tolerates non-deterministic request bodies:
+
+- JSON-RPC requests are keyed by HTTP method, URL, and the JSON-RPC method and params; except methods listed in
+  `NON_DETERMINISTIC_METHODS` (e.g. `submit`, which carries freshly signed transactions) are keyed by JSON-RPC
+  method only.
+- Other requests, e.g. off-chain requests which are JWS messages of commands with random `cid`, are keyed by HTTP
+  method and URL.
+
+`ordered_key` keys requests by HTTP method and URL only, for replaying traffic purely in the recorded order.
+A custom matcher is a function of `(method, url, body)` returning the key.
+
+The replayed response is delayed by recorded response time multiplied by `time_scale`; 0 serves responses
+immediately.
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from urllib.parse import urlencode
+import aiohttp, asyncio, base64, collections, gzip, json, threading, time, typing, requests
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+
+FORMAT_VERSION: int = 1
+NON_DETERMINISTIC_METHODS: typing.Set[str] = {"submit"}
+
+Matcher = typing.Callable[[str, str, bytes], str]
+
+
+class ReplayMissError(Exception):
+    """raised when there is no recorded exchange for the request"""
+
+
+@dataclass
+class Exchange:
+    """Exchange is a recorded request and response pair
+
+    `started` is seconds since the recording started, `elapsed` is seconds from sending the request to
+    receiving the full response body.
+    """
+
+    method: str
+    url: str
+    request_body: bytes
+    status: int
+    response_body: bytes
+    content_type: str = field(default="application/json")
+    started: float = field(default=0)
+    elapsed: float = field(default=0)
+
+    @property
+    def key(self) -> str:
+        return request_key(self.method, self.url, self.request_body)
+
+    def to_json(self) -> typing.Dict[str, typing.Any]:  # pyre-ignore
+        ret = {k: v for k, v in self.__dict__.items() if not isinstance(v, bytes)}
+        ret.update(_encode_body("request", self.request_body))
+        ret.update(_encode_body("response", self.response_body))
+        return ret
+
+    @staticmethod
+    def from_json(obj: typing.Dict[str, typing.Any]) -> "Exchange":  # pyre-ignore
+        request, response = _decode_body(obj, "request"), _decode_body(obj, "response")
+        return Exchange(request_body=request, response_body=response, **obj)
+
+
+def request_key(method: str, url: str, body: bytes) -> str:
+    """returns key for matching request with recorded exchanges, see module document"""
+
+    key = ordered_key(method, url, body)
+    if body[:1] in [b"{", b"["]:
+        try:
+            obj = json.loads(body)
+        except ValueError:
+            return key
+        if isinstance(obj, dict):
+            return f"{key} {json.dumps(_rpc_key(obj), sort_keys=True)}"
+        if isinstance(obj, list):
+            return f"{key} {json.dumps([_rpc_key(r) for r in obj], sort_keys=True)}"
+    return key
+
+
+def ordered_key(method: str, url: str, body: bytes) -> str:
+    """returns key of HTTP method and URL, requests to the same URL are served in the recorded order"""
+
+    return f"{method.upper()} {url}"
+
+
+def _rpc_key(obj: typing.Any) -> typing.Any:  # pyre-ignore
+    if not isinstance(obj, dict):
+        return obj
+    if obj.get("method") in NON_DETERMINISTIC_METHODS:
+        return [obj.get("method")]
+    return [obj.get("method"), obj.get("params")]
+
+
+class Recorder:
+    """Recorder appends recorded exchanges into a gzip compressed JSON lines file, it is threadsafe"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: typing.IO[str] = gzip.open(path, "wt", encoding="utf-8")
+        self._file.write(json.dumps({"version": FORMAT_VERSION}) + "\n")
+        self._lock = threading.Lock()
+        self._start: float = time.perf_counter()
+        self.count: int = 0
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *args: typing.Any) -> None:  # pyre-ignore
+        self.close()
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        request_body: bytes,
+        status: int,
+        response_body: bytes,
+        content_type: str,
+        start: float,
+    ) -> None:
+        """record an exchange, `start` is the `time.perf_counter()` value when the request was sent"""
+
+        now = time.perf_counter()
+        exchange = Exchange(
+            method, url, request_body, status, response_body, content_type, start - self._start, now - start
+        )
+        line = json.dumps(exchange.to_json(), separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def session(self, session: typing.Optional[requests.Session] = None) -> requests.Session:
+        """returns the given session (default new session) with recording adapters mounted"""
+
+        return _mount(session or requests.Session(), RecordingAdapter(self))
+
+    def session_factory(
+        self, factory: typing.Callable[..., aiohttp.ClientSession] = aiohttp.ClientSession
+    ) -> typing.Callable[..., "RecordingSession"]:
+        """returns session factory for `AsyncClient` and `offchain.Client`, sessions created by the `factory` are recorded
+
+        Keyword arguments of the returned factory are passed to the `factory`.
+        """
+
+        return lambda **kwargs: RecordingSession(factory(**kwargs), self)
+
+
+class Replay:
+    """Replay serves responses of recorded exchanges, it is threadsafe
+
+    `repeat`: serve exchanges of a key again from the first one after all of them are served, instead of
+    raising `ReplayMissError`.
+    `matcher`: function computing key of a request for matching it with recorded exchanges, see module document.
+    """
+
+    def __init__(
+        self,
+        exchanges: typing.Iterable[Exchange],
+        time_scale: float = 1.0,
+        repeat: bool = False,
+        matcher: Matcher = request_key,
+    ) -> None:
+        self.exchanges: typing.Dict[str, typing.List[Exchange]] = collections.defaultdict(list)
+        for exchange in exchanges:
+            self.exchanges[matcher(exchange.method, exchange.url, exchange.request_body)].append(exchange)
+        self.time_scale = time_scale
+        self.repeat = repeat
+        self.matcher = matcher
+        self._next: typing.Dict[str, int] = collections.defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(path: str, time_scale: float = 1.0, repeat: bool = False, matcher: Matcher = request_key) -> "Replay":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != FORMAT_VERSION:
+                raise ValueError(f"unsupported recording format version: {header}")
+            return Replay([Exchange.from_json(json.loads(line)) for line in f], time_scale, repeat, matcher)
+
+    def find(self, method: str, url: str, body: bytes) -> Exchange:
+        key = self.matcher(method, url, body)
+        with self._lock:
+            exchanges = self.exchanges.get(key)
+            if not exchanges or (self._next[key] >= len(exchanges) and not self.repeat):
+                raise ReplayMissError(f"no recorded response for request: {key}")
+            index = self._next[key] % len(exchanges)
+            self._next[key] = index + 1
+            return exchanges[index]
+
+    def delay(self, exchange: Exchange) -> float:
+        return exchange.elapsed * self.time_scale
+
+    def session(self, session: typing.Optional[requests.Session] = None) -> requests.Session:
+        """returns the given session (default new session) with replaying adapters mounted"""
+
+        return _mount(session or requests.Session(), ReplayAdapter(self))
+
+    def session_factory(self) -> typing.Callable[..., "ReplaySession"]:
+        """returns session factory for `AsyncClient` and `offchain.Client`, keyword arguments are ignored"""
+
+        return lambda **kwargs: ReplaySession(self)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """RecordingAdapter sends requests by `HTTPAdapter`, and records exchanges"""
+
+    def __init__(self, recorder: Recorder, **kwargs: typing.Any) -> None:  # pyre-ignore
+        super().__init__(**kwargs)
+        self.recorder = recorder
+
+    def send(self, request: requests.PreparedRequest, **kwargs: typing.Any) -> requests.Response:  # pyre-ignore
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        method, url, body = str(request.method), str(request.url), _body_bytes(request.body)
+        content_type = response.headers.get("Content-Type", "")
+        self.recorder.record(method, url, body, response.status_code, response.content, content_type, start)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """ReplayAdapter serves responses of recorded exchanges without network"""
+
+    def __init__(self, replay: Replay) -> None:
+        super().__init__()
+        self.replay = replay
+
+    def send(self, request: requests.PreparedRequest, **kwargs: typing.Any) -> requests.Response:  # pyre-ignore
+        exchange = self.replay.find(str(request.method), str(request.url), _body_bytes(request.body))
+        delay = self.replay.delay(exchange)
+        if delay > 0:
+            time.sleep(delay)
+        response = requests.Response()
+        response.status_code = exchange.status
+        response._content = exchange.response_body
+        response.headers["Content-Type"] = exchange.content_type
+        response.url = str(request.url)
+        response.request = request
+        response.elapsed = timedelta(seconds=delay)
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+class ReplayResponse:
+    """ReplayResponse implements `aiohttp.ClientResponse` methods used by `AsyncClient` and `offchain.Client`"""
+
+    def __init__(self, method: str, url: str, exchange: Exchange) -> None:
+        self.method = method
+        self.url = URL(url)
+        self.status: int = exchange.status
+        self.headers: CIMultiDictProxy = CIMultiDictProxy(CIMultiDict({"Content-Type": exchange.content_type}))
+        self._body: bytes = exchange.response_body
+
+    async def __aenter__(self) -> "ReplayResponse":
+        return self
+
+    async def __aexit__(self, *args: typing.Any) -> None:  # pyre-ignore
+        pass
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return self._body.decode(encoding)
+
+    async def json(
+        self, loads: typing.Callable[[str], typing.Any] = json.loads, **kwargs: typing.Any
+    ) -> typing.Any:  # pyre-ignore
+        return loads(self._body.decode("utf-8"))
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            request_info = aiohttp.RequestInfo(self.url, self.method, self.headers, self.url)
+            raise aiohttp.ClientResponseError(request_info, (), status=self.status, message=str(self.status))
+
+
+class _RequestContext:
+    def __init__(self, response: typing.Awaitable[ReplayResponse]) -> None:
+        self._response = response
+
+    async def __aenter__(self) -> ReplayResponse:
+        return await self._response
+
+    async def __aexit__(self, *args: typing.Any) -> None:  # pyre-ignore
+        pass
+
+
+class RecordingSession:
+    """RecordingSession wraps `aiohttp.ClientSession`, records exchanges of `post` requests"""
+
+    def __init__(self, session: aiohttp.ClientSession, recorder: Recorder) -> None:
+        self.session = session
+        self.recorder = recorder
+
+    def post(self, url: str, **kwargs: typing.Any) -> _RequestContext:  # pyre-ignore
+        return _RequestContext(self._post(url, **kwargs))
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def _post(self, url: str, **kwargs: typing.Any) -> ReplayResponse:  # pyre-ignore
+        url, body = _url_and_body(url, kwargs)
+        start = time.perf_counter()
+        async with self.session.post(url, data=body, headers=_headers(kwargs)) as response:
+            content = await response.read()
+            content_type = response.headers.get("Content-Type", "")
+        self.recorder.record("POST", url, body, response.status, content, content_type, start)
+        return ReplayResponse("POST", url, Exchange("POST", url, body, response.status, content, content_type))
+
+
+class ReplaySession:
+    """ReplaySession implements `aiohttp.ClientSession.post` by serving responses of recorded exchanges"""
+
+    def __init__(self, replay: Replay) -> None:
+        self.replay = replay
+
+    def post(self, url: str, **kwargs: typing.Any) -> _RequestContext:  # pyre-ignore
+        return _RequestContext(self._post(url, **kwargs))
+
+    async def close(self) -> None:
+        pass
+
+    async def _post(self, url: str, **kwargs: typing.Any) -> ReplayResponse:  # pyre-ignore
+        url, body = _url_and_body(url, kwargs)
+        exchange = self.replay.find("POST", url, body)
+        delay = self.replay.delay(exchange)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return ReplayResponse("POST", url, exchange)
+
+
+def _url_and_body(url: str, kwargs: typing.Dict[str, typing.Any]) -> typing.Tuple[str, bytes]:  # pyre-ignore
+    if kwargs.get("params"):
+        url = f"{url}?{urlencode(kwargs['params'])}"
+    if kwargs.get("json") is not None:
+        return (url, json.dumps(kwargs["json"]).encode("utf-8"))
+    return (url, _body_bytes(kwargs.get("data")))
+
+
+def _headers(kwargs: typing.Dict[str, typing.Any]) -> typing.Dict[str, str]:  # pyre-ignore
+    headers = dict(kwargs.get("headers") or {})
+    if kwargs.get("json") is not None:
+        headers.setdefault("Content-Type", "application/json")
+    return headers
+
+
+def _body_bytes(body: typing.Union[None, str, bytes]) -> bytes:  # pyre-ignore
+    if body is None:
+        return b""
+    return body.encode("utf-8") if isinstance(body, str) else bytes(body)
+
+
+def _mount(session: requests.Session, adapter: BaseAdapter) -> requests.Session:
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _encode_body(name: str, body: bytes) -> typing.Dict[str, str]:
+    try:
+        return {name: body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {f"{name}_b64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(obj: typing.Dict[str, typing.Any], name: str) -> bytes:  # pyre-ignore
+    if f"{name}_b64" in obj:
+        return base64.b64decode(obj.pop(f"{name}_b64"))
+    return obj.pop(name).encode("utf-8")
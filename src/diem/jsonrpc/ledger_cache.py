@@ -0,0 +1,220 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Persistent on-disk cache of committed transactions and events.
+
+Transactions at a given version and events at a given event stream sequence number never change once they are
+committed, hence they can be cached forever. `LedgerCache` stores JSON-RPC results of `get_transactions` and
+`get_events` in append-only files under a directory:
+
+- `transactions.dat` / `events.dat`: JSON encoded results, appended one after another.
+- `transactions.idx` / `events.idx`: append-only index records of key, offset and length of the data.
+
+Index records are loaded into memory when the cache is opened, data files are read through `mmap`.
+A record is visible after both its data and index record are written, incomplete records left by a crash are
+ignored when the cache is opened. Records that can't be decoded are discarded, and fetched from the server again.
+
+`Client` and `AsyncClient` serve `get_transactions` and `get_events` calls from the cache when the requested
+range is fully covered by the cache, otherwise they call the server and add the results into the cache:
+
+```python
+from diem import jsonrpc
+
+client = jsonrpc.AsyncClient(<json-rpc-server-url>, cache=jsonrpc.LedgerCache("/var/cache/diem"))
+```
+
+The cache is threadsafe, but should not be opened by multiple processes at the same time.
+"""
+
+import json, mmap, os, struct, threading, typing
+
+
+JsonResult = typing.Dict[str, typing.Any]  # pyre-ignore
+
+# index record header: data offset, data length, flags, key length
+_INDEX_HEADER = struct.Struct("<QIBH")
+_FLAG_WITH_EVENTS = 1
+
+
+class AppendOnlyStore:
+    """AppendOnlyStore is a key value store backed by append-only data and index files
+
+    Values are immutable: putting an existing key is ignored, unless the given flags have more bits.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._data_path = path + ".dat"
+        self._index_path = path + ".idx"
+        self._lock = threading.Lock()
+        self._index: typing.Dict[bytes, typing.Tuple[int, int, int]] = {}
+        self._data = open(self._data_path, "a+b")
+        self._data_size: int = os.path.getsize(self._data_path)
+        self._mmap: typing.Optional[mmap.mmap] = None
+        self._load_index()
+        self._index_file = open(self._index_path, "ab")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._index
+
+    def flags(self, key: bytes) -> typing.Optional[int]:
+        entry = self._index.get(key)
+        return entry[2] if entry else None
+
+    def get(self, key: bytes) -> typing.Optional[bytes]:
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        with self._lock:
+            mm = self._mmap
+            if mm is None or offset + length > len(mm):
+                mm = self._remap()
+            return mm[offset : offset + length]
+
+    def discard(self, key: bytes) -> None:
+        """removes the key from index, a later put of the key appends a new record overriding the discarded one"""
+
+        with self._lock:
+            self._index.pop(key, None)
+
+    def put(self, key: bytes, value: bytes, flags: int = 0) -> None:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None and entry[2] | flags == entry[2]:
+                return
+            offset = self._data_size
+            self._data.write(value)
+            self._data.flush()
+            self._data_size += len(value)
+            self._index_file.write(_INDEX_HEADER.pack(offset, len(value), flags, len(key)) + key)
+            self._index_file.flush()
+            self._index[key] = (offset, len(value), flags)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._data.close()
+            self._index_file.close()
+
+    def _remap(self) -> mmap.mmap:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, "rb") as f:
+            buf = f.read()
+        pos, valid = 0, 0
+        while pos + _INDEX_HEADER.size <= len(buf):
+            offset, length, flags, key_len = _INDEX_HEADER.unpack_from(buf, pos)
+            end = pos + _INDEX_HEADER.size + key_len
+            if end > len(buf) or offset + length > self._data_size:
+                break
+            self._index[buf[pos + _INDEX_HEADER.size : end]] = (offset, length, flags)
+            pos = valid = end
+        if valid < len(buf):
+            # drop incomplete records written by a crashed process
+            with open(self._index_path, "r+b") as f:
+                f.truncate(valid)
+
+
+class LedgerCache:
+    """LedgerCache caches committed transactions and events in the given directory, see module document"""
+
+    def __init__(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self._transactions = AppendOnlyStore(os.path.join(directory, "transactions"))
+        self._events = AppendOnlyStore(os.path.join(directory, "events"))
+
+    def get_transactions(
+        self, start_version: int, limit: int, include_events: bool
+    ) -> typing.Optional[typing.List[JsonResult]]:
+        """returns transactions if all versions in range [start_version, start_version + limit) are cached"""
+
+        keys = [_version_key(v) for v in range(start_version, start_version + limit)]
+        store = self._transactions
+        for key in keys:
+            flags = store.flags(key)
+            if flags is None or (include_events and not flags & _FLAG_WITH_EVENTS):
+                return None
+        ret = _loads(store, keys)
+        if ret is not None and not include_events:
+            for txn in ret:
+                txn["events"] = []
+        return ret
+
+    def put_transactions(self, txns: typing.List[JsonResult], include_events: bool) -> None:
+        flags = _FLAG_WITH_EVENTS if include_events else 0
+        for txn in txns:
+            self._transactions.put(_version_key(txn["version"]), _dumps(txn), flags)
+
+    def get_events(self, event_stream_key: str, start: int, limit: int) -> typing.Optional[typing.List[JsonResult]]:
+        """returns events if all sequence numbers in range [start, start + limit) of the event stream are cached"""
+
+        prefix = bytes.fromhex(event_stream_key)
+        keys = [_event_key(prefix, seq) for seq in range(start, start + limit)]
+        if not all(key in self._events for key in keys):
+            return None
+        return _loads(self._events, keys)
+
+    def put_events(self, events: typing.List[JsonResult]) -> None:
+        for event in events:
+            self._events.put(_event_key(bytes.fromhex(event["key"]), event["sequence_number"]), _dumps(event))
+
+    def discard_transactions(self, start_version: int, limit: int) -> None:
+        for v in range(start_version, start_version + limit):
+            self._transactions.discard(_version_key(v))
+
+    def discard_events(self, event_stream_key: str, start: int, limit: int) -> None:
+        prefix = bytes.fromhex(event_stream_key)
+        for seq in range(start, start + limit):
+            self._events.discard(_event_key(prefix, seq))
+
+    def close(self) -> None:
+        self._transactions.close()
+        self._events.close()
+
+
+def caching_parser(
+    parse: typing.Callable[[typing.Any], typing.Any], put: typing.Callable[[typing.Any], None]  # pyre-ignore
+) -> typing.Callable[[typing.Any], typing.Any]:  # pyre-ignore
+    """returns result parser putting the JSON-RPC result into cache after it is parsed successfully"""
+
+    def parse_and_put(result: typing.Any) -> typing.Any:  # pyre-ignore
+        ret = parse(result)
+        if result:
+            put(result)
+        return ret
+
+    return parse_and_put
+
+
+def _loads(store: AppendOnlyStore, keys: typing.List[bytes]) -> typing.Optional[typing.List[JsonResult]]:
+    """returns decoded values of the keys, or None and discards the keys if any value can't be decoded"""
+
+    try:
+        return [json.loads(typing.cast(bytes, store.get(key))) for key in keys]
+    except ValueError:
+        for key in keys:
+            store.discard(key)
+        return None
+
+
+def _version_key(version: int) -> bytes:
+    return struct.pack(">Q", version)
+
+
+def _event_key(prefix: bytes, seq: int) -> bytes:
+    return prefix + struct.pack(">Q", seq)
+
+
+def _dumps(obj: JsonResult) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,191 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Continuous ledger tailer with checkpointing.
+
+`LedgerTailer` follows the chain from a version onwards and yields transactions in version order:
+
+1. The ledger tip is polled by `get_metadata`. When there is no new transaction, the poll interval doubles
+   from `min_poll_interval_secs` up to `max_poll_interval_secs`, and resets once new transactions are found.
+2. Versions between the last processed version and the tip are fetched by `transactions_fetcher`, which
+   pipelines `concurrency` pages of `page_size` transactions.
+3. A transaction is processed once the consumer asks for the next transaction. The last processed version is
+   saved to the `CheckpointStore` every `checkpoint_interval` transactions, when the tailer catches up the tip,
+   and when the iteration stops. A restarted tailer resumes from the version after the checkpoint, hence
+   transactions processed after the last checkpoint are delivered again (at-least-once).
+4. Backpressure: pages are only fetched ahead up to `concurrency` pages of the consumer, when the consumer falls
+   behind, the tailer stops fetching until the consumer catches up.
+
+```python
+from diem import jsonrpc
+
+async with jsonrpc.AsyncClient(<json-rpc-server-url>) as client:
+    tailer = jsonrpc.LedgerTailer(client, start_version=0, store=jsonrpc.FileCheckpointStore("tailer.json"))
+    async for txn in tailer:
+        ...
+```
+
+Breaking out of the `async for` loop does not close the iteration immediately, call `LedgerTailer.aclose`
+to save the checkpoint, or `LedgerTailer.stop` to end the iteration.
+"""
+
+from logging import Logger, getLogger
+import asyncio, json, os, typing
+
+from diem.jsonrpc import jsonrpc_pb2 as rpc
+from diem.jsonrpc import transactions_fetcher
+from diem.jsonrpc.retry import RetryPolicy
+
+if typing.TYPE_CHECKING:
+    from diem.jsonrpc.async_client import AsyncClient
+
+
+DEFAULT_PAGE_SIZE: int = 500
+DEFAULT_MIN_POLL_INTERVAL_SECS: float = 0.1
+DEFAULT_MAX_POLL_INTERVAL_SECS: float = 2.0
+DEFAULT_CHECKPOINT_INTERVAL: int = 1000
+
+
+class CheckpointStore:
+    """CheckpointStore stores the last processed version of a tailer, base class is in-memory store"""
+
+    def __init__(self) -> None:
+        self._version: typing.Optional[int] = None
+
+    async def load(self) -> typing.Optional[int]:
+        """returns the last processed version, None if there is no checkpoint"""
+
+        return self._version
+
+    async def save(self, version: int) -> None:
+        self._version = version
+
+
+class FileCheckpointStore(CheckpointStore):
+    """FileCheckpointStore stores the checkpoint in a JSON file, the file is replaced atomically on save"""
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+
+    async def load(self) -> typing.Optional[int]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)["version"]
+
+    async def save(self, version: int) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": version}, f)
+        os.replace(tmp, self.path)
+
+
+class LedgerTailer:
+    """LedgerTailer iterates transactions from `start_version` and follows new transactions, see module document
+
+    `start_version` is ignored if the `store` has a checkpoint.
+    """
+
+    def __init__(
+        self,
+        client: "AsyncClient",
+        start_version: int = 0,
+        store: typing.Optional[CheckpointStore] = None,
+        include_events: bool = False,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        concurrency: int = transactions_fetcher.DEFAULT_CONCURRENCY,
+        min_poll_interval_secs: float = DEFAULT_MIN_POLL_INTERVAL_SECS,
+        max_poll_interval_secs: float = DEFAULT_MAX_POLL_INTERVAL_SECS,
+        checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+        retry: typing.Optional[RetryPolicy] = None,
+        logger: typing.Optional[Logger] = None,
+    ) -> None:
+        self._client = client
+        self._start_version = start_version
+        self._store: CheckpointStore = store or CheckpointStore()
+        self._include_events = include_events
+        self._page_size = page_size
+        self._concurrency = concurrency
+        self._min_poll_interval_secs = min_poll_interval_secs
+        self._max_poll_interval_secs = max_poll_interval_secs
+        self._checkpoint_interval = checkpoint_interval
+        self._retry = retry
+        self._logger: Logger = logger or getLogger(__name__)
+        self._stopped = False
+        self._iter: typing.Optional[typing.AsyncGenerator[rpc.Transaction, None]] = None
+        self.last_processed_version: typing.Optional[int] = None
+        self.last_saved_version: typing.Optional[int] = None
+        self.tip_version: typing.Optional[int] = None
+
+    def __aiter__(self) -> typing.AsyncIterator[rpc.Transaction]:
+        self._iter = self.tail()
+        return self._iter
+
+    async def aclose(self) -> None:
+        """close the iteration and save checkpoint, should be called after breaking out of the `async for` loop"""
+
+        if self._iter is not None:
+            await self._iter.aclose()
+
+    def stop(self) -> None:
+        """stop the iteration, the iteration ends before yielding next transaction"""
+
+        self._stopped = True
+
+    @property
+    def lag(self) -> int:
+        """number of transactions between the last processed version and the last known ledger tip"""
+
+        if self.tip_version is None:
+            return 0
+        return self.tip_version - (self._next_version() - 1)
+
+    async def tail(self) -> typing.AsyncGenerator[rpc.Transaction, None]:
+        checkpoint = await self._store.load()
+        self.last_processed_version = checkpoint
+        self.last_saved_version = checkpoint
+        interval = self._min_poll_interval_secs
+        try:
+            while not self._stopped:
+                self.tip_version = (await self._client.get_metadata()).version
+                start = self._next_version()
+                if self.tip_version < start:
+                    await self._checkpoint()
+                    await asyncio.sleep(interval)
+                    interval = min(interval * 2, self._max_poll_interval_secs)
+                    continue
+                interval = self._min_poll_interval_secs
+                txns = transactions_fetcher.async_iter_transactions(
+                    self._client,
+                    start,
+                    self.tip_version + 1,
+                    include_events=self._include_events,
+                    chunk_size=self._page_size,
+                    concurrency=self._concurrency,
+                    retry=self._retry,
+                )
+                try:
+                    async for txn in txns:
+                        if self._stopped:
+                            return
+                        yield txn
+                        self.last_processed_version = txn.version
+                        if self.last_processed_version - (self.last_saved_version or -1) >= self._checkpoint_interval:
+                            await self._checkpoint()
+                finally:
+                    await txns.aclose()
+        finally:
+            await self._checkpoint()
+
+    def _next_version(self) -> int:
+        if self.last_processed_version is None:
+            return self._start_version
+        return self.last_processed_version + 1
+
+    async def _checkpoint(self) -> None:
+        version = self.last_processed_version
+        if version is not None and version != self.last_saved_version:
+            await self._store.save(version)
+            self.last_saved_version = version
+            self._logger.debug("saved checkpoint version %s", version)
@@ -0,0 +1,196 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Instrumentation hooks for `Client` and `AsyncClient`.
+
+`Metrics` defines the hook interface, all hooks are no-op. Clients call hooks for every JSON-RPC method call:
+
+1. latency by phase:
+   - `send`: sending http request until response headers are received, includes connection setup.
+   - `receive`: receiving response body.
+   - `decode`: decoding response body into JSON.
+   - `parse`: parsing JSON-RPC result into protobuf messages.
+   - `total`: method call latency including retries.
+2. retries by exception type.
+3. `StaleResponseError` occurrences.
+4. response body size.
+5. in-flight http requests.
+
+`InMemoryMetrics` collects histograms and counters in process, and exports them as a JSON snapshot or
+Prometheus text format:
+
+```python
+from diem import jsonrpc
+
+metrics = jsonrpc.InMemoryMetrics()
+client = jsonrpc.Client(<json-rpc-server-url>, metrics=metrics)
+...
+print(metrics.prometheus_text())
+```
+"""
+
+import bisect, threading, typing
+
+
+PHASE_SEND: str = "send"
+PHASE_RECEIVE: str = "receive"
+PHASE_DECODE: str = "decode"
+PHASE_PARSE: str = "parse"
+PHASE_TOTAL: str = "total"
+
+DEFAULT_LATENCY_BUCKETS: typing.Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DEFAULT_SIZE_BUCKETS: typing.Tuple[float, ...] = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+
+class Metrics:
+    """Metrics is the instrumentation hook interface of jsonrpc clients, all hooks are no-op
+
+    Hooks are called by the client's thread (`Client` may call hooks from multiple threads), and should be cheap.
+    """
+
+    def observe_latency(self, method: str, phase: str, secs: float) -> None:
+        pass
+
+    def observe_response_size(self, method: str, size: int) -> None:
+        pass
+
+    def inc_retry(self, method: str, error: Exception) -> None:
+        pass
+
+    def inc_stale_response(self, method: str) -> None:
+        pass
+
+    def add_in_flight(self, method: str, delta: int) -> None:
+        pass
+
+
+class Histogram:
+    """Histogram counts observations by buckets upper bound, not threadsafe"""
+
+    def __init__(self, buckets: typing.Sequence[float]) -> None:
+        self.buckets: typing.Tuple[float, ...] = tuple(sorted(buckets))
+        self.counts: typing.List[int] = [0] * (len(self.buckets) + 1)
+        self.sum: float = 0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> typing.List[int]:
+        ret, total = [], 0
+        for count in self.counts:
+            total += count
+            ret.append(total)
+        return ret
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:  # pyre-ignore
+        bounds = [str(b) for b in self.buckets] + ["+Inf"]
+        return {"buckets": dict(zip(bounds, self.cumulative_counts())), "sum": self.sum, "count": self.count}
+
+
+class InMemoryMetrics(Metrics):
+    """InMemoryMetrics collects metrics in process, threadsafe
+
+    `snapshot` returns JSON serializable dict, `prometheus_text` returns Prometheus text exposition format.
+    """
+
+    def __init__(
+        self,
+        prefix: str = "diem_jsonrpc",
+        latency_buckets: typing.Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        size_buckets: typing.Sequence[float] = DEFAULT_SIZE_BUCKETS,
+    ) -> None:
+        self._prefix = prefix
+        self._latency_buckets = latency_buckets
+        self._size_buckets = size_buckets
+        self._lock = threading.Lock()
+        self._latency: typing.Dict[typing.Tuple[str, str], Histogram] = {}
+        self._response_size: typing.Dict[str, Histogram] = {}
+        self._retries: typing.Dict[typing.Tuple[str, str], int] = {}
+        self._stale_responses: typing.Dict[str, int] = {}
+        self._in_flight: typing.Dict[str, int] = {}
+
+    def observe_latency(self, method: str, phase: str, secs: float) -> None:
+        with self._lock:
+            histogram = self._latency.get((method, phase))
+            if histogram is None:
+                histogram = self._latency[(method, phase)] = Histogram(self._latency_buckets)
+            histogram.observe(secs)
+
+    def observe_response_size(self, method: str, size: int) -> None:
+        with self._lock:
+            histogram = self._response_size.get(method)
+            if histogram is None:
+                histogram = self._response_size[method] = Histogram(self._size_buckets)
+            histogram.observe(size)
+
+    def inc_retry(self, method: str, error: Exception) -> None:
+        key = (method, type(error).__name__)
+        with self._lock:
+            self._retries[key] = self._retries.get(key, 0) + 1
+
+    def inc_stale_response(self, method: str) -> None:
+        with self._lock:
+            self._stale_responses[method] = self._stale_responses.get(method, 0) + 1
+
+    def add_in_flight(self, method: str, delta: int) -> None:
+        with self._lock:
+            self._in_flight[method] = self._in_flight.get(method, 0) + delta
+
+    def snapshot(self) -> typing.Dict[str, typing.Any]:  # pyre-ignore
+        """returns JSON serializable metrics snapshot grouped by method"""
+
+        ret: typing.Dict[str, typing.Dict[str, typing.Any]] = {}  # pyre-ignore
+
+        def of(method: str) -> typing.Dict[str, typing.Any]:  # pyre-ignore
+            if method not in ret:
+                ret[method] = {"latency": {}, "retries": {}, "stale_responses": 0, "in_flight": 0}
+            return ret[method]
+
+        with self._lock:
+            for (method, phase), histogram in self._latency.items():
+                of(method)["latency"][phase] = histogram.to_dict()
+            for method, histogram in self._response_size.items():
+                of(method)["response_size"] = histogram.to_dict()
+            for (method, error), count in self._retries.items():
+                of(method)["retries"][error] = count
+            for method, count in self._stale_responses.items():
+                of(method)["stale_responses"] = count
+            for method, count in self._in_flight.items():
+                of(method)["in_flight"] = count
+        return ret
+
+    def prometheus_text(self) -> str:
+        """returns metrics in Prometheus text exposition format"""
+
+        p = self._prefix
+        lines = []
+        with self._lock:
+            lines.append(f"# TYPE {p}_latency_seconds histogram")
+            for (method, phase), histogram in sorted(self._latency.items()):
+                lines.extend(_histogram_lines(f"{p}_latency_seconds", f'method="{method}",phase="{phase}"', histogram))
+            lines.append(f"# TYPE {p}_response_size_bytes histogram")
+            for method, histogram in sorted(self._response_size.items()):
+                lines.extend(_histogram_lines(f"{p}_response_size_bytes", f'method="{method}"', histogram))
+            lines.append(f"# TYPE {p}_retries_total counter")
+            for (method, error), count in sorted(self._retries.items()):
+                lines.append(f'{p}_retries_total{{method="{method}",error="{error}"}} {count}')
+            lines.append(f"# TYPE {p}_stale_responses_total counter")
+            for method, count in sorted(self._stale_responses.items()):
+                lines.append(f'{p}_stale_responses_total{{method="{method}"}} {count}')
+            lines.append(f"# TYPE {p}_in_flight_requests gauge")
+            for method, count in sorted(self._in_flight.items()):
+                lines.append(f'{p}_in_flight_requests{{method="{method}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> typing.List[str]:
+    bounds = [str(b) for b in histogram.buckets] + ["+Inf"]
+    lines = [
+        f'{name}_bucket{{{labels},le="{bound}"}} {count}' for bound, count in zip(bounds, histogram.cumulative_counts())
+    ]
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
@@ -0,0 +1,158 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Client side rate limiter for JSON-RPC requests.
+
+`RateLimiter` holds one token bucket per (endpoint url, method class). There are 2 method
+classes: `submit` for the `submit` method, and `read` for all other methods.
+Requests exceeding the limit are queued and released in arrival order, they never fail because
+of the rate limit.
+
+```python
+from diem import jsonrpc
+
+limiter = jsonrpc.RateLimiter(
+    read=jsonrpc.RateLimit(rate=50, burst=10),
+    submit=jsonrpc.RateLimit(rate=10),
+    endpoints={<backup-json-rpc-server-url>: {jsonrpc.METHOD_CLASS_READ: jsonrpc.RateLimit(rate=5)}},
+)
+client = jsonrpc.AsyncClient(<json-rpc-server-url>, rate_limiter=limiter)
+
+# monitor requests waiting for the rate limit
+limiter.queue_depth()
+```
+
+The limiter is threadsafe, it can be shared by `Client` used in multiple threads.
+"""
+
+from dataclasses import dataclass
+import asyncio, threading, time, typing
+
+
+METHOD_CLASS_READ: str = "read"
+METHOD_CLASS_SUBMIT: str = "submit"
+
+
+def method_class(method: str) -> str:
+    return METHOD_CLASS_SUBMIT if method == "submit" else METHOD_CLASS_READ
+
+
+@dataclass
+class RateLimit:
+    """`rate` is requests per second, `burst` is max number of requests can be sent at once"""
+
+    rate: float
+    burst: int = 1
+
+
+class TokenBucket:
+    """TokenBucket schedules requests by reserving the next available slot.
+
+    Each acquire reserves a slot under lock and then waits for the slot time, hence waiters
+    are released in the same order they arrived.
+    """
+
+    def __init__(self, limit: RateLimit) -> None:
+        self._interval: float = 1.0 / limit.rate
+        self._tolerance: float = max(limit.burst - 1, 0) * self._interval
+        self._tat: float = 0.0  # theoretical arrival time of next request
+        self._waiting: int = 0
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    def reserve(self) -> float:
+        """reserve a slot and returns seconds to wait before sending the request
+
+        Caller must call `release` after waited if the returned value is greater than 0.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            self._tat = tat + self._interval
+            wait = max(tat - self._tolerance - now, 0.0)
+            if wait > 0:
+                self._waiting += 1
+            return wait
+
+    def release(self) -> None:
+        with self._lock:
+            self._waiting -= 1
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self.release()
+
+    async def acquire_async(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self.release()
+
+
+class RateLimiter:
+    """RateLimiter limits request rate per endpoint url and method class
+
+    `read` and `submit` are default limits applied to every endpoint; `endpoints` overrides
+    limits for specific endpoint urls. No limit is applied when limit is not configured.
+    """
+
+    def __init__(
+        self,
+        read: typing.Optional[RateLimit] = None,
+        submit: typing.Optional[RateLimit] = None,
+        endpoints: typing.Optional[typing.Dict[str, typing.Dict[str, RateLimit]]] = None,
+    ) -> None:
+        self._defaults: typing.Dict[str, typing.Optional[RateLimit]] = {
+            METHOD_CLASS_READ: read,
+            METHOD_CLASS_SUBMIT: submit,
+        }
+        self._endpoints: typing.Dict[str, typing.Dict[str, RateLimit]] = endpoints or {}
+        self._buckets: typing.Dict[typing.Tuple[str, str], typing.Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str, method: str) -> None:
+        """blocks current thread until the request is allowed to send"""
+
+        bucket = self._bucket(url, method_class(method))
+        if bucket:
+            bucket.acquire()
+
+    async def acquire_async(self, url: str, method: str) -> None:
+        """waits until the request is allowed to send"""
+
+        bucket = self._bucket(url, method_class(method))
+        if bucket:
+            await bucket.acquire_async()
+
+    def queue_depth(self, url: typing.Optional[str] = None, method_cls: typing.Optional[str] = None) -> int:
+        """returns number of requests waiting for the rate limit, filtered by url and method class if given"""
+
+        return sum(
+            bucket.queue_depth
+            for (u, m), bucket in list(self._buckets.items())
+            if bucket and (url is None or u == url) and (method_cls is None or m == method_cls)
+        )
+
+    def queue_depths(self) -> typing.Dict[typing.Tuple[str, str], int]:
+        """returns number of waiting requests by (url, method class)"""
+
+        return {key: bucket.queue_depth for key, bucket in list(self._buckets.items()) if bucket}
+
+    def _bucket(self, url: str, method_cls: str) -> typing.Optional[TokenBucket]:
+        key = (url, method_cls)
+        if key not in self._buckets:
+            with self._lock:
+                if key not in self._buckets:
+                    limit = self._endpoints.get(url, {}).get(method_cls, self._defaults[method_cls])
+                    self._buckets[key] = TokenBucket(limit) if limit else None
+        return self._buckets[key]
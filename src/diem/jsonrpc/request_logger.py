@@ -0,0 +1,112 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Sampled JSON-RPC request logging for `Client` and `AsyncClient`.
+
+`RequestLogger` checks the logging level and sampling rate before doing anything else, and formats
+request and response bodies lazily: bodies are only decoded and truncated when the log record is
+emitted by a handler. A call that is not sampled costs one `isEnabledFor` check.
+
+Every record carries a `jsonrpc` attribute (structured logging `extra`) with `url`, `method`, and
+for responses `status`, `size` and `duration_secs`, for log handlers and formatters to consume.
+
+```python
+import logging
+from diem import jsonrpc
+
+logger = logging.getLogger("jsonrpc")
+request_logger = jsonrpc.RequestLogger(
+    logger, level=logging.INFO, max_body_size=1000, sample_rate=0.01, method_sample_rates={"submit": 1}
+)
+client = jsonrpc.Client(<json-rpc-server-url>, request_logger=request_logger)
+```
+"""
+
+from logging import Logger, DEBUG
+import json, random, typing
+
+
+DEFAULT_MAX_LOG_BODY_SIZE: int = 10_000
+
+
+class LazyBody:
+    """LazyBody formats request or response body on `str`, truncated to `max_size` characters"""
+
+    __slots__ = ("_body", "_max_size")
+
+    def __init__(self, body: typing.Any, max_size: int) -> None:  # pyre-ignore
+        self._body = body
+        self._max_size = max_size
+
+    def __str__(self) -> str:
+        body = self._body
+        if isinstance(body, bytes):
+            size = len(body)
+            text = body[: self._max_size].decode("utf-8", errors="replace")
+        else:
+            text = body if isinstance(body, str) else json.dumps(body)
+            size = len(text)
+            text = text[: self._max_size]
+        if size > self._max_size:
+            return "%s...(truncated, %s total)" % (text, size)
+        return text
+
+
+class RequestLogger:
+    """RequestLogger logs JSON-RPC requests and responses with sampling and size truncation
+
+    `sample_rate` is the ratio of requests to log, it is overridden by `method_sample_rates` for
+    the given JSON-RPC methods. Bodies longer than `max_body_size` are truncated.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        level: int = DEBUG,
+        max_body_size: int = DEFAULT_MAX_LOG_BODY_SIZE,
+        sample_rate: float = 1.0,
+        method_sample_rates: typing.Optional[typing.Dict[str, float]] = None,
+    ) -> None:
+        self.logger = logger
+        self.level = level
+        self.max_body_size = max_body_size
+        self.sample_rate = sample_rate
+        self.method_sample_rates: typing.Dict[str, float] = method_sample_rates or {}
+
+    def sample(self, method: str) -> bool:
+        """returns True if the method call should be logged"""
+
+        if not self.logger.isEnabledFor(self.level):
+            return False
+        rate = self.method_sample_rates.get(method, self.sample_rate)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def log_request(self, url: str, request: typing.Dict[str, typing.Any]) -> None:  # pyre-ignore
+        method = request.get("method")
+        self.logger.log(
+            self.level,
+            "jsonrpc request %s: %s",
+            method,
+            LazyBody(request, self.max_body_size),
+            extra={"jsonrpc": {"url": url, "method": method}},
+        )
+
+    def log_response(self, url: str, method: str, status: int, body: bytes, duration_secs: float) -> None:
+        self.logger.log(
+            self.level,
+            "jsonrpc response %s (status: %s, size: %s, duration: %.3fs): %s",
+            method,
+            status,
+            len(body),
+            duration_secs,
+            LazyBody(body, self.max_body_size),
+            extra={
+                "jsonrpc": {
+                    "url": url,
+                    "method": method,
+                    "status": status,
+                    "size": len(body),
+                    "duration_secs": duration_secs,
+                }
+            },
+        )
@@ -0,0 +1,239 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Retry policy shared by `Client`, `AsyncClient` and other http clients in this SDK.
+
+A `RetryPolicy` decides whether a failed call should be retried and how long to wait before
+the next attempt:
+
+1. `max_retries` limits the total number of attempts of one call.
+2. `backoff` (optional) enables exponential backoff with full jitter, so that many clients
+   retrying at the same time do not hit server in lockstep. Without `backoff`, the policy
+   falls back to the simplest linear backoff: `tries * delay_secs`.
+3. `budget` (optional) is a `RetryBudget` token bucket limiting the ratio of retries to
+   requests. When the budget is drained, errors are raised immediately instead of retrying.
+4. Server `Retry-After` response header is respected when the error carries it.
+
+The same policy object can be passed to `jsonrpc.Client`, `jsonrpc.AsyncClient` and `testing.Faucet`:
+
+```python
+from diem import jsonrpc
+
+retry = jsonrpc.Retry(
+    10,
+    0.1,
+    jsonrpc.StaleResponseError,
+    backoff=jsonrpc.ExponentialBackoff(base_secs=0.1, max_secs=5),
+    budget=jsonrpc.RetryBudget(ratio=0.1),
+)
+client = jsonrpc.Client(<json-rpc-server-url>, retry=retry)
+```
+"""
+
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import asyncio, random, threading, time, typing
+
+
+@dataclass
+class ExponentialBackoff:
+    """ExponentialBackoff computes delay `min(max_secs, base_secs * multiplier ** (tries - 1))`
+
+    When `jitter` is True (default), the delay is randomly picked in range [0, computed delay],
+    which is known as "full jitter".
+    """
+
+    base_secs: float = 0.1
+    max_secs: float = 10.0
+    multiplier: float = 2.0
+    jitter: bool = True
+
+    def delay(self, tries: int) -> float:
+        # cap the exponent to avoid float overflow for large tries
+        delay = min(self.max_secs, self.base_secs * self.multiplier ** min(tries - 1, 64))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+class RetryBudget:
+    """RetryBudget is a token bucket limiting retries to a ratio of requests.
+
+    Every request deposits `ratio` token, every retry withdraws 1 token. The bucket starts with
+    `min_tokens` tokens so that low traffic clients can still retry, and holds at most `max_tokens`
+    tokens.
+
+    It is threadsafe, one budget is expected to be shared by all requests of one client.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_tokens: float = 10, max_tokens: float = 100) -> None:
+        self._ratio = ratio
+        self._max_tokens = max_tokens
+        self._tokens: float = min(min_tokens, max_tokens)
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def withdraw(self) -> bool:
+        """returns False if there is not enough tokens for a retry"""
+
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+def retry_after_secs(e: BaseException) -> typing.Optional[float]:
+    """Returns seconds parsed from `Retry-After` http header carried by the given error or its cause
+
+    Supports `aiohttp.ClientResponseError` (`headers` attribute), `requests.HTTPError` (`response.headers`)
+    and errors wrapping them with `raise ... from`.
+    Returns None if no `Retry-After` header is found or it can't be parsed.
+    """
+
+    err: typing.Optional[BaseException] = e
+    while err is not None:
+        headers = getattr(err, "headers", None)
+        if headers is None:
+            headers = getattr(getattr(err, "response", None), "headers", None)
+        value = headers.get("Retry-After") if headers else None
+        if value:
+            return _parse_retry_after(value)
+        err = err.__cause__
+    return None
+
+
+def _parse_retry_after(value: str) -> typing.Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def observe_retries(
+    fn: typing.Callable[[], typing.Any], on_retry: typing.Callable[[Exception], None]  # pyre-ignore
+) -> typing.Callable[[], typing.Any]:  # pyre-ignore
+    """returns function calling `fn`; when it is called again after `fn` raised an error, `on_retry` is called with
+    the error first
+
+    Retries are observed by calls of the function, hence it works with any retry implementation, e.g. `execute`
+    overridden by a subclass of `jsonrpc.Retry`.
+    """
+
+    errors: typing.List[Exception] = []
+
+    def call() -> typing.Any:  # pyre-ignore
+        if errors:
+            on_retry(errors.pop())
+        try:
+            return fn()
+        except Exception as e:
+            errors.append(e)
+            raise
+
+    return call
+
+
+def observe_async_retries(
+    fn: typing.Callable[[], typing.Awaitable[typing.Any]], on_retry: typing.Callable[[Exception], None]  # pyre-ignore
+) -> typing.Callable[[], typing.Awaitable[typing.Any]]:  # pyre-ignore
+    """async version of `observe_retries`"""
+
+    errors: typing.List[Exception] = []
+
+    async def call() -> typing.Any:  # pyre-ignore
+        if errors:
+            on_retry(errors.pop())
+        try:
+            return await fn()
+        except Exception as e:
+            errors.append(e)
+            raise
+
+    return call
+
+
+@dataclass
+class RetryPolicy:
+    """RetryPolicy retries calls raised `exception`, see module document for details
+
+    `execute` for sync function, and `execute_async` for coroutine function.
+    """
+
+    max_retries: int
+    delay_secs: float
+    exception: typing.Union[typing.Type[Exception], typing.Tuple[typing.Type[Exception], ...]]
+    backoff: typing.Optional[ExponentialBackoff] = None
+    budget: typing.Optional[RetryBudget] = None
+    max_retry_after_secs: float = 60.0
+
+    def next_delay(self, tries: int, e: Exception) -> typing.Optional[float]:
+        """Returns seconds to wait before next attempt, or None if should not retry
+
+        `tries` is the number of attempts made so far.
+        """
+
+        if tries >= self.max_retries or not isinstance(e, self.exception):
+            return None
+        if self.budget is not None and not self.budget.withdraw():
+            return None
+        retry_after = retry_after_secs(e)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after_secs)
+        if self.backoff is not None:
+            return self.backoff.delay(tries)
+        # simplest backoff strategy: tries * delay
+        return self.delay_secs * tries
+
+    def execute_sync(
+        self,
+        fn: typing.Callable[[], typing.Any],  # pyre-ignore
+        on_retry: typing.Optional[typing.Callable[[Exception], None]] = None,
+    ) -> typing.Any:  # pyre-ignore
+        """call `fn` until success or should not retry, `on_retry` is called with the error before every retry"""
+
+        if self.budget is not None:
+            self.budget.deposit()
+        tries = 0
+        while True:
+            tries += 1
+            try:
+                return fn()
+            except Exception as e:
+                delay = self.next_delay(tries, e)
+                if delay is None:
+                    raise e
+                if on_retry is not None:
+                    on_retry(e)
+                time.sleep(delay)
+
+    async def execute_async(
+        self,
+        fn: typing.Callable[[], typing.Awaitable[typing.Any]],  # pyre-ignore
+        on_retry: typing.Optional[typing.Callable[[Exception], None]] = None,
+    ) -> typing.Any:  # pyre-ignore
+        """async version of `execute_sync`"""
+
+        if self.budget is not None:
+            self.budget.deposit()
+        tries = 0
+        while True:
+            tries += 1
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self.next_delay(tries, e)
+                if delay is None:
+                    raise e
+                if on_retry is not None:
+                    on_retry(e)
+                await asyncio.sleep(delay)
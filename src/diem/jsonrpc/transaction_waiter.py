@@ -0,0 +1,348 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Shared transaction waiter service for waiting for many pending transactions.
+
+`AsyncClient.wait_for_transaction2` polls `get_account_transaction` for each transaction on its own,
+`N` transactions in flight cost `N` polling loops. The waiter service multiplexes all pending
+transactions into one polling loop:
+
+1. Each tick calls `get_metadata` to find the latest ledger version.
+2. Newly added transactions are checked once by `get_account_transaction` on the next tick, whether or not
+   there is a new ledger version, because they may be committed before the waiter starts to follow the ledger.
+3. All transactions committed since the last tick are fetched by `get_transactions` in pages, and matched
+   with the pending transactions by (sender, sequence number).
+4. Checked transactions expired by the ledger time are failed by `TransactionExpired`; a transaction is
+   checked before it is expired, because it may be committed before the ledger time passed its expiration.
+
+Hence the polling cost is determined by the ledger throughput instead of the number of pending
+transactions. Errors are same as `wait_for_transaction2`: `TransactionHashMismatchError`,
+`TransactionExecutionFailed`, `TransactionExpired` and `WaitForTransactionTimeout`.
+
+```python
+from diem import jsonrpc
+
+async with jsonrpc.AsyncClient(<json-rpc-server-url>) as client:
+    waiter = client.transaction_waiter()
+    futures = []
+    for txn in signed_txns:
+        await client.submit(txn)
+        futures.append(waiter.wait_for_transaction(txn))
+    txns = await asyncio.gather(*futures)
+```
+
+The `jsonrpc.Client` counterpart runs the polling loop in a daemon thread and returns
+`concurrent.futures.Future`.
+"""
+
+from dataclasses import dataclass
+from concurrent import futures
+from logging import Logger, getLogger
+import asyncio, threading, time, typing
+
+from diem import diem_types, utils
+from diem.jsonrpc import jsonrpc_pb2 as rpc
+from diem.jsonrpc.constants import (
+    VM_STATUS_EXECUTED,
+    TRANSACTION_DATA_USER,
+    DEFAULT_WAIT_FOR_TRANSACTION_TIMEOUT_SECS,
+    DEFAULT_WAIT_FOR_TRANSACTION_WAIT_DURATION_SECS,
+)
+from diem.jsonrpc.errors import (
+    TransactionHashMismatchError,
+    TransactionExecutionFailed,
+    TransactionExpired,
+    WaitForTransactionTimeout,
+)
+from diem.jsonrpc.state import State
+
+if typing.TYPE_CHECKING:
+    from diem.jsonrpc.async_client import AsyncClient
+    from diem.jsonrpc.client import Client
+
+
+TRANSACTIONS_PAGE_SIZE: int = 1000
+
+
+@dataclass
+class PendingTransaction:
+    address: str
+    seq: int
+    txn_hash: str
+    expiration_time_secs: int
+    start_time: float
+    deadline: float
+    future: typing.Any  # asyncio.Future or concurrent.futures.Future  # pyre-ignore
+    checked: bool = False
+
+    @property
+    def key(self) -> typing.Tuple[str, int]:
+        return (self.address, self.seq)
+
+
+class _TransactionWaiterBase:
+    def __init__(
+        self,
+        wait_duration_secs: typing.Optional[float] = None,
+        page_size: int = TRANSACTIONS_PAGE_SIZE,
+        logger: typing.Optional[Logger] = None,
+    ) -> None:
+        self._wait_duration_secs: float = wait_duration_secs or DEFAULT_WAIT_FOR_TRANSACTION_WAIT_DURATION_SECS
+        self._page_size: int = page_size
+        self._logger: Logger = logger or getLogger(__name__)
+        self._pending: typing.Dict[typing.Tuple[str, int], typing.List[PendingTransaction]] = {}
+        self._last_version: typing.Optional[int] = None
+
+    @property
+    def pending_count(self) -> int:
+        return sum(len(txns) for txns in self._pending.values())
+
+    def _new_pending(
+        self,
+        future: typing.Any,  # pyre-ignore
+        address: typing.Union[diem_types.AccountAddress, str],
+        seq: int,
+        expiration_time_secs: int,
+        txn_hash: str,
+        timeout_secs: typing.Optional[float],
+    ) -> PendingTransaction:
+        start_time = time.time()
+        return PendingTransaction(
+            address=utils.account_address_hex(address),
+            seq=int(seq),
+            txn_hash=txn_hash,
+            expiration_time_secs=int(expiration_time_secs),
+            start_time=start_time,
+            deadline=start_time + (timeout_secs or DEFAULT_WAIT_FOR_TRANSACTION_TIMEOUT_SECS),
+            future=future,
+        )
+
+    def _add(self, pending: PendingTransaction) -> None:
+        self._pending.setdefault(pending.key, []).append(pending)
+
+    def _unchecked(self) -> typing.List[PendingTransaction]:
+        return [p for txns in self._pending.values() for p in txns if not p.checked]
+
+    def _resolve(self, pending: PendingTransaction, txn: rpc.Transaction) -> None:
+        if txn.hash != pending.txn_hash:
+            self._set_exception(pending, TransactionHashMismatchError(txn, pending.txn_hash))
+        elif txn.vm_status.type != VM_STATUS_EXECUTED:
+            self._set_exception(pending, TransactionExecutionFailed(txn))
+        else:
+            self._set_result(pending, txn)
+
+    def _on_checked(self, pending: PendingTransaction, txn: typing.Optional[rpc.Transaction]) -> None:
+        pending.checked = True
+        if txn is not None:
+            self._remove(pending)
+            self._resolve(pending, txn)
+
+    def _on_transactions(self, txns: typing.List[rpc.Transaction]) -> None:
+        for txn in txns:
+            if txn.transaction.type != TRANSACTION_DATA_USER:
+                continue
+            for pending in self._pending.pop((txn.transaction.sender, txn.transaction.sequence_number), []):
+                self._resolve(pending, txn)
+
+    def _on_ledger_state(self, state: State) -> None:
+        now = time.time()
+        for key in list(self._pending.keys()):
+            for pending in list(self._pending[key]):
+                if pending.checked and pending.expiration_time_secs * 1_000_000 <= state.timestamp_usecs:
+                    self._remove(pending)
+                    self._set_exception(pending, TransactionExpired(state, pending.expiration_time_secs))
+                elif now >= pending.deadline:
+                    self._remove(pending)
+                    self._set_exception(pending, WaitForTransactionTimeout(pending.start_time, now))
+        if not self._pending:
+            self._last_version = None
+
+    def _remove(self, pending: PendingTransaction) -> None:
+        txns = self._pending.get(pending.key, [])
+        if pending in txns:
+            txns.remove(pending)
+        if not txns:
+            self._pending.pop(pending.key, None)
+
+    def _set_result(self, pending: PendingTransaction, txn: rpc.Transaction) -> None:
+        if not pending.future.done():
+            pending.future.set_result(txn)
+
+    def _set_exception(self, pending: PendingTransaction, e: Exception) -> None:
+        if not pending.future.done():
+            pending.future.set_exception(e)
+
+
+def _ledger_state(metadata: rpc.Metadata) -> State:
+    return State(chain_id=metadata.chain_id, version=metadata.version, timestamp_usecs=metadata.timestamp)
+
+
+class AsyncTransactionWaiter(_TransactionWaiterBase):
+    """AsyncTransactionWaiter multiplexes waiting for transactions of an `AsyncClient`
+
+    Use `AsyncClient.transaction_waiter` to get the client shared instance.
+    The polling task is started when the first transaction is added, and stops when there
+    is no pending transaction.
+    """
+
+    def __init__(self, client: "AsyncClient", **kwargs: typing.Any) -> None:  # pyre-ignore
+        super().__init__(**kwargs)
+        self._client: "AsyncClient" = client
+        self._task: typing.Optional[asyncio.Task] = None
+
+    def wait(
+        self,
+        address: typing.Union[diem_types.AccountAddress, str],
+        seq: int,
+        expiration_time_secs: int,
+        txn_hash: str,
+        timeout_secs: typing.Optional[float] = None,
+    ) -> "asyncio.Future[rpc.Transaction]":
+        """returns a future resolved with the executed transaction, see `AsyncClient.wait_for_transaction2`"""
+
+        future = asyncio.get_running_loop().create_future()
+        self._add(self._new_pending(future, address, seq, expiration_time_secs, txn_hash, timeout_secs))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return future
+
+    def wait_for_transaction(
+        self, txn: typing.Union[diem_types.SignedTransaction, str], timeout_secs: typing.Optional[float] = None
+    ) -> "asyncio.Future[rpc.Transaction]":
+        if isinstance(txn, str):
+            txn = diem_types.SignedTransaction.bcs_deserialize(bytes.fromhex(txn))
+        return self.wait(
+            txn.raw_txn.sender,
+            txn.raw_txn.sequence_number,
+            txn.raw_txn.expiration_timestamp_secs,
+            utils.transaction_hash(txn),
+            timeout_secs,
+        )
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                try:
+                    await self._poll()
+                except Exception as e:
+                    self._logger.warning("poll pending transactions failed: %s", e)
+                    self._on_ledger_state(State(chain_id=-1, version=-1, timestamp_usecs=-1))
+                if self._pending:
+                    await asyncio.sleep(self._wait_duration_secs)
+        finally:
+            self._task = None
+
+    async def _poll(self) -> None:
+        metadata = await self._client.get_metadata()
+        unchecked = self._unchecked()
+        txns = await asyncio.gather(*[self._client.get_account_transaction(p.address, p.seq, True) for p in unchecked])
+        for pending, txn in zip(unchecked, txns):
+            self._on_checked(pending, txn)
+
+        last_version = self._last_version
+        if last_version is not None and metadata.version <= last_version:
+            return self._on_ledger_state(_ledger_state(metadata))
+        if last_version is not None:
+            start = last_version + 1
+            while start <= metadata.version and self._pending:
+                limit = min(self._page_size, metadata.version - start + 1)
+                page = await self._client.get_transactions(start, limit, True)
+                if not page:
+                    break
+                self._on_transactions(page)
+                start = page[-1].version + 1
+        self._last_version = metadata.version
+        self._on_ledger_state(_ledger_state(metadata))
+
+
+class TransactionWaiter(_TransactionWaiterBase):
+    """TransactionWaiter multiplexes waiting for transactions of a `Client`
+
+    Use `Client.transaction_waiter` to get the client shared instance.
+    The polling thread is started when the first transaction is added, and stops when there
+    is no pending transaction.
+    """
+
+    def __init__(self, client: "Client", **kwargs: typing.Any) -> None:  # pyre-ignore
+        super().__init__(**kwargs)
+        self._client: "Client" = client
+        self._thread: typing.Optional[threading.Thread] = None
+        self._lock = threading.RLock()
+
+    def wait(
+        self,
+        address: typing.Union[diem_types.AccountAddress, str],
+        seq: int,
+        expiration_time_secs: int,
+        txn_hash: str,
+        timeout_secs: typing.Optional[float] = None,
+    ) -> "futures.Future[rpc.Transaction]":
+        """returns a future resolved with the executed transaction, see `Client.wait_for_transaction2`"""
+
+        future = futures.Future()
+        with self._lock:
+            self._add(self._new_pending(future, address, seq, expiration_time_secs, txn_hash, timeout_secs))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return future
+
+    def wait_for_transaction(
+        self, txn: typing.Union[diem_types.SignedTransaction, str], timeout_secs: typing.Optional[float] = None
+    ) -> "futures.Future[rpc.Transaction]":
+        if isinstance(txn, str):
+            txn = diem_types.SignedTransaction.bcs_deserialize(bytes.fromhex(txn))
+        return self.wait(
+            txn.raw_txn.sender,
+            txn.raw_txn.sequence_number,
+            txn.raw_txn.expiration_timestamp_secs,
+            utils.transaction_hash(txn),
+            timeout_secs,
+        )
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._poll()
+            except Exception as e:
+                self._logger.warning("poll pending transactions failed: %s", e)
+                with self._lock:
+                    self._on_ledger_state(State(chain_id=-1, version=-1, timestamp_usecs=-1))
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+            time.sleep(self._wait_duration_secs)
+
+    def _poll(self) -> None:
+        metadata = self._client.get_metadata()
+        with self._lock:
+            unchecked = self._unchecked()
+
+        for pending in unchecked:
+            txn = self._client.get_account_transaction(pending.address, pending.seq, True)
+            with self._lock:
+                self._on_checked(pending, txn)
+
+        with self._lock:
+            last_version = self._last_version
+            if last_version is not None and metadata.version <= last_version:
+                return self._on_ledger_state(_ledger_state(metadata))
+
+        if last_version is not None:
+            start = last_version + 1
+            while start <= metadata.version and self._has_pending():
+                limit = min(self._page_size, metadata.version - start + 1)
+                page = self._client.get_transactions(start, limit, True)
+                if not page:
+                    break
+                with self._lock:
+                    self._on_transactions(page)
+                start = page[-1].version + 1
+        with self._lock:
+            self._last_version = metadata.version
+            self._on_ledger_state(_ledger_state(metadata))
+
+    def _has_pending(self) -> bool:
+        with self._lock:
+            return bool(self._pending)
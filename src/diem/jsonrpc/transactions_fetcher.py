@@ -0,0 +1,178 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Ranged transactions fetcher for backfilling ledger history.
+
+The version range is split into chunks, chunks are fetched by `get_transactions` concurrently
+with bounded parallelism, and transactions are yielded in strict version order.
+At most `concurrency` chunks are fetched or buffered at any time, hence memory for reassembling
+is bounded by `concurrency * chunk_size` transactions.
+Failed chunks are retried by the given `RetryPolicy`.
+
+```python
+from diem import jsonrpc
+
+async with jsonrpc.AsyncClient(<json-rpc-server-url>) as client:
+    async for txn in client.iter_transactions(0, 1_000_000, concurrency=8):
+        ...
+```
+
+`Client.iter_transactions` fetches chunks in a `ThreadPoolExecutor`.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio, collections, functools, typing
+
+from diem.jsonrpc import jsonrpc_pb2 as rpc
+from diem.jsonrpc.errors import InvalidServerResponse
+from diem.jsonrpc.retry import RetryPolicy, ExponentialBackoff
+
+if typing.TYPE_CHECKING:
+    from diem.jsonrpc.async_client import AsyncClient
+    from diem.jsonrpc.client import Client
+
+
+DEFAULT_CHUNK_SIZE: int = 1000
+DEFAULT_CONCURRENCY: int = 4
+
+
+def default_chunk_retry() -> RetryPolicy:
+    return RetryPolicy(5, 0.2, Exception, backoff=ExponentialBackoff(base_secs=0.2, max_secs=5))
+
+
+def _check_chunk(start: int, txns: typing.List[rpc.Transaction]) -> None:
+    for i, txn in enumerate(txns):
+        if txn.version != start + i:
+            raise InvalidServerResponse(f"expected transaction version {start + i}, but got {txn.version}")
+
+
+def _chunks(start: int, end: int, size: int) -> typing.Iterator[typing.Tuple[int, int]]:
+    for chunk_start in range(start, end, size):
+        yield (chunk_start, min(size, end - chunk_start))
+
+
+async def async_fetch_chunk(
+    client: "AsyncClient", start: int, limit: int, include_events: bool
+) -> typing.List[rpc.Transaction]:
+    """fetch transactions [start, start + limit), returns less transactions only if reached end of ledger"""
+
+    txns: typing.List[rpc.Transaction] = []
+    while len(txns) < limit:
+        page = await client.get_transactions(start + len(txns), limit - len(txns), include_events)
+        if not page:
+            break
+        _check_chunk(start + len(txns), page)
+        txns.extend(page)
+    return txns
+
+
+def fetch_chunk(client: "Client", start: int, limit: int, include_events: bool) -> typing.List[rpc.Transaction]:
+    """fetch transactions [start, start + limit), returns less transactions only if reached end of ledger"""
+
+    txns: typing.List[rpc.Transaction] = []
+    while len(txns) < limit:
+        page = client.get_transactions(start + len(txns), limit - len(txns), include_events)
+        if not page:
+            break
+        _check_chunk(start + len(txns), page)
+        txns.extend(page)
+    return txns
+
+
+async def async_iter_transactions(
+    client: "AsyncClient",
+    start_version: int,
+    end_version: typing.Optional[int] = None,
+    include_events: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    retry: typing.Optional[RetryPolicy] = None,
+) -> typing.AsyncIterator[rpc.Transaction]:
+    """iterate transactions in version range [start_version, end_version)
+
+    `end_version` defaults to the latest ledger version + 1 when the iteration starts.
+    The iteration stops early if the end of ledger is reached.
+    """
+
+    if end_version is None:
+        end_version = (await client.get_metadata()).version + 1
+    retry = retry or default_chunk_retry()
+    chunks = _chunks(start_version, end_version, chunk_size)
+    pending: typing.Deque[typing.Tuple[int, asyncio.Task]] = collections.deque()
+    try:
+        while True:
+            for start, limit in chunks:
+                fetch = functools.partial(async_fetch_chunk, client, start, limit, include_events)
+                pending.append((limit, asyncio.create_task(retry.execute_async(fetch))))
+                if len(pending) >= max(concurrency, 1):
+                    break
+            if not pending:
+                return
+            limit, task = pending.popleft()
+            txns = await task
+            for txn in txns:
+                yield txn
+            if len(txns) < limit:
+                return
+    finally:
+        discard_tasks([t for _, t in pending])
+
+
+def discard_tasks(tasks: typing.List[asyncio.Task]) -> None:
+    """cancels abandoned prefetch tasks, and retrieves their results so that a failed request is not logged
+    as "Task exception was never retrieved"
+    """
+
+    for task in tasks:
+        task.cancel()
+        task.add_done_callback(_retrieve_result)
+
+
+def _retrieve_result(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+def iter_transactions(
+    client: "Client",
+    start_version: int,
+    end_version: typing.Optional[int] = None,
+    include_events: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    retry: typing.Optional[RetryPolicy] = None,
+    executor: typing.Optional[ThreadPoolExecutor] = None,
+) -> typing.Iterator[rpc.Transaction]:
+    """iterate transactions in version range [start_version, end_version)
+
+    Chunks are fetched in the given `executor`, a `ThreadPoolExecutor(concurrency)` is created
+    for the iteration if `executor` is not provided.
+    See `async_iter_transactions` for details.
+    """
+
+    if end_version is None:
+        end_version = client.get_metadata().version + 1
+    retry = retry or default_chunk_retry()
+    pool = executor or ThreadPoolExecutor(max(concurrency, 1))
+    chunks = _chunks(start_version, end_version, chunk_size)
+    pending: typing.Deque[typing.Tuple[int, Future]] = collections.deque()
+    try:
+        while True:
+            for start, limit in chunks:
+                fetch = functools.partial(fetch_chunk, client, start, limit, include_events)
+                pending.append((limit, pool.submit(retry.execute_sync, fetch)))
+                if len(pending) >= max(concurrency, 1):
+                    break
+            if not pending:
+                return
+            limit, future = pending.popleft()
+            txns = future.result()
+            for txn in txns:
+                yield txn
+            if len(txns) < limit:
+                return
+    finally:
+        for _, future in pending:
+            future.cancel()
+        if executor is None:
+            pool.shutdown(wait=False)
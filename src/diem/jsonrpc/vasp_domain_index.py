@@ -0,0 +1,129 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Incremental VASP domain map.
+
+`AsyncClient.get_vasp_domain_map` replays the treasury compliance account's whole VASP domain event stream on
+every call. `VaspDomainIndex` keeps the domain map in memory together with the sequence number of the next
+event to process, so that a refresh only fetches the events added since the last refresh, and lookups are served
+from memory:
+
+```python
+from diem import jsonrpc
+
+async with jsonrpc.AsyncClient(<json-rpc-server-url>) as client:
+    index = jsonrpc.VaspDomainIndex(client, path="vasp_domains.json")
+    address = await index.find("domain")
+```
+
+`find` refreshes the index when the domain is not found or the index is older than `max_staleness_secs`.
+When `path` is given, the map and the cursor are loaded from the JSON file on the first refresh, and saved
+(replaced atomically) after a refresh processed new events.
+"""
+
+from logging import Logger, getLogger
+import asyncio, json, os, time, typing
+
+from diem import TREASURY_ADDRESS
+
+if typing.TYPE_CHECKING:
+    from diem.jsonrpc.async_client import AsyncClient
+
+
+DEFAULT_MAX_STALENESS_SECS: float = 10.0
+
+
+class VaspDomainIndex:
+    """VaspDomainIndex maps VASP domains to parent VASP account addresses, see module document"""
+
+    def __init__(
+        self,
+        client: "AsyncClient",
+        path: typing.Optional[str] = None,
+        batch_size: int = 100,
+        max_staleness_secs: float = DEFAULT_MAX_STALENESS_SECS,
+        logger: typing.Optional[Logger] = None,
+    ) -> None:
+        self._client = client
+        self.path = path
+        self.batch_size = batch_size
+        self.max_staleness_secs = max_staleness_secs
+        self._logger: Logger = logger or getLogger(__name__)
+        self._domains: typing.Dict[str, str] = {}
+        self._event_stream_key: typing.Optional[str] = None
+        self._next_sequence_number: int = 0
+        self._loaded: bool = False
+        self._refreshed_at: typing.Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def next_sequence_number(self) -> int:
+        """sequence number of the next domain event to process"""
+
+        return self._next_sequence_number
+
+    def domain_map(self) -> typing.Dict[str, str]:
+        """returns a copy of the domain map as of the last refresh"""
+
+        return dict(self._domains)
+
+    def get(self, domain: str) -> typing.Optional[str]:
+        """returns the account address of the domain as of the last refresh, without network calls"""
+
+        return self._domains.get(domain)
+
+    async def find(self, domain: str) -> typing.Optional[str]:
+        """returns the account address of the domain, refreshes the index if the domain is not found or stale"""
+
+        stale = self._refreshed_at is None or time.monotonic() - self._refreshed_at > self.max_staleness_secs
+        if stale or domain not in self._domains:
+            await self.refresh()
+        return self._domains.get(domain)
+
+    async def refresh(self) -> int:
+        """fetches domain events after the last processed event, returns the number of events processed"""
+
+        async with self._lock:
+            if not self._loaded:
+                self._load()
+            if self._event_stream_key is None:
+                tc_account = await self._client.must_get_account(TREASURY_ADDRESS)
+                self._event_stream_key = tc_account.role.vasp_domain_events_key
+            count = 0
+            if self._event_stream_key:
+                start = self._next_sequence_number
+                async for event in self._client.iter_events(self._event_stream_key, start, self.batch_size):
+                    if event.data.removed:
+                        self._domains.pop(event.data.domain, None)
+                    else:
+                        self._domains[event.data.domain] = event.data.address
+                    self._next_sequence_number = event.sequence_number + 1
+                    count += 1
+            self._refreshed_at = time.monotonic()
+            if count:
+                self._logger.debug("processed %s vasp domain events, next: %s", count, self._next_sequence_number)
+                self._save()
+            return count
+
+    def _load(self) -> None:
+        self._loaded = True
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            obj = json.load(f)
+        self._event_stream_key = obj["event_stream_key"]
+        self._next_sequence_number = obj["next_sequence_number"]
+        self._domains = obj["domains"]
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        obj = {
+            "event_stream_key": self._event_stream_key,
+            "next_sequence_number": self._next_sequence_number,
+            "domains": self._domains,
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(obj, f)
+        os.replace(tmp, self.path)
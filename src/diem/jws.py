@@ -11,12 +11,14 @@ The `encode` and `decode` functions handle JWS message with the following requir
 
 """
 
-from typing import Any, Callable, Dict, Tuple
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, Mapping, Tuple
 import base64, json
 
 
 ENCODING: str = "UTF-8"
 DIEM_ALG: str = "EdDSA"
+DEFAULT_HEADERS: Mapping[str, Any] = MappingProxyType({"alg": DIEM_ALG})
 
 
 class InvalidHeaderError(ValueError):
@@ -27,28 +29,68 @@ class InvalidHeaderError(ValueError):
 def encode(
     msg: str,
     sign: Callable[[bytes], bytes],
-    headers: Dict[str, Any] = {"alg": DIEM_ALG},
+    headers: Mapping[str, Any] = DEFAULT_HEADERS,
     content_detached: bool = False,
 ) -> bytes:
-    header = encode_headers(headers)
-    payload = encode_b64url(msg.encode(ENCODING))
-    sig = sign(signing_message(payload, header))
-    if content_detached:
-        payload = b""
-    return b".".join([header, payload, encode_b64url(sig)])
+    header, signing_msg = _signing_message(msg, headers)
+    return _join(header, signing_msg, sign(signing_msg), content_detached)
+
+
+async def encode_async(
+    msg: str,
+    sign: Callable[[bytes], Awaitable[bytes]],
+    headers: Mapping[str, Any] = DEFAULT_HEADERS,
+    content_detached: bool = False,
+) -> bytes:
+    """same with `encode`, except that the `sign` function is a coroutine function"""
+
+    header, signing_msg = _signing_message(msg, headers)
+    return _join(header, signing_msg, await sign(signing_msg), content_detached)
 
 
 def decode(
     msg: bytes, verify: Callable[[bytes, bytes], None], detached_content: bytes = b""
 ) -> Tuple[Dict[str, Any], str]:
-    parts = msg.split(b".")
-    if len(parts) != 3:
+    """decode and verify the JWS message, returns protected headers and the payload
+
+    The `verify` function is called with signature bytes and the signing message bytes.
+    """
+
+    header_end = msg.find(b".")
+    payload_end = msg.find(b".", header_end + 1) if header_end >= 0 else -1
+    if payload_end < 0 or msg.find(b".", payload_end + 1) >= 0:
         raise ValueError("invalid JWS compact message: %s" % msg)
 
-    header, body, sig = parts
+    header = msg[:header_end]
+    if header == _ENCODED_DEFAULT_HEADERS:
+        protected_headers = dict(DEFAULT_HEADERS)
+    else:
+        protected_headers = decode_headers(header)
 
+    body = msg[header_end + 1 : payload_end]
     if detached_content and not body:
         body = encode_b64url(detached_content)
+        signing_msg = signing_message(body, header)
+    else:
+        signing_msg = msg[:payload_end]
+
+    verify(decode_b64url(msg[payload_end + 1 :]), signing_msg)
+
+    return (protected_headers, decode_b64url(body).decode(ENCODING))
+
+
+def signing_message(payload: bytes, header: bytes) -> bytes:
+    return b".".join([header, payload])
+
+
+def encode_headers(headers: Mapping[str, Any]) -> bytes:
+    if headers == DEFAULT_HEADERS:
+        return _ENCODED_DEFAULT_HEADERS
+    return encode_b64url(json.dumps(dict(headers), separators=(",", ":")).encode(ENCODING))
+
+
+def decode_headers(header: bytes) -> Dict[str, Any]:
+    """decode and validate base64 url encoded protected headers, raises `InvalidHeaderError` if invalid"""
 
     try:
         header_text = decode_b64url(header).decode(ENCODING)
@@ -62,27 +104,32 @@ def decode(
 
     if not isinstance(protected_headers, dict) or protected_headers.get("alg") != DIEM_ALG:
         raise InvalidHeaderError(header_text)
+    return protected_headers
 
-    verify(decode_b64url(sig), signing_message(body, header))
 
-    return (protected_headers, decode_b64url(body).decode(ENCODING))
+def encode_b64url(msg: bytes) -> bytes:
+    return base64.urlsafe_b64encode(msg).rstrip(b"=")
 
 
-def signing_message(payload: bytes, header: bytes) -> bytes:
-    return b".".join([header, payload])
+def decode_b64url(msg: bytes) -> bytes:
+    return base64.urlsafe_b64decode(fix_padding(msg))
 
 
-def encode_headers(headers: Dict[str, Any]) -> bytes:
-    return encode_b64url(json.dumps(headers, separators=(",", ":")).encode(ENCODING))
+def fix_padding(input: bytes) -> bytes:
+    return input + b"=" * (-len(input) % 4)
 
 
-def encode_b64url(msg: bytes) -> bytes:
-    return base64.urlsafe_b64encode(msg).rstrip(b"=")
+def _signing_message(msg: str, headers: Mapping[str, Any]) -> Tuple[bytes, bytes]:
+    header = encode_headers(headers)
+    return (header, b"".join((header, b".", encode_b64url(msg.encode(ENCODING)))))
 
 
-def decode_b64url(msg: bytes) -> bytes:
-    return base64.urlsafe_b64decode(fix_padding(msg))
+def _join(header: bytes, signing_msg: bytes, sig: bytes, content_detached: bool) -> bytes:
+    if content_detached:
+        return b"".join((header, b"..", encode_b64url(sig)))
+    return b"".join((signing_msg, b".", encode_b64url(sig)))
 
 
-def fix_padding(input: bytes) -> bytes:
-    return input + b"=" * (4 - (len(input) % 4))
+_ENCODED_DEFAULT_HEADERS: bytes = encode_b64url(
+    json.dumps(dict(DEFAULT_HEADERS), separators=(",", ":")).encode(ENCODING)
+)
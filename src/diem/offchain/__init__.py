@@ -49,7 +49,9 @@ from .error import command_error, protocol_error, Error
 from .command import Command
 from .payment_command import PaymentCommand
 from .client import Client, CommandResponseError
+from .key_cache import CounterpartyKeyCache
+from .http_pool import OutboundHTTPConfig, OutboundMetrics, OutboundSessions
 
-from . import jws, state, payment_state
+from . import jws, signer, state, payment_state
 
 import typing
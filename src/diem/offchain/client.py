@@ -2,7 +2,8 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
-import typing, dataclasses, uuid, math, warnings
+from concurrent.futures import Executor
+import aiohttp, asyncio, typing, dataclasses, uuid, math, warnings
 
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
 from cryptography.exceptions import InvalidSignature
@@ -26,15 +27,21 @@ from .types import (
     to_dict,
     ReferenceIDCommandObject,
 )
-from .error import command_error, protocol_error
-
-from . import jws, http_header
+from .error import command_error, protocol_error, Error
+
+from . import jws, http_header, signer
+from .key_cache import CounterpartyKeyCache, DEFAULT_TTL_SECS
+from .http_pool import (
+    OutboundHTTPConfig,
+    OutboundMetrics,
+    OutboundSessions,
+    DEFAULT_CONNECT_TIMEOUT_SECS,
+    DEFAULT_TIMEOUT_SECS,
+)
 from .. import jsonrpc, diem_types, identifier, utils
 from diem.jsonrpc.async_client import AsyncClient
 
 
-DEFAULT_CONNECT_TIMEOUT_SECS: float = 2.0
-DEFAULT_TIMEOUT_SECS: float = 30.0
 T = typing.TypeVar("T")
 
 
@@ -69,8 +76,9 @@ class Client:
     ...     account = await faucet.gen_account()
     ...     await account.rotate_dual_attestation_info(jsonrpc_client, base_url="http://vasp.com/offchain")
     ...     compliance_key_account_address = account.account_address
-    ...     client = offchain.Client(compliance_key_account_address, jsonrpc_client, identifier.TDM)
-    ...     # use client to talk to couterparty VASP offchain service
+    ...     async with offchain.Client(compliance_key_account_address, jsonrpc_client, identifier.TDM) as client:
+    ...         # use client to talk to couterparty VASP offchain service
+    ...         ...
     ...
     >>> asyncio.run(main())
     ```
@@ -88,15 +96,41 @@ class Client:
     jsonrpc_client: AsyncClient
     hrp: str
     supported_currency_codes: typing.Optional[typing.List[str]] = dataclasses.field(default=None)
+    key_cache_ttl_secs: float = dataclasses.field(default=DEFAULT_TTL_SECS)
+    http_config: OutboundHTTPConfig = dataclasses.field(default_factory=OutboundHTTPConfig)
+    session_factory: typing.Callable[..., aiohttp.ClientSession] = dataclasses.field(default=aiohttp.ClientSession)
+    executor: typing.Optional[Executor] = dataclasses.field(default=None)
     my_compliance_key_account_id: str = dataclasses.field(init=False)
+    key_cache: CounterpartyKeyCache = dataclasses.field(init=False)
+    sessions: OutboundSessions = dataclasses.field(init=False)
 
     def __post_init__(self) -> None:
         self.my_compliance_key_account_id = self.account_id(self.my_compliance_key_account_address)
+        self.key_cache = CounterpartyKeyCache(self.jsonrpc_client, self.key_cache_ttl_secs)
+        self.sessions = OutboundSessions(self.http_config, self.session_factory)
+
+    async def close(self) -> None:
+        """closes outbound HTTP sessions, the `jsonrpc_client` is not closed"""
+
+        await self.sessions.close()
+
+    async def __aenter__(self) -> "Client":
+        return self
+
+    async def __aexit__(self, *args: typing.Any) -> None:  # pyre-ignore
+        """use async with to ensure outbound HTTP sessions are closed after used"""
+
+        await self.close()
+
+    def pool_metrics(self) -> typing.Dict[str, OutboundMetrics]:
+        """returns outbound request and connection metrics by counterparty host key `<host>:<port>`"""
+
+        return self.sessions.metrics()
 
     async def ping(
         self,
         counterparty_account_identifier: str,
-        sign: typing.Callable[[bytes], bytes],
+        sign: signer.Signer,
         cid: typing.Optional[str] = None,
     ) -> CommandResponseObject:
         request = CommandRequestObject(
@@ -104,7 +138,7 @@ class Client:
             command_type=CommandType.PingCommand,
             command={"_ObjectType": CommandType.PingCommand},
         )
-        jws_msg = jws.serialize(request, sign)
+        jws_msg = await jws.serialize_async(request, sign, self.executor)
         return await self.send_request(self.my_compliance_key_account_id, counterparty_account_identifier, jws_msg)
 
     async def ref_id_exchange_request(
@@ -114,7 +148,7 @@ class Client:
         receiver: str,
         reference_id: str,
         counterparty_account_identifier: str,
-        sign: typing.Callable[[bytes], bytes],
+        sign: signer.Signer,
         cid: typing.Optional[str] = None,
     ) -> CommandResponseObject:
         reference_id_command_object = ReferenceIDCommandObject(
@@ -125,33 +159,60 @@ class Client:
             command_type=CommandType.ReferenceIDCommand,
             command=to_dict(reference_id_command_object),
         )
-        jws_msg = jws.serialize(request, sign)
+        jws_msg = await jws.serialize_async(request, sign, self.executor)
         return await self.send_request(self.my_compliance_key_account_id, counterparty_account_identifier, jws_msg)
 
-    async def send_command(self, command: Command, sign: typing.Callable[[bytes], bytes]) -> CommandResponseObject:
+    async def send_command(self, command: Command, sign: signer.Signer) -> CommandResponseObject:
         return await self.send_request(
             request_sender_address=command.my_address(),
             counterparty_account_id=command.counterparty_address(),
-            request_bytes=jws.serialize(command.new_request(), sign),
+            request_bytes=await jws.serialize_async(command.new_request(), sign, self.executor),
         )
 
     async def send_request(
         self, request_sender_address: str, counterparty_account_id: str, request_bytes: bytes
     ) -> CommandResponseObject:
         base_url, public_key = await self.get_base_url_and_compliance_key(counterparty_account_id)
+        try:
+            response_bytes = await self._post_command(base_url, request_sender_address, request_bytes)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            # the cached base url may be rotated by the counterparty, try again once with the on-chain base url
+            if not self.invalidate_compliance_key(counterparty_account_id):
+                raise
+            cached_base_url = base_url
+            base_url, public_key = await self.get_base_url_and_compliance_key(counterparty_account_id)
+            if base_url == cached_base_url:
+                raise
+            response_bytes = await self._post_command(base_url, request_sender_address, request_bytes)
+
+        try:
+            cmd_resp = await signer.run(
+                self.executor, _deserialize_jws, response_bytes, CommandResponseObject, public_key
+            )
+        except Error as e:
+            # the cached key may be rotated by the counterparty, try again once with the on-chain key
+            if e.obj.code != ErrorCode.invalid_jws_signature or not self.invalidate_compliance_key(
+                counterparty_account_id
+            ):
+                raise
+            _, public_key = await self.get_base_url_and_compliance_key(counterparty_account_id)
+            cmd_resp = await signer.run(
+                self.executor, _deserialize_jws, response_bytes, CommandResponseObject, public_key
+            )
+        if cmd_resp.status == CommandResponseStatus.failure:
+            raise CommandResponseError(cmd_resp)
+        return cmd_resp
+
+    async def _post_command(self, base_url: str, request_sender_address: str, request_bytes: bytes) -> bytes:
         headers = {
             http_header.X_REQUEST_ID: str(uuid.uuid4()),
             http_header.X_REQUEST_SENDER_ADDRESS: request_sender_address,
         }
         url = f"{base_url.rstrip('/')}/v2/command"
-        async with self.jsonrpc_client._session.post(url, data=request_bytes, headers=headers) as response:
+        async with self.sessions.post(url, data=request_bytes, headers=headers) as response:
             if response.status not in [200, 400]:
                 response.raise_for_status()
-
-            cmd_resp = _deserialize_jws(await response.read(), CommandResponseObject, public_key)
-            if cmd_resp.status == CommandResponseStatus.failure:
-                raise CommandResponseError(cmd_resp)
-            return cmd_resp
+            return await response.read()
 
     async def process_inbound_request(self, request_sender_address: str, request_bytes: bytes) -> Command:
         """Deprecated
@@ -186,8 +247,13 @@ class Client:
 
         if not request_sender_address:
             raise protocol_error(ErrorCode.missing_http_header, f"missing {http_header.X_REQUEST_SENDER_ADDRESS}")
-        public_key = await self.get_inbound_request_sender_public_key(request_sender_address)
-        return _deserialize_jws(request_bytes, CommandRequestObject, public_key)
+        return await self._verify_with_sender_key(
+            request_sender_address,
+            ErrorCode.invalid_jws_signature,
+            lambda public_key: signer.run(
+                self.executor, _deserialize_jws, request_bytes, CommandRequestObject, public_key
+            ),
+        )
 
     async def process_inbound_payment_command_request(
         self, request_sender_address: str, request: CommandRequestObject
@@ -216,8 +282,11 @@ class Client:
         if cmd.is_initial():
             await self.validate_dual_attestation_limit_by_action(cmd.payment.action)
         elif cmd.is_rsend():
-            public_key = await self.get_inbound_request_sender_public_key(request_sender_address)
-            self.validate_recipient_signature(cmd, public_key)
+            await self._verify_with_sender_key(
+                request_sender_address,
+                ErrorCode.invalid_recipient_signature,
+                lambda public_key: signer.run(self.executor, self.validate_recipient_signature, cmd, public_key),
+            )
         return cmd
 
     async def get_inbound_request_sender_public_key(self, request_sender_address: str) -> Ed25519PublicKey:
@@ -229,6 +298,18 @@ class Client:
             raise protocol_error(ErrorCode.invalid_http_header, str(e)) from e
         return public_key
 
+    async def _verify_with_sender_key(
+        self, request_sender_address: str, code: str, verify: typing.Callable[[Ed25519PublicKey], typing.Awaitable[T]]
+    ) -> T:
+        public_key = await self.get_inbound_request_sender_public_key(request_sender_address)
+        try:
+            return await verify(public_key)
+        except Error as e:
+            # the cached key may be rotated by the counterparty, try again once with the on-chain key
+            if e.obj.code != code or not self.invalidate_compliance_key(request_sender_address):
+                raise
+        return await verify(await self.get_inbound_request_sender_public_key(request_sender_address))
+
     def validate_recipient_signature(self, cmd: PaymentCommand, public_key: Ed25519PublicKey) -> None:
         msg = cmd.travel_rule_metadata_signature_message(self.hrp)
         try:
@@ -301,18 +382,26 @@ class Client:
             )
 
     async def create_inbound_payment_command(self, cid: str, obj: PaymentObject) -> PaymentCommand:
-        if await self.is_my_account_id(obj.sender.address):
+        is_sender, is_receiver = await self.are_my_account_ids([obj.sender.address, obj.receiver.address])
+        if is_sender:
             return PaymentCommand(cid=cid, my_actor_address=obj.sender.address, payment=obj, inbound=True)
-        if await self.is_my_account_id(obj.receiver.address):
+        if is_receiver:
             return PaymentCommand(cid=cid, my_actor_address=obj.receiver.address, payment=obj, inbound=True)
 
         raise command_error(ErrorCode.unknown_address, "unknown actor addresses: {obj}")
 
     async def is_my_account_id(self, account_id: str) -> bool:
-        account_address, _ = identifier.decode_account(account_id, self.hrp)
-        if self.my_compliance_key_account_id == self.account_id(account_address):
-            return True
-        account = await self.jsonrpc_client.get_account(account_address)
+        return (await self.are_my_account_ids([account_id]))[0]
+
+    async def are_my_account_ids(self, account_ids: typing.List[str]) -> typing.List[bool]:
+        """check given account ids are my account ids, accounts are fetched by one `get_accounts` call"""
+
+        addresses = [identifier.decode_account(account_id, self.hrp)[0] for account_id in account_ids]
+        mine = [self.my_compliance_key_account_id == self.account_id(address) for address in addresses]
+        accounts = iter(await self.jsonrpc_client.get_accounts([a for a, m in zip(addresses, mine) if not m]))
+        return [m or self._is_my_child_account(next(accounts)) for m in mine]
+
+    def _is_my_child_account(self, account: typing.Optional[jsonrpc.Account]) -> bool:
         if account and account.role.parent_vasp_address:
             return self.my_compliance_key_account_id == self.account_id(account.role.parent_vasp_address)
         return False
@@ -322,7 +411,13 @@ class Client:
 
     async def get_base_url_and_compliance_key(self, account_id: str) -> typing.Tuple[str, Ed25519PublicKey]:
         account_address, _ = identifier.decode_account(account_id, self.hrp)
-        return await self.jsonrpc_client.get_base_url_and_compliance_key(account_address)
+        return await self.key_cache.get(account_address)
+
+    def invalidate_compliance_key(self, account_id: str) -> bool:
+        """removes cached base url and compliance key of the account, returns True if there was a cached entry"""
+
+        account_address, _ = identifier.decode_account(account_id, self.hrp)
+        return self.key_cache.invalidate(account_address)
 
 
 def _filter_supported_currency_codes(
@@ -0,0 +1,204 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Outbound HTTP sessions of the off-chain client.
+
+`OutboundSessions` keeps one `aiohttp.ClientSession` with its own connector per counterparty origin
+(`scheme://host:port`), hence:
+
+1. Connections are kept alive per counterparty, bursts of commands to a VASP reuse warm connections.
+2. Concurrent requests to a counterparty are limited by `OutboundHTTPConfig.limit_per_host` (or `host_limits`
+   override), requests over the limit wait for a connection of the counterparty, other counterparties and the
+   JSON-RPC client session are not affected by a slow counterparty.
+3. Timeouts are configured per counterparty by `host_timeouts` override.
+4. Sessions idle for `OutboundHTTPConfig.session_idle_timeout_secs` are closed, and at most `max_sessions` sessions
+   are kept, the least recently used idle sessions are closed first. Sessions are evicted when a session is created
+   for a new counterparty, or by calling `OutboundSessions.evict`. Metrics of a host are removed with its session.
+
+Only transport errors (`aiohttp.ClientError` and `asyncio.TimeoutError`) are counted as errors of a counterparty,
+exceptions raised by the caller while handling the response are not.
+
+```python
+from diem import offchain
+
+config = offchain.OutboundHTTPConfig(limit_per_host=4, host_timeouts={"slow-vasp.com:443": 5})
+client = offchain.Client(<address>, <jsonrpc-client>, <hrp>, http_config=config)
+...
+print(client.pool_metrics())
+await client.close()
+```
+
+Hosts are keyed by `<host>:<port>`, for example `vasp.com:443`.
+"""
+
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+import aiohttp, asyncio, collections, contextlib, time, typing
+
+from yarl import URL
+
+
+DEFAULT_LIMIT_PER_HOST: int = 10
+DEFAULT_KEEP_ALIVE_TIMEOUT_SECS: float = 30.0
+DEFAULT_CONNECT_TIMEOUT_SECS: float = 2.0
+DEFAULT_TIMEOUT_SECS: float = 30.0
+DEFAULT_SESSION_IDLE_TIMEOUT_SECS: float = 300.0
+DEFAULT_MAX_SESSIONS: int = 100
+
+
+@dataclass
+class OutboundHTTPConfig:
+    """OutboundHTTPConfig configures counterparty connection pools and timeouts
+
+    - limit_per_host: max number of concurrent connections to a counterparty.
+    - keep_alive_timeout_secs: seconds to keep an idle connection open for reuse.
+    - connect_timeout_secs: timeout for connecting to the counterparty server.
+    - timeout_secs: timeout for a request, including waiting for a connection from the pool.
+    - host_limits / host_timeouts: overrides `limit_per_host` / `timeout_secs` by host key `<host>:<port>`.
+    - session_idle_timeout_secs: seconds to keep a counterparty session without requests.
+    - max_sessions: max number of counterparty sessions, sessions with requests in flight are not closed.
+    """
+
+    limit_per_host: int = DEFAULT_LIMIT_PER_HOST
+    keep_alive_timeout_secs: float = DEFAULT_KEEP_ALIVE_TIMEOUT_SECS
+    connect_timeout_secs: float = DEFAULT_CONNECT_TIMEOUT_SECS
+    timeout_secs: float = DEFAULT_TIMEOUT_SECS
+    host_limits: typing.Dict[str, int] = field(default_factory=dict)
+    host_timeouts: typing.Dict[str, float] = field(default_factory=dict)
+    session_idle_timeout_secs: float = DEFAULT_SESSION_IDLE_TIMEOUT_SECS
+    max_sessions: int = DEFAULT_MAX_SESSIONS
+
+    def limit(self, host: str) -> int:
+        return self.host_limits.get(host, self.limit_per_host)
+
+    def timeout(self, host: str) -> aiohttp.ClientTimeout:
+        total = self.host_timeouts.get(host, self.timeout_secs)
+        return aiohttp.ClientTimeout(total=total, sock_connect=self.connect_timeout_secs)
+
+
+@dataclass
+class OutboundMetrics:
+    """OutboundMetrics is request and connection stats of a counterparty host
+
+    `connections_reused` counts requests sent through a kept alive connection, `connections_created` counts
+    new connections.
+    """
+
+    limit: int
+    requests: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+
+
+class OutboundSessions:
+    """OutboundSessions sends requests through a dedicated session per counterparty, see module document"""
+
+    def __init__(
+        self,
+        config: typing.Optional[OutboundHTTPConfig] = None,
+        session_factory: typing.Callable[..., aiohttp.ClientSession] = aiohttp.ClientSession,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.config: OutboundHTTPConfig = config or OutboundHTTPConfig()
+        self._session_factory = session_factory
+        self._clock = clock
+        # least recently used first
+        self._sessions: typing.OrderedDict[str, aiohttp.ClientSession] = collections.OrderedDict()
+        self._metrics: typing.Dict[str, OutboundMetrics] = {}
+        self._last_used: typing.Dict[str, float] = {}
+
+    @contextlib.asynccontextmanager
+    async def post(self, url: str, **kwargs: typing.Any) -> typing.AsyncIterator[aiohttp.ClientResponse]:  # pyre-ignore
+        host = host_key(url)
+        session, metrics = await self._acquire(host)
+        try:
+            async with session.post(url, **kwargs) as response:
+                yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.in_flight -= 1
+            self._last_used[host] = self._clock()
+
+    def metrics(self) -> typing.Dict[str, OutboundMetrics]:
+        """returns copies of metrics by host key `<host>:<port>`"""
+
+        return {host: OutboundMetrics(**m.__dict__) for host, m in self._metrics.items()}
+
+    async def close(self) -> None:
+        sessions, self._sessions = self._sessions, collections.OrderedDict()
+        self._last_used.clear()
+        for session in sessions.values():
+            await session.close()
+
+    async def evict(self) -> None:
+        """closes sessions idle for `session_idle_timeout_secs`, and least recently used idle sessions over
+        `max_sessions`"""
+
+        now = self._clock()
+        over = len(self._sessions) - self.config.max_sessions
+        for host in list(self._sessions.keys()):
+            if host not in self._sessions or self._metrics[host].in_flight > 0:
+                continue
+            if over > 0 or now - self._last_used[host] >= self.config.session_idle_timeout_secs:
+                over -= 1
+                session = self._sessions.pop(host)
+                del self._metrics[host], self._last_used[host]
+                await session.close()
+
+    async def _acquire(self, host: str) -> typing.Tuple[aiohttp.ClientSession, OutboundMetrics]:
+        """returns session and metrics of the host, and counts a request in flight so the session is not evicted"""
+
+        self._last_used[host] = self._clock()
+        session = self._sessions.get(host)
+        if session is not None:
+            self._sessions.move_to_end(host)
+            return (session, self._start_request(self._metrics[host]))
+
+        metrics = OutboundMetrics(limit=self.config.limit(host))
+        connector = aiohttp.TCPConnector(
+            limit=self.config.limit(host),
+            keepalive_timeout=self.config.keep_alive_timeout_secs,
+        )
+        session = self._session_factory(
+            connector=connector,
+            timeout=self.config.timeout(host),
+            trace_configs=[_trace_config(metrics)],
+        )
+        self._sessions[host] = session
+        self._metrics[host] = metrics
+        self._start_request(metrics)
+        await self.evict()
+        return (session, metrics)
+
+    def _start_request(self, metrics: OutboundMetrics) -> OutboundMetrics:
+        metrics.requests += 1
+        metrics.in_flight += 1
+        metrics.peak_in_flight = max(metrics.peak_in_flight, metrics.in_flight)
+        return metrics
+
+
+def host_key(url: str) -> str:
+    u = URL(url)
+    return "%s:%s" % (u.host, u.port)
+
+
+def _trace_config(metrics: OutboundMetrics) -> aiohttp.TraceConfig:
+    async def on_connection_create_end(
+        session: aiohttp.ClientSession, ctx: SimpleNamespace, params: typing.Any
+    ) -> None:  # pyre-ignore
+        metrics.connections_created += 1
+
+    async def on_connection_reuseconn(
+        session: aiohttp.ClientSession, ctx: SimpleNamespace, params: typing.Any
+    ) -> None:  # pyre-ignore
+        metrics.connections_reused += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
@@ -11,9 +11,10 @@ The `serialize` and `deserialize` functions handle JWS message with the followin
 
 """
 
+from concurrent.futures import Executor
 import typing
 
-from . import CommandRequestObject, CommandResponseObject, to_json, from_json
+from . import CommandRequestObject, CommandResponseObject, to_json, from_json, signer
 from .. import jws
 
 
@@ -27,6 +28,16 @@ def serialize(
     return jws.encode(to_json(obj), sign)
 
 
+async def serialize_async(
+    obj: typing.Union[CommandRequestObject, CommandResponseObject],
+    sign: signer.Signer,
+    executor: typing.Optional[Executor] = None,
+) -> bytes:
+    """serialize with a sync or coroutine `sign` function, see `diem.offchain.signer.sign`"""
+
+    return await jws.encode_async(to_json(obj), lambda msg: signer.sign(sign, msg, executor))
+
+
 def deserialize(
     msg: bytes,
     klass: typing.Type[T],
@@ -34,3 +45,14 @@ def deserialize(
 ) -> T:
     _, body = jws.decode(msg, verify)
     return from_json(body, klass)
+
+
+async def deserialize_async(
+    msg: bytes,
+    klass: typing.Type[T],
+    verify: typing.Callable[[bytes, bytes], None],
+    executor: typing.Optional[Executor] = None,
+) -> T:
+    """deserialize in the `executor`, or inline when `executor` is None"""
+
+    return await signer.run(executor, deserialize, msg, klass, verify)
@@ -0,0 +1,140 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Cache of counterparty base URLs and compliance keys.
+
+Every outbound command and inbound request needs the counterparty VASP's base URL or compliance public key,
+which are on-chain account data. `CounterpartyKeyCache` fetches them on first use and serves them from memory
+until:
+
+1. the entry is older than `ttl_secs`,
+2. a compliance key or base URL rotation event of the account is processed by `process_event` or
+   `process_transaction`; `rotation_event_keys` returns the rotation event stream keys of cached accounts for
+   event pullers to follow (e.g. the mini-wallet `EventPuller`). Events committed before the entry was fetched
+   are ignored, so that replaying an event stream from the start does not invalidate a fresh entry, or
+3. `invalidate` is called, `offchain.Client` invalidates the entry and tries again once when a JWS signature
+   does not verify with a cached key, or when connecting to the cached base URL fails, as the counterparty may
+   have rotated its key or base URL.
+
+Child VASP accounts are resolved to their parent VASP account once, they share the parent's entry.
+Compliance keys are parsed into `Ed25519PublicKey` once per key.
+"""
+
+from dataclasses import dataclass
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+import functools, time, typing
+
+from .. import jsonrpc, diem_types, utils
+
+if typing.TYPE_CHECKING:
+    from diem.jsonrpc.async_client import AsyncClient
+
+
+DEFAULT_TTL_SECS: float = 600.0
+ROTATION_EVENT_TYPES: typing.FrozenSet[str] = frozenset(
+    [jsonrpc.EVENT_DATA_COMPLIANCE_KEY_ROTATION, jsonrpc.EVENT_DATA_BASE_URL_ROTATION]
+)
+
+
+@dataclass
+class _Entry:
+    base_url: str
+    public_key: Ed25519PublicKey
+    expires_at: float
+    event_keys: typing.Tuple[str, ...] = ()
+    # ledger version known before the account was fetched, rotation events up to it are reflected in the entry
+    version: int = -1
+
+
+class CounterpartyKeyCache:
+    """CounterpartyKeyCache caches base URL and compliance key by account address, see module document"""
+
+    def __init__(
+        self,
+        client: "AsyncClient",
+        ttl_secs: float = DEFAULT_TTL_SECS,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._client = client
+        self.ttl_secs = ttl_secs
+        self._clock = clock
+        self._entries: typing.Dict[str, _Entry] = {}
+        self._parents: typing.Dict[str, str] = {}
+
+    async def get(
+        self, account_address: typing.Union[diem_types.AccountAddress, str]
+    ) -> typing.Tuple[str, Ed25519PublicKey]:
+        """returns base URL and compliance key of the account, or of its parent VASP account
+
+        Raises `jsonrpc.AccountNotFoundError` (a `ValueError`) if the account is not found, or `ValueError` if
+        the account has no base URL and compliance key.
+        """
+
+        address = utils.account_address_hex(account_address)
+        address = self._parents.get(address, address)
+        entry = self._entries.get(address)
+        if entry is None or entry.expires_at <= self._clock():
+            entry = await self._fetch(address)
+        return (entry.base_url, entry.public_key)
+
+    def invalidate(self, account_address: typing.Union[diem_types.AccountAddress, str]) -> bool:
+        """removes the entry of the account (or its parent VASP account), returns True if there was one"""
+
+        address = utils.account_address_hex(account_address)
+        return self._entries.pop(self._parents.get(address, address), None) is not None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def rotation_event_keys(self) -> typing.List[str]:
+        """returns compliance key and base URL rotation event keys of the cached accounts"""
+
+        return [key for entry in self._entries.values() for key in entry.event_keys]
+
+    def process_event(self, event: jsonrpc.Event) -> bool:
+        """invalidates the entry of the account emitted the rotation event, returns True if an entry is removed
+
+        Events with `transaction_version` not greater than the ledger version the entry was fetched at are
+        ignored, the entry already has the rotated base URL and compliance key.
+        """
+
+        if event.data.type not in ROTATION_EVENT_TYPES:
+            return False
+        # event key is 8 bytes creation number followed by the address of the account owns the event stream
+        address = event.key[-diem_types.AccountAddress.LENGTH * 2 :]
+        entry = self._entries.get(address)
+        if entry is None or event.transaction_version <= entry.version:
+            return False
+        return self.invalidate(address)
+
+    def process_transaction(self, txn: jsonrpc.Transaction) -> None:
+        """calls `process_event` for events of the transaction, transaction must be fetched with events"""
+
+        for event in txn.events:
+            self.process_event(event)
+
+    async def _fetch(self, address: str) -> _Entry:
+        # the account is read at or after the last known version, as the client rejects stale responses
+        version = self._client.get_last_known_state().version
+        account = await self._client.must_get_account(address)
+        if account.role.compliance_key and account.role.base_url:
+            public_key = public_key_from_hex(account.role.compliance_key)
+            event_keys = (account.role.compliance_key_rotation_events_key, account.role.base_url_rotation_events_key)
+            entry = _Entry(account.role.base_url, public_key, self._clock() + self.ttl_secs, event_keys, version)
+            self._entries[address] = entry
+            return entry
+        if account.role.parent_vasp_address:
+            parent = utils.account_address_hex(account.role.parent_vasp_address)
+            self._parents[address] = parent
+            entry = self._entries.get(parent)
+            if entry is None or entry.expires_at <= self._clock():
+                entry = await self._fetch(parent)
+            return entry
+        raise ValueError(f"could not find base_url and compliance_key from account: {account}")
+
+
+@functools.lru_cache(maxsize=1024)
+def public_key_from_hex(key: str) -> Ed25519PublicKey:
+    """parses hex-encoded Ed25519 public key, parsed keys are cached"""
+
+    return Ed25519PublicKey.from_public_bytes(bytes.fromhex(key))
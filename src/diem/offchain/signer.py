@@ -0,0 +1,42 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Async-aware signing and verification for off-chain flows.
+
+A `Signer` is either a function `(bytes) -> bytes`, for example `Ed25519PrivateKey.sign`, or a coroutine
+function `(bytes) -> Awaitable[bytes]`, for example a client of a remote signing service or HSM.
+
+`sign` awaits coroutine signers, and runs other signers in the given `concurrent.futures.Executor`, so that
+blocking signers (HSM SDKs, remote calls by sync clients) do not block the event loop. Without an executor,
+sync signers are called on the event loop, which is the fastest option for in-process keys.
+
+`run` runs a CPU-bound function (e.g. JWS verification and decoding) in the executor, or inline when there
+is no executor.
+"""
+
+from concurrent.futures import Executor
+import asyncio, inspect, typing
+
+
+T = typing.TypeVar("T")
+Signer = typing.Callable[[bytes], typing.Union[bytes, typing.Awaitable[bytes]]]
+
+
+async def sign(signer: Signer, msg: bytes, executor: typing.Optional[Executor] = None) -> bytes:
+    """signs the `msg` by the `signer`, see module document"""
+
+    if executor is not None and not asyncio.iscoroutinefunction(signer):
+        sig = await asyncio.get_running_loop().run_in_executor(executor, signer, msg)
+    else:
+        sig = signer(msg)
+    if inspect.isawaitable(sig):
+        sig = await sig
+    return typing.cast(bytes, sig)
+
+
+async def run(executor: typing.Optional[Executor], fn: typing.Callable[..., T], *args: typing.Any) -> T:  # pyre-ignore
+    """calls `fn` with `args` in the `executor`, or inline when `executor` is None"""
+
+    if executor is None:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
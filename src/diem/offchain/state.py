@@ -1,14 +1,38 @@
 # Copyright (c) The Diem Core Contributors
 # SPDX-License-Identifier: Apache-2.0
 
-"""This module defines a state machine and data match utils classes for creating conditional states."""
+"""This module defines a state machine and data match utils classes for creating conditional states.
 
-import dataclasses, typing, abc
+Condition paths are split once when the condition is created, and `Machine` indexes its states by the values
+of the `Value` conditions they require (e.g. sender and receiver status of a payment), so that matching event
+data only evaluates the states that could match it.
+A lookup checks every combination of required and wildcard values, hence states requiring values of more than
+`MAX_INDEX_KEYS` paths are not indexed, and matching falls back to evaluating all states.
+"""
+
+import dataclasses, itertools, typing, abc
 
 
 S = typing.TypeVar("S")
 T = typing.TypeVar("T")
 
+MAX_INDEX_KEYS: int = 4
+
+_MISSING: typing.Any = object()
+_ANY: typing.Any = object()
+
+
+def _get(obj: typing.Any, parts: typing.Tuple[str, ...]) -> typing.Any:  # pyre-ignore
+    """returns value of the attribute path `parts` of `obj`, or `_MISSING` if any attribute is not set"""
+
+    for f in parts:
+        if obj is None:
+            return _MISSING
+        obj = getattr(obj, f, _MISSING)
+        if obj is _MISSING:
+            return _MISSING
+    return obj
+
 
 @dataclasses.dataclass(frozen=True)
 class MatchResult:
@@ -45,13 +69,13 @@ class Field(Condition[T]):
     path: str
     not_set: bool = dataclasses.field(default=False)
 
-    def match(self, event_data: T) -> MatchResult:
-        val = event_data
-        for f in self.path.split("."):
-            if val is None or not hasattr(val, f):
-                return MatchResult.create(False, [self.path])
-            val = getattr(val, f)
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_parts", tuple(self.path.split(".")))
 
+    def match(self, event_data: T) -> MatchResult:
+        val = _get(event_data, self._parts)
+        if val is _MISSING:
+            return MatchResult.create(False, [self.path])
         if self.not_set:
             return MatchResult.create(val is None, [self.path])
         return MatchResult.create(val is not None, [self.path])
@@ -62,12 +86,18 @@ class Value(typing.Generic[T, S], Condition[T]):
     path: str
     value: S
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_parts", tuple(self.path.split(".")))
+
+    def get(self, event_data: T) -> typing.Any:  # pyre-ignore
+        """returns value of the `path` of the `event_data`, or a private sentinel if it is not set"""
+
+        return _get(event_data, self._parts)
+
     def match(self, event_data: T) -> MatchResult:
-        val = event_data
-        for f in self.path.split("."):
-            if val is None or not hasattr(val, f):
-                return MatchResult.create(False, [self.path])
-            val = getattr(val, f)
+        val = _get(event_data, self._parts)
+        if val is _MISSING:
+            return MatchResult.create(False, [self.path])
         return MatchResult.create(val == self.value, [self.path])
 
 
@@ -130,18 +160,54 @@ class TooManyStatesMatchedError(ValueError):
 
 @dataclasses.dataclass
 class Machine(typing.Generic[T]):
+    """Machine matches states of event data, and validates transitions between states
+
+    `states` and `transitions` are indexed when the machine is created, the indexes are rebuilt when either
+    list is changed.
+    """
+
     initials: typing.List[State[T]]
     states: typing.List[State[T]]
     transitions: typing.List[Transition[T]]
 
+    _transition_set: typing.Optional[typing.Set[typing.Tuple[State[T], State[T]]]] = dataclasses.field(
+        init=False, repr=False, compare=False
+    )
+    _keys: typing.List[Value[T, typing.Any]] = dataclasses.field(init=False, repr=False, compare=False)
+    _index: typing.Optional[typing.Dict[typing.Tuple[typing.Any, ...], typing.List[int]]] = dataclasses.field(
+        init=False, repr=False, compare=False
+    )
+    _masks: typing.List[typing.Tuple[bool, ...]] = dataclasses.field(init=False, repr=False, compare=False)
+    _indexed_states: typing.List[State[T]] = dataclasses.field(init=False, repr=False, compare=False)
+    _indexed_transitions: typing.List[Transition[T]] = dataclasses.field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._build_index()
+
+    def _sync_index(self) -> None:
+        # list comparison checks identity of items first, which is cheap for unchanged lists
+        if self.states != self._indexed_states or self.transitions != self._indexed_transitions:
+            self._build_index()
+
+    def _build_index(self) -> None:
+        self._indexed_states = list(self.states)
+        self._indexed_transitions = list(self.transitions)
+        try:
+            self._transition_set = {(t.state, t.to) for t in self.transitions}
+        except TypeError:
+            # unhashable state
+            self._transition_set = None
+        self._keys, self._index = _index_states(self.states)
+        self._masks = list(itertools.product((False, True), repeat=len(self._keys)))
+
     def is_initial(self, state: State[T]) -> bool:
         return state in self.initials
 
     def is_valid_transition(self, state: State[T], to: State[T], event_data: T) -> bool:
-        for t in self.transitions:
-            if t.state == state and t.to == to:
-                return True
-        return False
+        self._sync_index()
+        if self._transition_set is None:
+            return any(t.state == state and t.to == to for t in self.transitions)
+        return (state, to) in self._transition_set
 
     def match_state(self, event_data: T) -> State[T]:
         ret = self.match_states(event_data)
@@ -152,11 +218,32 @@ class Machine(typing.Generic[T]):
         return ret[0]
 
     def match_states(self, event_data: T) -> typing.List[State[T]]:
-        return [state for state, match in self.match_states_and_results(event_data) if match.success]
+        return [state for state in self.candidate_states(event_data) if state.match(event_data).success]
 
     def match_states_and_results(self, event_data: T) -> typing.List[typing.Tuple[State[T], MatchResult]]:
         return [(state, state.match(event_data)) for state in self.states]
 
+    def candidate_states(self, event_data: T) -> typing.List[State[T]]:
+        """returns states that may match the `event_data`, in the order of `states`
+
+        States requiring a `Value` that mismatches the `event_data` are excluded; they can't match the
+        `event_data`, and their validations are never evaluated by `State.match`.
+        """
+
+        self._sync_index()
+        index = self._index
+        if index is None:
+            return self.states
+        actual = tuple(key.get(event_data) for key in self._keys)
+        positions = []
+        try:
+            for mask in self._masks:
+                positions.extend(index.get(tuple(_ANY if m else v for m, v in zip(mask, actual)), ()))
+        except TypeError:
+            # unhashable value
+            return self.states
+        return [self.states[i] for i in sorted(positions)]
+
 
 def new_transition(state: State[T], to: State[T]) -> Transition[T]:
     return Transition(action=f"{state} -> {to}", state=state, to=to)
@@ -166,6 +253,35 @@ def require(*args: Condition[T], validation: typing.Optional[Condition[T]] = Non
     return Require(conds=list(args), validation=validation)
 
 
+def _index_states(
+    states: typing.List[State[T]],
+) -> typing.Tuple[
+    typing.List[Value[T, typing.Any]], typing.Optional[typing.Dict[typing.Tuple[typing.Any, ...], typing.List[int]]]
+]:
+    """indexes states by values of paths required by `Value` conditions, `_ANY` for paths a state doesn't require"""
+
+    keys: typing.Dict[str, Value[T, typing.Any]] = {}
+    for state in states:
+        for cond in state.require.conds if state.require else []:
+            if isinstance(cond, Value):
+                keys.setdefault(cond.path, cond)
+    if len(keys) > MAX_INDEX_KEYS:
+        return ([], None)
+
+    index: typing.Dict[typing.Tuple[typing.Any, ...], typing.List[int]] = {}
+    for i, state in enumerate(states):
+        values = {}
+        for cond in state.require.conds if state.require else []:
+            if isinstance(cond, Value):
+                values.setdefault(cond.path, cond.value)
+        try:
+            index.setdefault(tuple(values.get(path, _ANY) for path in keys), []).append(i)
+        except TypeError:
+            # unhashable value
+            return ([], None)
+    return (list(keys.values()), index if keys else None)
+
+
 def build_machine(transitions: typing.List[Transition[T]]) -> Machine[T]:
     states = {}
     tos = {}
@@ -70,13 +70,9 @@ def to_json(obj: T, indent: typing.Optional[int] = None) -> str:
 
 
 def to_dict(obj: T) -> typing.Dict[str, typing.Any]:
-    if dataclasses.is_dataclass(obj):
-        raw = dataclasses.asdict(obj)
-    elif isinstance(obj, list):
-        raw = list(map(dataclasses.asdict, obj))
-    else:
-        raw = obj
-    return _delete_none(raw)
+    if dataclasses.is_dataclass(obj) or isinstance(obj, list):
+        return _encode(obj)
+    return _delete_none(obj)
 
 
 def from_json(data: str, klass: typing.Optional[typing.Type[T]] = None) -> T:
@@ -84,64 +80,113 @@ def from_json(data: str, klass: typing.Optional[typing.Type[T]] = None) -> T:
 
 
 def from_dict(obj: typing.Any, klass: typing.Optional[typing.Type[T]] = None, field_path: str = "") -> T:  # pyre-ignore
+    return _decoder(klass)(obj, field_path)
+
+
+_Decoder = typing.Callable[[typing.Any, str], typing.Any]  # pyre-ignore
+# decoders compiled by `_compile_decoder`, keyed by the type to decode into, `None` for objects typed by `_ObjectType`
+_DECODERS: typing.Dict[typing.Any, _Decoder] = {}  # pyre-ignore
+
+
+def _decoder(klass: typing.Any) -> _Decoder:  # pyre-ignore
+    decoder = _DECODERS.get(klass)
+    if decoder is None:
+        decoder = _DECODERS[klass] = _compile_decoder(klass)
+    return decoder
+
+
+def _compile_decoder(klass: typing.Any) -> _Decoder:  # pyre-ignore
     if klass is None or _is_union(klass):
+
+        def decode_object(obj: typing.Any, field_path: str) -> typing.Any:  # pyre-ignore
+            if not isinstance(obj, dict):
+                code = ErrorCode.invalid_field_value if field_path else ErrorCode.invalid_object
+                raise FieldError(code, field_path, f"expect json object, but got {type(obj).__name__}: {obj}")
+            return _decoder(_find_object_type(obj, field_path))(obj, field_path)
+
+        return decode_object
+
+    check_type = _compile_type_check(klass)
+    if not dataclasses.is_dataclass(klass):
+        return check_type
+
+    fields = [(field.name, _compile_field_decoder(field)) for field in dataclasses.fields(klass)]
+    field_names = frozenset(name for name, _ in fields)
+
+    def decode_dataclass(obj: typing.Any, field_path: str) -> typing.Any:  # pyre-ignore
         if not isinstance(obj, dict):
-            code = ErrorCode.invalid_field_value if field_path else ErrorCode.invalid_object
-            raise FieldError(code, field_path, f"expect json object, but got {type(obj).__name__}: {obj}")
-        klass = _find_object_type(obj, field_path)
-    return _from_dict(obj, klass, field_path)
-
-
-def _from_dict(obj: typing.Any, klass: typing.Type[typing.Any], field_path: str) -> typing.Any:  # pyre-ignore
-    if not isinstance(obj, dict) or not dataclasses.is_dataclass(klass):
-        item_type = None
-        if hasattr(klass, "__origin__") and klass.__origin__ == list and hasattr(klass, "__args__"):
-            item_type = klass.__args__[0]
-            klass = list
+            return check_type(obj, field_path)
+        values = {name: decode(obj.get(name), field_path) for name, decode in fields}
+        if not field_names.issuperset(obj):
+            unknown_fields = sorted(key for key in obj if key not in field_names)
+            full_name = _join_field_path(field_path, unknown_fields[0])
+            raise FieldError(ErrorCode.unknown_field, full_name, f"{field_path}: {', '.join(unknown_fields)}")
+        return klass(**values)
+
+    return decode_dataclass
+
+
+def _compile_type_check(klass: typing.Any) -> _Decoder:  # pyre-ignore
+    if hasattr(klass, "__origin__") and klass.__origin__ == list and hasattr(klass, "__args__"):
+        decode_item = _decoder(klass.__args__[0])
+
+        def decode_list(obj: typing.Any, field_path: str) -> typing.Any:  # pyre-ignore
+            if not isinstance(obj, list):
+                raise _type_error(list, obj, field_path)
+            return [decode_item(item, field_path) for item in obj]
+
+        return decode_list
+
+    def check_type(obj: typing.Any, field_path: str) -> typing.Any:  # pyre-ignore
         if not isinstance(obj, klass):
-            code = ErrorCode.invalid_field_value if field_path else ErrorCode.invalid_object
-            raise FieldError(code, field_path, f"expect type {klass.__name__}, but got {type(obj).__name__}")
-        if klass == list and item_type:
-            return [from_dict(item, item_type, field_path) for item in obj]
+            raise _type_error(klass, obj, field_path)
         return obj
 
-    unknown_fields = list(obj.keys())
-    fields = {}
-    for field in dataclasses.fields(klass):
-        if field.name in unknown_fields:
-            unknown_fields.remove(field.name)
-        fields[field.name] = _field_value_from_dict(field, obj, field_path)
-
-    if len(unknown_fields) > 0:
-        unknown_fields.sort()
-        full_name = _join_field_path(field_path, unknown_fields[0])
-        field_names = ", ".join(unknown_fields)
-        raise FieldError(ErrorCode.unknown_field, full_name, f"{field_path}: {field_names}")
-    return klass(**fields)
+    return check_type
 
 
-def _field_value_from_dict(field: dataclasses.Field, obj: typing.Any, field_path: str) -> typing.Any:  # pyre-ignore
-    full_name = _join_field_path(field_path, field.name)
+def _compile_field_decoder(field: dataclasses.Field) -> _Decoder:  # pyre-ignore
+    name = field.name
     field_type = field.type
     args = field.type.__args__ if hasattr(field.type, "__args__") else []
     is_optional = len(args) == 2 and isinstance(None, args[1])
     if is_optional:
         field_type = args[0]
-    val = obj.get(field.name)
-    if val is None:
-        if is_optional:
-            return None
-        raise FieldError(ErrorCode.missing_field, full_name, f"missing field: {full_name}")
-
-    valid_values = field.metadata.get("valid-values")
-    if valid_values:
-        if isinstance(valid_values, list) and val not in valid_values:
-            raise FieldError(ErrorCode.invalid_field_value, full_name, f"expect one of {valid_values}, but got: {val}")
-        if isinstance(val, str) and isinstance(valid_values, re.Pattern) and not valid_values.match(val):
+    decode = _decoder(field_type)
+    # values of plain types are returned as it is, the field path is only needed for errors
+    plain_type = field_type if _is_plain_type(field_type) else None
+    valid_values = field.metadata.get("valid-values") or None
+    valid_list = valid_values if isinstance(valid_values, list) else None
+    pattern = valid_values if isinstance(valid_values, re.Pattern) else None
+
+    def decode_field(val: typing.Any, field_path: str) -> typing.Any:  # pyre-ignore
+        if val is None:
+            if is_optional:
+                return None
+            full_name = _join_field_path(field_path, name)
+            raise FieldError(ErrorCode.missing_field, full_name, f"missing field: {full_name}")
+        if valid_list is not None and val not in valid_list:
+            full_name = _join_field_path(field_path, name)
+            raise FieldError(ErrorCode.invalid_field_value, full_name, f"expect one of {valid_list}, but got: {val}")
+        if pattern is not None and isinstance(val, str) and not pattern.match(val):
+            full_name = _join_field_path(field_path, name)
             raise FieldError(
-                ErrorCode.invalid_field_value, full_name, f"{val} does not match pattern {valid_values.pattern}"
+                ErrorCode.invalid_field_value, full_name, f"{val} does not match pattern {pattern.pattern}"
             )
-    return from_dict(val, field_type, full_name)
+        if plain_type is not None and isinstance(val, plain_type):
+            return val
+        return decode(val, _join_field_path(field_path, name))
+
+    return decode_field
+
+
+def _is_plain_type(klass: typing.Any) -> bool:  # pyre-ignore
+    return isinstance(klass, type) and not dataclasses.is_dataclass(klass)
+
+
+def _type_error(klass: typing.Any, obj: typing.Any, field_path: str) -> FieldError:  # pyre-ignore
+    code = ErrorCode.invalid_field_value if field_path else ErrorCode.invalid_object
+    return FieldError(code, field_path, f"expect type {klass.__name__}, but got {type(obj).__name__}")
 
 
 def _join_field_path(path: str, field: str) -> str:
@@ -267,6 +312,35 @@ def validate_write_once_fields(path: str, new: typing.Any, prior: typing.Any) ->
         validate_write_once_fields(field_path, new_value, prior_value)
 
 
+# field names by dataclass type, for `_encode`
+_FIELD_NAMES: typing.Dict[typing.Type[typing.Any], typing.Tuple[str, ...]] = {}  # pyre-ignore
+
+
+def _encode(obj: typing.Any) -> typing.Any:  # pyre-ignore
+    """same with `_delete_none(dataclasses.asdict(obj))`, but builds the result in one pass without copying values"""
+
+    klass = type(obj)
+    if klass is str or klass is int:
+        return obj
+    names = _FIELD_NAMES.get(klass)
+    if names is None and dataclasses.is_dataclass(klass):
+        names = _FIELD_NAMES[klass] = tuple(field.name for field in dataclasses.fields(klass))
+    if names is not None:
+        ret = {}
+        for name in names:
+            val = getattr(obj, name)
+            if val is not None:
+                ret[name] = _encode(val)
+        return ret
+    if isinstance(obj, dict):
+        return {key: _encode(val) for key, val in obj.items() if val is not None}
+    if isinstance(obj, list):
+        return [_encode(val) for val in obj]
+    if isinstance(obj, tuple):
+        return tuple(_encode(val) for val in obj)
+    return obj
+
+
 def _delete_none(obj: typing.Any) -> typing.Any:  # pyre-ignore
     if isinstance(obj, dict):
         for key, val in list(obj.items()):
@@ -8,11 +8,13 @@
 3. `LocalAccount` for managing local account keys and generating random local account.
 4. Testnet Faucet service client
 5. Testnet constants
+6. `Fullnode` simulating Diem fullnode JSON-RPC API and faucet API for offline testing
 """
 
 from diem.jsonrpc import AsyncClient
 from diem.testing.constants import FAUCET_URL, JSON_RPC_URL, DD_ADDRESS, XUS
 from diem.testing.faucet import Faucet
+from diem.testing.fullnode import Fullnode, Ledger
 from diem.testing.local_account import LocalAccount
 
 import os
@@ -5,7 +5,7 @@
 """
 
 from diem import utils
-from diem.testing import LocalAccount, create_client, JSON_RPC_URL, FAUCET_URL
+from diem.testing import Fullnode, Ledger, LocalAccount, create_client, JSON_RPC_URL, FAUCET_URL
 from diem.testing.miniwallet import AppConfig, ServerConfig
 from diem.testing.suites import envs
 from typing import Optional, TextIO
@@ -234,6 +234,29 @@ def test(
     raise SystemExit(code)
 
 
+@click.command()
+@click.option("--host", "-H", default="localhost", help="Start server host.")
+@click.option("--port", "-p", default=8080, help="Start server port.")
+@click.option(
+    "--skip-signature-verification",
+    default=False,
+    help="Skip verifying transaction signatures for higher throughput.",
+    type=bool,
+    is_flag=True,
+)
+@click.help_option("-h", "--help")
+@coro
+async def start_fullnode(host: str, port: int, skip_signature_verification: bool) -> None:
+    logging.basicConfig(level=logging.INFO, format=log_format)
+
+    ledger = Ledger(verify_signatures=not skip_signature_verification)
+    async with Fullnode(ledger, host=host, port=port) as fullnode:
+        print("Simulated fullnode JSON-RPC URL: %s" % fullnode.json_rpc_url)
+        print("Simulated faucet URL: %s" % fullnode.faucet_url)
+        while True:
+            await asyncio.sleep(3600)
+
+
 @click.command()
 @click.help_option("-h", "--help")
 def gen_diem_account_config() -> None:
@@ -243,3 +266,4 @@ def gen_diem_account_config() -> None:
 main.add_command(start_server)
 main.add_command(test)
 main.add_command(gen_diem_account_config)
+main.add_command(start_fullnode)
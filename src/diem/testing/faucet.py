@@ -25,6 +25,7 @@ import functools, os, warnings
 
 from diem import diem_types, bcs
 from diem.jsonrpc.async_client import AsyncClient, Retry, TransactionExecutionFailed
+from diem.jsonrpc.retry import RetryPolicy
 from diem.testing.local_account import LocalAccount
 from diem.testing.constants import FAUCET_URL, XUS
 from typing import Optional, Tuple, Union
@@ -40,11 +41,11 @@ class Faucet:
         self,
         client: AsyncClient,
         url: Union[str, None] = None,
-        retry: Union[Retry, None] = None,
+        retry: Union[RetryPolicy, None] = None,
     ) -> None:
         self._client: AsyncClient = client
         self._url: str = url or os.getenv("DIEM_FAUCET_URL") or FAUCET_URL
-        self._retry: Retry = retry or Retry(5, 0.2, Exception)
+        self._retry: RetryPolicy = retry or Retry(5, 0.2, Exception)
 
     async def gen_account(self, currency_code: str = XUS, dd_account: bool = False) -> LocalAccount:
         account = LocalAccount.generate()
@@ -71,17 +72,20 @@ class Faucet:
         vasp_domain: Optional[str] = None,
         is_remove_domain: bool = False,
     ) -> None:
-        await self._retry.execute(
-            functools.partial(
-                self._mint_without_retry,
-                authkey,
-                amount,
-                currency_code,
-                dd_account,
-                vasp_domain,
-                is_remove_domain,
-            )
+        fn = functools.partial(
+            self._mint_without_retry,
+            authkey,
+            amount,
+            currency_code,
+            dd_account,
+            vasp_domain,
+            is_remove_domain,
         )
+        # `Retry.execute` may be overridden by subclasses
+        if isinstance(self._retry, Retry):
+            await self._retry.execute(fn)
+        else:
+            await self._retry.execute_async(fn)
 
     async def _mint_without_retry(
         self,
@@ -0,0 +1,946 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""In-process simulated Diem fullnode for offline testing and load testing.
+
+`Ledger` is an in-memory ledger state machine, `Fullnode` serves it by aiohttp:
+
+- JSON-RPC API at `/v1` (and `/`): `get_metadata`, `get_account`, `get_account_transaction`,
+  `get_account_transactions`, `get_transactions`, `get_events`, `get_currencies` and `submit`.
+- Faucet API at `/mint`, same protocol with Testnet faucet, so `diem.testing.Faucet` works with it.
+
+Simulation rules:
+
+1. A submitted transaction is validated (chain id, sender account, authentication key, signature, expiration and
+   sequence number), then executed immediately as the next version, no block metadata transaction is generated.
+   Transactions with sequence numbers ahead of the account sequence number wait in the account mempool until
+   the transactions before them are executed.
+2. Block timestamp of a version is `max(previous timestamp + 1, clock())` in microseconds, `clock` defaults to
+   `time.time`; given the same clock and transactions, the ledger is deterministic.
+3. Supported script functions: `peer_to_peer_with_metadata`, `create_child_vasp_account` and
+   `rotate_dual_attestation_info`; `create_parent_vasp_account` and `create_designated_dealer` for the treasury
+   compliance account. Other payloads are rejected as `UNKNOWN_SCRIPT`.
+4. Payments emit `sentpayment` and `receivedpayment` events, dual attestation metadata signature is verified for
+   payments between VASPs over the dual attestation limit. No gas is charged.
+5. `/mint` creates the account by a treasury compliance account transaction if it does not exist, then transfers
+   coins from the designated dealer account.
+
+```python
+from diem.testing import Fullnode
+
+async with Fullnode() as fullnode:
+    client = fullnode.create_client()
+    faucet = fullnode.create_faucet(client)
+    account = await faucet.gen_account()
+```
+"""
+
+from dataclasses import dataclass, field
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from aiohttp import web
+from diem import bcs, chain_ids, diem_types, serde_types as st, stdlib, utils, TREASURY_ADDRESS
+from diem.auth_key import AuthKey
+from diem.jsonrpc import AsyncClient
+from diem.testing.constants import DD_ADDRESS, XUS
+from diem.testing.faucet import Faucet
+import hashlib, json, time, typing
+
+
+JsonResult = typing.Dict[str, typing.Any]  # pyre-ignore
+
+DEFAULT_DUAL_ATTESTATION_LIMIT: int = 1_000_000_000
+MAX_PAGE_SIZE: int = 1000
+MAX_MEMPOOL_TXNS_PER_ACCOUNT: int = 100
+DESIGNATED_DEALER_BALANCE: int = 1 << 62
+
+VM_VALIDATION_ERROR_CODE: int = -32001
+MEMPOOL_ERROR_CODE: int = -32002
+INVALID_PARAMS_ERROR_CODE: int = -32602
+METHOD_NOT_FOUND_ERROR_CODE: int = -32601
+
+_MAX_U64: int = 2**64 - 1
+# Ed25519 transaction authenticator: variant index, public key length, public key, signature length, signature
+_ED25519_AUTHENTICATOR_SIZE: int = 1 + 1 + 32 + 1 + 64
+_TRANSACTION_HASH_SEED: bytes = utils.diem_hash_seed(b"Transaction")
+_RAW_TRANSACTION_HASH_SEED: bytes = utils.diem_hash_seed(b"RawTransaction")
+_DUAL_ATTESTATION_DOMAIN_SEPARATOR: bytes = b"@@$$DIEM_ATTEST$$@@"
+
+# error categories of Diem framework abort codes
+_NOT_PUBLISHED, _ALREADY_PUBLISHED, _REQUIRES_ROLE, _INVALID_ARGUMENT, _LIMIT_EXCEEDED = 5, 6, 3, 7, 8
+_CATEGORIES: typing.Dict[int, str] = {
+    _REQUIRES_ROLE: "REQUIRES_ROLE",
+    _NOT_PUBLISHED: "NOT_PUBLISHED",
+    _ALREADY_PUBLISHED: "ALREADY_PUBLISHED",
+    _INVALID_ARGUMENT: "INVALID_ARGUMENT",
+    _LIMIT_EXCEEDED: "LIMIT_EXCEEDED",
+}
+# reason: (module, reason code, category)
+_ABORT_REASONS: typing.Dict[str, typing.Tuple[str, int, int]] = {
+    "ECOIN_DEPOSIT_IS_ZERO": ("DiemAccount", 2, _INVALID_ARGUMENT),
+    "EINSUFFICIENT_BALANCE": ("DiemAccount", 5, _LIMIT_EXCEEDED),
+    "EMALFORMED_AUTHENTICATION_KEY": ("DiemAccount", 8, _INVALID_ARGUMENT),
+    "EPAYEE_DOES_NOT_EXIST": ("DiemAccount", 17, _NOT_PUBLISHED),
+    "EPAYEE_CANT_ACCEPT_CURRENCY_TYPE": ("DiemAccount", 18, _INVALID_ARGUMENT),
+    "EPAYER_DOESNT_HOLD_CURRENCY": ("DiemAccount", 19, _INVALID_ARGUMENT),
+    "EROLE_ID": ("Roles", 0, _ALREADY_PUBLISHED),
+    "EPARENT_VASP": ("Roles", 3, _REQUIRES_ROLE),
+    "ETREASURY_COMPLIANCE": ("Roles", 5, _REQUIRES_ROLE),
+    "ECREDENTIAL": ("DualAttestation", 0, _NOT_PUBLISHED),
+    "EINVALID_PUBLIC_KEY": ("DualAttestation", 3, _INVALID_ARGUMENT),
+    "EMALFORMED_METADATA_SIGNATURE": ("DualAttestation", 4, _INVALID_ARGUMENT),
+    "EINVALID_METADATA_SIGNATURE": ("DualAttestation", 5, _INVALID_ARGUMENT),
+    "ECURRENCY_INFO": ("Diem", 1, _NOT_PUBLISHED),
+}
+
+
+class JsonRpcServerError(Exception):
+    """JSON-RPC error response of the simulated fullnode"""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+    def to_json(self) -> JsonResult:
+        return {"code": self.code, "message": self.message, "data": None}
+
+
+def vm_validation_error(status: str) -> JsonRpcServerError:
+    return JsonRpcServerError(VM_VALIDATION_ERROR_CODE, f"Server error: VM Validation error: {status}")
+
+
+def invalid_params(message: str) -> JsonRpcServerError:
+    return JsonRpcServerError(INVALID_PARAMS_ERROR_CODE, f"Invalid params: {message}")
+
+
+class MoveAbort(Exception):
+    """raised by transaction execution, the transaction is committed with `move_abort` vm status"""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+    def vm_status(self) -> JsonResult:
+        module, code, category = _ABORT_REASONS[self.reason]
+        return {
+            "type": "move_abort",
+            "location": f"00000000000000000000000000000001::{module}",
+            "abort_code": code << 8 | category,
+            "explanation": {
+                "category": _CATEGORIES[category],
+                "category_description": "",
+                "reason": self.reason,
+                "reason_description": "",
+            },
+        }
+
+
+@dataclass
+class AccountState:
+    address: str
+    authentication_key: str
+    role: JsonResult
+    balances: typing.Dict[str, int]
+    received_events_key: str
+    sent_events_key: str
+    sequence_number: int = field(default=0)
+    transactions: typing.List[int] = field(default_factory=list)
+
+    @property
+    def role_type(self) -> str:
+        return self.role["type"]
+
+    def to_json(self, version: int) -> JsonResult:
+        return {
+            "address": self.address,
+            "balances": [{"amount": amount, "currency": currency} for currency, amount in self.balances.items()],
+            "sequence_number": self.sequence_number,
+            "authentication_key": self.authentication_key,
+            "sent_events_key": self.sent_events_key,
+            "received_events_key": self.received_events_key,
+            "delegated_key_rotation_capability": False,
+            "delegated_withdrawal_capability": False,
+            "is_frozen": False,
+            "role": self.role,
+            "version": version,
+        }
+
+
+@dataclass
+class _PendingTransaction:
+    txn: diem_types.SignedTransaction
+    call: stdlib.ScriptFunctionCall
+    user_txn_bytes: bytes
+    hash: str
+
+
+Events = typing.List[typing.Tuple[str, JsonResult]]
+
+
+class Ledger:
+    """Ledger is an in-memory ledger state machine, see module document for details
+
+    Submitted script function transactions are decoded by a hand-written decoder (see
+    `_decode_signed_transaction`), so Ed25519 signature verification is the largest single cost of a submit.
+    Submitting 2000 peer to peer transactions to the ledger directly, without HTTP, measured about 3500 TPS, and
+    5000 to 9000 TPS with `verify_signatures` set to False, which is useful for load testing client throughput.
+    All methods should be called in one thread, `Fullnode` calls them in the event loop thread.
+    """
+
+    def __init__(
+        self,
+        chain_id: int = chain_ids.TESTNET.to_int(),
+        currencies: typing.Sequence[str] = (XUS,),
+        dual_attestation_limit: int = DEFAULT_DUAL_ATTESTATION_LIMIT,
+        verify_signatures: bool = True,
+        clock: typing.Callable[[], float] = time.time,
+    ) -> None:
+        self.chain_id = chain_id
+        self.currencies: typing.List[str] = list(currencies)
+        self.dual_attestation_limit = dual_attestation_limit
+        self.verify_signatures = verify_signatures
+        self._clock = clock
+        self.accounts: typing.Dict[str, AccountState] = {}
+        self.transactions: typing.List[JsonResult] = []
+        self.events: typing.Dict[str, typing.List[JsonResult]] = {}
+        self._timestamps: typing.List[int] = []
+        self._mempool: typing.Dict[str, typing.Dict[int, _PendingTransaction]] = {}
+        self._scripts: typing.Dict[
+            typing.Type[stdlib.ScriptFunctionCall],
+            typing.Callable[[AccountState, typing.Any, int], Events],  # pyre-ignore
+        ] = {
+            stdlib.ScriptFunctionCall__PeerToPeerWithMetadata: self._peer_to_peer_with_metadata,
+            stdlib.ScriptFunctionCall__CreateChildVaspAccount: self._create_child_vasp_account,
+            stdlib.ScriptFunctionCall__RotateDualAttestationInfo: self._rotate_dual_attestation_info,
+            stdlib.ScriptFunctionCall__CreateParentVaspAccount: self._create_parent_vasp_account,
+            stdlib.ScriptFunctionCall__CreateDesignatedDealer: self._create_designated_dealer,
+        }
+
+        # keys are derived from fixed seeds, so that transactions created by the ledger are deterministic
+        self._treasury_compliance_key: Ed25519PrivateKey = _private_key(b"treasury_compliance")
+        self._designated_dealer_key: Ed25519PrivateKey = _private_key(b"designated_dealer")
+        self._create_account(TREASURY_ADDRESS, self._treasury_compliance_key, {"type": "treasury_compliance"}, [])
+        dd = self._create_account(DD_ADDRESS, self._designated_dealer_key, _dd_role(DD_ADDRESS), self.currencies)
+        dd.balances = {currency: DESIGNATED_DEALER_BALANCE for currency in self.currencies}
+        self._commit(
+            {"type": "genesis"}, _sha3(b"genesis").hex(), "", [], {"type": "executed"}, int(self._clock() * 1_000_000)
+        )
+
+    @property
+    def version(self) -> int:
+        return len(self.transactions) - 1
+
+    @property
+    def timestamp_usecs(self) -> int:
+        return self._timestamps[-1]
+
+    def get_metadata(self, version: typing.Optional[int] = None) -> JsonResult:
+        if version is None:
+            version = self.version
+        elif not 0 <= version <= self.version:
+            raise invalid_params(f"version {version} is out of range")
+        ret = {"version": version, "timestamp": self._timestamps[version], "chain_id": self.chain_id}
+        if version == self.version:
+            ret.update(
+                {
+                    "script_hash_allow_list": [],
+                    "module_publishing_allowed": False,
+                    "diem_version": 3,
+                    "dual_attestation_limit": self.dual_attestation_limit,
+                }
+            )
+        return ret
+
+    def get_currencies(self) -> typing.List[JsonResult]:
+        return [
+            {
+                "code": code,
+                "scaling_factor": 1_000_000,
+                "fractional_part": 100,
+                "to_xdx_exchange_rate": 1.0,
+                "mint_events_key": _event_key(i * 5, TREASURY_ADDRESS),
+                "burn_events_key": _event_key(i * 5 + 1, TREASURY_ADDRESS),
+                "preburn_events_key": _event_key(i * 5 + 2, TREASURY_ADDRESS),
+                "cancel_burn_events_key": _event_key(i * 5 + 3, TREASURY_ADDRESS),
+                "exchange_rate_update_events_key": _event_key(i * 5 + 4, TREASURY_ADDRESS),
+            }
+            for i, code in enumerate(self.currencies, start=1)
+        ]
+
+    def get_account(self, address: str) -> typing.Optional[JsonResult]:
+        account = self.accounts.get(_address(address))
+        return account.to_json(self.version) if account else None
+
+    def get_account_transaction(
+        self, address: str, sequence_number: int, include_events: bool
+    ) -> typing.Optional[JsonResult]:
+        account = self.accounts.get(_address(address))
+        if account is None or sequence_number >= len(account.transactions):
+            return None
+        return self._transaction(account.transactions[sequence_number], include_events)
+
+    def get_account_transactions(
+        self, address: str, start: int, limit: int, include_events: bool
+    ) -> typing.List[JsonResult]:
+        _check_limit(limit)
+        account = self.accounts.get(_address(address))
+        if account is None:
+            return []
+        return [self._transaction(v, include_events) for v in account.transactions[start : start + limit]]
+
+    def get_transactions(self, start_version: int, limit: int, include_events: bool) -> typing.List[JsonResult]:
+        _check_limit(limit)
+        return [self._transaction(v, include_events) for v in range(start_version, self.version + 1)[:limit]]
+
+    def get_events(self, key: str, start: int, limit: int) -> typing.List[JsonResult]:
+        _check_limit(limit)
+        return self.events.get(key, [])[start : start + limit]
+
+    def submit(self, txn: typing.Union[diem_types.SignedTransaction, str]) -> None:
+        """validate and add the transaction into mempool, and execute transactions ready for execution"""
+
+        if isinstance(txn, str):
+            try:
+                signed_txn_bytes = bytes.fromhex(txn)
+                signed_txn = _decode_signed_transaction(signed_txn_bytes)
+            except Exception as e:
+                raise invalid_params(f"invalid signed transaction: {e}")
+        else:
+            signed_txn, signed_txn_bytes = txn, txn.bcs_serialize()
+
+        raw = signed_txn.raw_txn
+        if raw.chain_id.value != self.chain_id:
+            raise vm_validation_error("BAD_CHAIN_ID")
+        sender = self.accounts.get(raw.sender.to_hex())
+        if sender is None:
+            raise vm_validation_error("SENDING_ACCOUNT_DOES_NOT_EXIST")
+        authenticator = signed_txn.authenticator
+        if not isinstance(authenticator, diem_types.TransactionAuthenticator__Ed25519):
+            raise vm_validation_error("INVALID_SIGNATURE")
+        public_key = Ed25519PublicKey.from_public_bytes(authenticator.public_key.value)
+        if AuthKey.from_public_key(public_key).hex() != sender.authentication_key:
+            raise vm_validation_error("INVALID_AUTH_KEY")
+        if self.verify_signatures:
+            raw_txn_bytes = signed_txn_bytes[:-_ED25519_AUTHENTICATOR_SIZE]
+            try:
+                public_key.verify(authenticator.signature.value, _RAW_TRANSACTION_HASH_SEED + raw_txn_bytes)
+            except InvalidSignature:
+                raise vm_validation_error("INVALID_SIGNATURE")
+        if raw.expiration_timestamp_secs <= self._clock():
+            raise vm_validation_error("TRANSACTION_EXPIRED")
+        seq = int(raw.sequence_number)
+        if seq < sender.sequence_number:
+            raise vm_validation_error("SEQUENCE_NUMBER_TOO_OLD")
+        if seq >= sender.sequence_number + MAX_MEMPOOL_TXNS_PER_ACCOUNT:
+            raise vm_validation_error("SEQUENCE_NUMBER_TOO_NEW")
+        try:
+            call = _decode_script_function_call(raw.payload)
+        except ValueError:
+            raise vm_validation_error("UNKNOWN_SCRIPT")
+        if type(call) not in self._scripts:
+            raise vm_validation_error("UNKNOWN_SCRIPT")
+
+        # user transaction is the first variant of `diem_types.Transaction`
+        user_txn_bytes = b"\x00" + signed_txn_bytes
+        txn_hash = utils.hash(_TRANSACTION_HASH_SEED, user_txn_bytes).hex()
+        mempool = self._mempool.setdefault(sender.address, {})
+        pending = mempool.get(seq)
+        if pending is not None:
+            if pending.hash == txn_hash:
+                return
+            raise JsonRpcServerError(MEMPOOL_ERROR_CODE, "Mempool submission error: status: InvalidUpdate")
+        mempool[seq] = _PendingTransaction(signed_txn, call, user_txn_bytes, txn_hash)
+        self._execute_ready_transactions(sender)
+
+    def mint(
+        self, auth_key: str, amount: int, currency: str, designated_dealer: bool = False
+    ) -> typing.List[diem_types.SignedTransaction]:
+        """create account if it does not exist and transfer coins from designated dealer account
+
+        Returns executed transactions.
+        """
+
+        key = AuthKey(bytes.fromhex(auth_key))
+        address = key.account_address()
+        ret = []
+        if address.to_hex() not in self.accounts:
+            create = (
+                stdlib.encode_create_designated_dealer_script_function
+                if designated_dealer
+                else stdlib.encode_create_parent_vasp_account_script_function
+            )
+            payload = create(
+                utils.currency_code(currency), 0, address, key.prefix(), b"simulated", False
+            )  # pyre-ignore
+            ret.append(self._submit_by(TREASURY_ADDRESS, self._treasury_compliance_key, payload))
+        payload = stdlib.encode_peer_to_peer_with_metadata_script_function(
+            utils.currency_code(currency), address, amount, b"", b""
+        )
+        ret.append(self._submit_by(DD_ADDRESS, self._designated_dealer_key, payload))
+        return ret
+
+    def _submit_by(
+        self, address: str, key: Ed25519PrivateKey, payload: diem_types.TransactionPayload
+    ) -> diem_types.SignedTransaction:
+        raw = diem_types.RawTransaction(  # pyre-ignore
+            sender=utils.account_address(address),
+            sequence_number=st.uint64(self.accounts[address].sequence_number),
+            payload=payload,
+            max_gas_amount=st.uint64(1_000_000),
+            gas_unit_price=st.uint64(0),
+            gas_currency_code=self.currencies[0],
+            expiration_timestamp_secs=st.uint64(int(self._clock()) + 60),
+            chain_id=diem_types.ChainId.from_int(self.chain_id),
+        )
+        txn = utils.create_signed_transaction(
+            raw, utils.public_key_bytes(key.public_key()), key.sign(utils.raw_transaction_signing_msg(raw))
+        )
+        self.submit(txn)
+        return txn
+
+    def _execute_ready_transactions(self, sender: AccountState) -> None:
+        mempool = self._mempool[sender.address]
+        while sender.sequence_number in mempool:
+            pending = mempool.pop(sender.sequence_number)
+            timestamp = max(self.timestamp_usecs + 1, int(self._clock() * 1_000_000))
+            if pending.txn.raw_txn.expiration_timestamp_secs * 1_000_000 <= timestamp:
+                # expired in mempool, the sequence number is not consumed
+                return
+            try:
+                events = self._scripts[type(pending.call)](sender, pending.call, timestamp)
+                vm_status: JsonResult = {"type": "executed"}
+            except MoveAbort as e:
+                events, vm_status = [], e.vm_status()
+            sender.sequence_number += 1
+            sender.transactions.append(len(self.transactions))
+            txn_data = _user_transaction_data(pending.txn, pending.call)
+            self._commit(txn_data, pending.hash, pending.user_txn_bytes.hex(), events, vm_status, timestamp)
+
+    def _commit(
+        self, txn_data: JsonResult, txn_hash: str, txn_bytes: str, events: Events, vm_status: JsonResult, ts: int
+    ) -> None:
+        version = len(self.transactions)
+        txn_events = []
+        for key, data in events:
+            stream = self.events.setdefault(key, [])
+            event = {"key": key, "sequence_number": len(stream), "transaction_version": version, "data": data}
+            stream.append(event)
+            txn_events.append(event)
+        self.transactions.append(
+            {
+                "version": version,
+                "transaction": txn_data,
+                "hash": txn_hash,
+                "bytes": txn_bytes,
+                "events": txn_events,
+                "vm_status": vm_status,
+                "gas_used": 0,
+            }
+        )
+        self._timestamps.append(ts)
+
+    def _transaction(self, version: int, include_events: bool) -> JsonResult:
+        txn = self.transactions[version]
+        return txn if include_events else {**txn, "events": []}
+
+    def _peer_to_peer_with_metadata(
+        self, sender: AccountState, call: stdlib.ScriptFunctionCall__PeerToPeerWithMetadata, timestamp: int
+    ) -> Events:
+        receiver = self.accounts.get(call.payee.to_hex())
+        currency = utils.type_tag_to_str(call.currency)
+        if receiver is None:
+            raise MoveAbort("EPAYEE_DOES_NOT_EXIST")
+        if currency not in receiver.balances:
+            raise MoveAbort("EPAYEE_CANT_ACCEPT_CURRENCY_TYPE")
+        amount = int(call.amount)
+        if amount == 0:
+            raise MoveAbort("ECOIN_DEPOSIT_IS_ZERO")
+        self._check_dual_attestation(sender, receiver, amount, call.metadata, call.metadata_signature)
+        return self._transfer(sender, receiver, currency, amount, call.metadata)
+
+    def _create_child_vasp_account(
+        self, sender: AccountState, call: stdlib.ScriptFunctionCall__CreateChildVaspAccount, timestamp: int
+    ) -> Events:
+        if sender.role_type != "parent_vasp":
+            raise MoveAbort("EPARENT_VASP")
+        child_address = call.child_address.to_hex()
+        currencies = self._account_currencies(call.coin_type, call.add_all_currencies)
+        self._check_new_account(child_address, call.auth_key_prefix)
+        currency, amount = utils.type_tag_to_str(call.coin_type), int(call.child_initial_balance)
+        if amount and sender.balances.get(currency, 0) < amount:
+            raise MoveAbort("EINSUFFICIENT_BALANCE")
+
+        role = {"type": "child_vasp", "parent_vasp_address": sender.address}
+        child = self._create_account(child_address, call.auth_key_prefix, role, currencies)
+        sender.role["num_children"] += 1
+        if not amount:
+            return []
+        return self._transfer(sender, child, currency, amount, b"")
+
+    def _rotate_dual_attestation_info(
+        self, sender: AccountState, call: stdlib.ScriptFunctionCall__RotateDualAttestationInfo, timestamp: int
+    ) -> Events:
+        if sender.role_type not in ["parent_vasp", "designated_dealer"]:
+            raise MoveAbort("ECREDENTIAL")
+        try:
+            Ed25519PublicKey.from_public_bytes(call.new_key)
+        except ValueError:
+            raise MoveAbort("EINVALID_PUBLIC_KEY")
+
+        role, secs = sender.role, timestamp // 1_000_000
+        role["base_url"], role["compliance_key"] = call.new_url.decode("utf-8"), call.new_key.hex()
+        return [
+            (
+                role["base_url_rotation_events_key"],
+                {"type": "baseurlrotation", "new_base_url": role["base_url"], "time_rotated_seconds": secs},
+            ),
+            (
+                role["compliance_key_rotation_events_key"],
+                {
+                    "type": "compliancekeyrotation",
+                    "new_compliance_public_key": role["compliance_key"],
+                    "time_rotated_seconds": secs,
+                },
+            ),
+        ]
+
+    def _create_parent_vasp_account(
+        self, sender: AccountState, call: stdlib.ScriptFunctionCall__CreateParentVaspAccount, timestamp: int
+    ) -> Events:
+        return self._create_account_by_treasury_compliance(
+            sender, call.new_account_address, call.auth_key_prefix, call.coin_type, call.add_all_currencies, "parent"
+        )
+
+    def _create_designated_dealer(
+        self, sender: AccountState, call: stdlib.ScriptFunctionCall__CreateDesignatedDealer, timestamp: int
+    ) -> Events:
+        return self._create_account_by_treasury_compliance(
+            sender, call.addr, call.auth_key_prefix, call.currency, call.add_all_currencies, "dd"
+        )
+
+    def _create_account_by_treasury_compliance(
+        self,
+        sender: AccountState,
+        address: diem_types.AccountAddress,
+        auth_key_prefix: bytes,
+        coin_type: diem_types.TypeTag,
+        add_all_currencies: bool,
+        role_type: str,
+    ) -> Events:
+        if sender.role_type != "treasury_compliance":
+            raise MoveAbort("ETREASURY_COMPLIANCE")
+        currencies = self._account_currencies(coin_type, add_all_currencies)
+        self._check_new_account(address.to_hex(), auth_key_prefix)
+        role = _parent_vasp_role(address.to_hex()) if role_type == "parent" else _dd_role(address.to_hex())
+        self._create_account(address.to_hex(), auth_key_prefix, role, currencies)
+        return []
+
+    def _account_currencies(self, coin_type: diem_types.TypeTag, add_all_currencies: bool) -> typing.List[str]:
+        currency = utils.type_tag_to_str(coin_type)
+        if currency not in self.currencies:
+            raise MoveAbort("ECURRENCY_INFO")
+        return self.currencies if add_all_currencies else [currency]
+
+    def _check_new_account(self, address: str, auth_key_prefix: bytes) -> None:
+        if address in self.accounts:
+            raise MoveAbort("EROLE_ID")
+        if len(auth_key_prefix) + len(bytes.fromhex(address)) != 32:
+            raise MoveAbort("EMALFORMED_AUTHENTICATION_KEY")
+
+    def _check_dual_attestation(
+        self, sender: AccountState, receiver: AccountState, amount: int, metadata: bytes, signature: bytes
+    ) -> None:
+        if amount < self.dual_attestation_limit:
+            return
+        sender_vasp, receiver_vasp = self._parent_vasp(sender), self._parent_vasp(receiver)
+        if sender_vasp is None or receiver_vasp is None or sender_vasp is receiver_vasp:
+            return
+        if len(signature) != 64:
+            raise MoveAbort("EMALFORMED_METADATA_SIGNATURE")
+        msg = (
+            metadata + bytes.fromhex(sender.address) + amount.to_bytes(8, "little") + _DUAL_ATTESTATION_DOMAIN_SEPARATOR
+        )
+        try:
+            Ed25519PublicKey.from_public_bytes(bytes.fromhex(receiver_vasp.role["compliance_key"])).verify(
+                signature, msg
+            )
+        except (ValueError, InvalidSignature):
+            raise MoveAbort("EINVALID_METADATA_SIGNATURE")
+
+    def _parent_vasp(self, account: AccountState) -> typing.Optional[AccountState]:
+        if account.role_type == "parent_vasp":
+            return account
+        if account.role_type == "child_vasp":
+            return self.accounts[account.role["parent_vasp_address"]]
+        return None
+
+    def _transfer(
+        self, sender: AccountState, receiver: AccountState, currency: str, amount: int, metadata: bytes
+    ) -> Events:
+        if currency not in sender.balances:
+            raise MoveAbort("EPAYER_DOESNT_HOLD_CURRENCY")
+        if sender.balances[currency] < amount:
+            raise MoveAbort("EINSUFFICIENT_BALANCE")
+        sender.balances[currency] -= amount
+        receiver.balances[currency] += amount
+        data = {
+            "amount": {"amount": amount, "currency": currency},
+            "sender": sender.address,
+            "receiver": receiver.address,
+            "metadata": metadata.hex(),
+        }
+        return [
+            (sender.sent_events_key, {"type": "sentpayment", **data}),
+            (receiver.received_events_key, {"type": "receivedpayment", **data}),
+        ]
+
+    def _create_account(
+        self,
+        address: str,
+        key: typing.Union[bytes, Ed25519PrivateKey],
+        role: JsonResult,
+        currencies: typing.List[str],
+    ) -> AccountState:
+        if isinstance(key, Ed25519PrivateKey):
+            auth_key = AuthKey.from_public_key(key.public_key()).hex()
+        else:
+            auth_key = key.hex() + address
+        # parent VASP and designated dealer accounts have dual attestation events streams created before payments
+        first = 2 if "compliance_key_rotation_events_key" in role else 0
+        account = AccountState(
+            address=address,
+            authentication_key=auth_key,
+            role=role,
+            balances={currency: 0 for currency in currencies},
+            received_events_key=_event_key(first, address),
+            sent_events_key=_event_key(first + 1, address),
+        )
+        self.accounts[address] = account
+        return account
+
+
+class Fullnode:
+    """Fullnode serves simulated JSON-RPC API and faucet API of the `ledger`, see module document for details"""
+
+    def __init__(self, ledger: typing.Optional[Ledger] = None, host: str = "localhost", port: int = 0) -> None:
+        self.ledger: Ledger = ledger or Ledger()
+        self.host = host
+        self.port: int = port or utils.get_available_port()
+        self._runner: typing.Optional[web.AppRunner] = None
+        self._methods: typing.Dict[str, typing.Callable[..., typing.Any]] = {  # pyre-ignore
+            "get_metadata": self.ledger.get_metadata,
+            "get_currencies": self.ledger.get_currencies,
+            "get_account": self.ledger.get_account,
+            "get_account_transaction": self.ledger.get_account_transaction,
+            "get_account_transactions": self.ledger.get_account_transactions,
+            "get_transactions": self.ledger.get_transactions,
+            "get_events": self.ledger.get_events,
+            "submit": self.ledger.submit,
+        }
+
+    @property
+    def json_rpc_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    @property
+    def faucet_url(self) -> str:
+        return f"http://{self.host}:{self.port}/mint"
+
+    def create_client(self, **kwargs: typing.Any) -> AsyncClient:  # pyre-ignore
+        return AsyncClient(self.json_rpc_url, **kwargs)
+
+    def create_faucet(self, client: AsyncClient) -> Faucet:
+        return Faucet(client, self.faucet_url)
+
+    def web_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("post", "/", self.json_rpc)
+        app.router.add_route("post", "/v1", self.json_rpc)
+        app.router.add_route("post", "/mint", self.mint)
+        return app
+
+    async def start(self) -> None:
+        runner = web.AppRunner(self.web_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self.host, self.port).start()
+        self._runner = runner
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "Fullnode":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: typing.Any) -> None:  # pyre-ignore
+        await self.stop()
+
+    async def json_rpc(self, request: web.Request) -> web.Response:
+        try:
+            body = json.loads(await request.read())
+        except ValueError:
+            error = JsonRpcServerError(-32700, "Parse error")
+            return web.json_response({"jsonrpc": "2.0", "id": None, "error": error.to_json()})
+        ret = [self.handle(req) for req in body] if isinstance(body, list) else self.handle(body)
+        return web.json_response(ret)
+
+    async def mint(self, request: web.Request) -> web.Response:
+        try:
+            txns = self.ledger.mint(
+                request.query["auth_key"],
+                int(request.query["amount"]),
+                request.query["currency_code"],
+                request.query.get("is_designated_dealer") == "true",
+            )
+        except (KeyError, ValueError, JsonRpcServerError) as e:
+            return web.Response(status=400, text=str(e))
+        if request.query.get("return_txns") != "true":
+            return web.Response(text=str(self.ledger.accounts[DD_ADDRESS].sequence_number))
+        return web.Response(text=bcs.serialize(txns, typing.Sequence[diem_types.SignedTransaction]).hex())
+
+    def handle(self, request: JsonResult) -> JsonResult:
+        """handle one JSON-RPC request object"""
+
+        ret: JsonResult = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            method = self._methods.get(request.get("method", ""))
+            if method is None:
+                raise JsonRpcServerError(METHOD_NOT_FOUND_ERROR_CODE, f"Method not found: {request.get('method')}")
+            try:
+                ret["result"] = method(*request.get("params", []))
+            except (TypeError, ValueError, IndexError) as e:
+                raise invalid_params(str(e))
+        except JsonRpcServerError as e:
+            ret["error"] = e.to_json()
+        ret["diem_chain_id"] = self.ledger.chain_id
+        ret["diem_ledger_version"] = self.ledger.version
+        ret["diem_ledger_timestampusec"] = self.ledger.timestamp_usecs
+        return ret
+
+
+class _Reader:
+    """reads BCS values from bytes, raises `ValueError` for values it does not read"""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.pos = 0
+
+    def read(self, length: int) -> bytes:
+        end = self.pos + length
+        if end > len(self.data):
+            raise ValueError("input is too short")
+        ret, self.pos = self.data[self.pos : end], end
+        return ret
+
+    def u8(self) -> int:
+        if self.pos >= len(self.data):
+            raise ValueError("input is too short")
+        self.pos += 1
+        return self.data[self.pos - 1]
+
+    def u64(self) -> st.uint64:
+        return st.uint64(int.from_bytes(self.read(8), "little"))
+
+    def uleb128(self) -> int:
+        # canonical encoding of values less than 2^28, which covers lengths and variant indexes of transactions
+        value = 0
+        for shift in range(0, 28, 7):
+            byte = self.u8()
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                if shift > 0 and byte == 0:
+                    raise ValueError("non-canonical uleb128")
+                return value
+        raise ValueError("uleb128 value is too large")
+
+    def bytes(self) -> bytes:
+        return self.read(self.uleb128())
+
+    def str(self) -> str:
+        return self.bytes().decode("utf-8")
+
+    def identifier(self) -> diem_types.Identifier:
+        return diem_types.Identifier(value=self.str())
+
+    def address(self) -> diem_types.AccountAddress:
+        return diem_types.AccountAddress.from_bytes(self.read(diem_types.AccountAddress.LENGTH))
+
+    def seq(self, read: typing.Callable[[], typing.Any]) -> typing.List[typing.Any]:  # pyre-ignore
+        return [read() for _ in range(self.uleb128())]
+
+    def type_tag(self, depth: int = 0) -> diem_types.TypeTag:
+        if depth > 8:
+            raise ValueError("type tag is nested too deep")
+        index = self.uleb128()
+        if index == diem_types.TypeTag__Vector.INDEX:
+            return diem_types.TypeTag__Vector(value=self.type_tag(depth + 1))
+        if index == diem_types.TypeTag__Struct.INDEX:
+            struct = diem_types.StructTag(
+                address=self.address(),
+                module=self.identifier(),
+                name=self.identifier(),
+                type_params=self.seq(lambda: self.type_tag(depth + 1)),
+            )
+            return diem_types.TypeTag__Struct(value=struct)
+        if index >= len(diem_types.TypeTag.VARIANTS):
+            raise ValueError(f"unknown type tag variant {index}")
+        return diem_types.TypeTag.VARIANTS[index]()
+
+
+def _decode_signed_transaction(data: bytes) -> diem_types.SignedTransaction:
+    """decodes a submitted transaction
+
+    Script function transactions with an Ed25519 authenticator are decoded by `_Reader`, about 8 times faster
+    than the generated deserializer, which resolves type hints of every value it reads. Other and invalid
+    transactions are decoded by `SignedTransaction.bcs_deserialize`.
+    """
+
+    try:
+        r = _Reader(data)
+        sender, sequence_number = r.address(), r.u64()
+        if r.uleb128() != diem_types.TransactionPayload__ScriptFunction.INDEX:
+            raise ValueError("not a script function payload")
+        script = diem_types.ScriptFunction(
+            module=diem_types.ModuleId(address=r.address(), name=r.identifier()),
+            function=r.identifier(),
+            ty_args=r.seq(r.type_tag),
+            args=r.seq(r.bytes),
+        )
+        raw = diem_types.RawTransaction(  # pyre-ignore
+            sender=sender,
+            sequence_number=sequence_number,
+            payload=diem_types.TransactionPayload__ScriptFunction(value=script),
+            max_gas_amount=r.u64(),
+            gas_unit_price=r.u64(),
+            gas_currency_code=r.str(),
+            expiration_timestamp_secs=r.u64(),
+            chain_id=diem_types.ChainId(value=st.uint8(r.u8())),
+        )
+        if r.uleb128() != diem_types.TransactionAuthenticator__Ed25519.INDEX:
+            raise ValueError("not an Ed25519 authenticator")
+        authenticator = diem_types.TransactionAuthenticator__Ed25519(
+            public_key=diem_types.Ed25519PublicKey(value=r.bytes()),
+            signature=diem_types.Ed25519Signature(value=r.bytes()),
+        )
+        if r.pos != len(data):
+            raise ValueError("some input bytes were not read")
+        return diem_types.SignedTransaction(raw_txn=raw, authenticator=authenticator)
+    except ValueError:
+        return diem_types.SignedTransaction.bcs_deserialize(data)
+
+
+def _decode_script_function_call(payload: diem_types.TransactionPayload) -> stdlib.ScriptFunctionCall:
+    """decodes `peer_to_peer_with_metadata` arguments by `_Reader`, other calls by `stdlib`"""
+
+    script = getattr(payload, "value", None)
+    if (
+        isinstance(script, diem_types.ScriptFunction)
+        and script.function.value == "peer_to_peer_with_metadata"
+        and script.module.name.value == "PaymentScripts"
+        and len(script.ty_args) == 1
+        and len(script.args) == 4
+    ):
+        try:
+            return stdlib.ScriptFunctionCall__PeerToPeerWithMetadata(
+                currency=script.ty_args[0],
+                payee=_Reader(script.args[0]).address(),
+                amount=_Reader(script.args[1]).u64(),
+                metadata=_Reader(script.args[2]).bytes(),
+                metadata_signature=_Reader(script.args[3]).bytes(),
+            )
+        except ValueError:
+            pass
+    return stdlib.decode_script_function_payload(payload)
+
+
+def _user_transaction_data(txn: diem_types.SignedTransaction, call: stdlib.ScriptFunctionCall) -> JsonResult:
+    raw = txn.raw_txn
+    authenticator = typing.cast(diem_types.TransactionAuthenticator__Ed25519, txn.authenticator)
+    script = typing.cast(diem_types.TransactionPayload__ScriptFunction, raw.payload).value
+    ret = {
+        "type": "user",
+        "sender": raw.sender.to_hex(),
+        "signature_scheme": "Scheme::Ed25519",
+        "signature": authenticator.signature.value.hex(),
+        "public_key": authenticator.public_key.value.hex(),
+        "sequence_number": int(raw.sequence_number),
+        "chain_id": int(raw.chain_id.value),
+        "max_gas_amount": int(raw.max_gas_amount),
+        "gas_unit_price": int(raw.gas_unit_price),
+        "gas_currency": raw.gas_currency_code,
+        "expiration_timestamp_secs": int(raw.expiration_timestamp_secs),
+        "script_hash": "",
+        "script_bytes": "",
+        "script": {
+            "type": "script_function",
+            "module_address": script.module.address.to_hex(),
+            "module_name": script.module.name.value,
+            "function_name": script.function.value,
+            "type_arguments": [utils.type_tag_to_str(t) for t in script.ty_args],
+            "arguments_bcs": [arg.hex() for arg in script.args],
+        },
+    }
+    if isinstance(call, stdlib.ScriptFunctionCall__PeerToPeerWithMetadata):
+        ret["script"].update(
+            {
+                "type": "peer_to_peer_with_metadata",
+                "receiver": call.payee.to_hex(),
+                "amount": int(call.amount),
+                "currency": utils.type_tag_to_str(call.currency),
+                "metadata": call.metadata.hex(),
+                "metadata_signature": call.metadata_signature.hex(),
+            }
+        )
+    return ret
+
+
+def _parent_vasp_role(address: str) -> JsonResult:
+    return {
+        "type": "parent_vasp",
+        "human_name": "simulated",
+        "base_url": "",
+        "expiration_time": _MAX_U64,
+        "compliance_key": "",
+        "num_children": 0,
+        "compliance_key_rotation_events_key": _event_key(0, address),
+        "base_url_rotation_events_key": _event_key(1, address),
+        "vasp_domains": [],
+    }
+
+
+def _dd_role(address: str) -> JsonResult:
+    return {
+        "type": "designated_dealer",
+        "human_name": "simulated",
+        "base_url": "",
+        "expiration_time": _MAX_U64,
+        "compliance_key": "",
+        "compliance_key_rotation_events_key": _event_key(0, address),
+        "base_url_rotation_events_key": _event_key(1, address),
+        "received_mint_events_key": _event_key(4, address),
+        "preburn_balances": [],
+    }
+
+
+def _event_key(creation_number: int, address: str) -> str:
+    return creation_number.to_bytes(8, "little").hex() + address
+
+
+def _address(address: str) -> str:
+    return utils.account_address_hex(address)
+
+
+def _check_limit(limit: int) -> None:
+    if not 0 <= limit <= MAX_PAGE_SIZE:
+        raise invalid_params(f"limit {limit} exceeds max page size {MAX_PAGE_SIZE}")
+
+
+def _private_key(seed: bytes) -> Ed25519PrivateKey:
+    return Ed25519PrivateKey.from_private_bytes(_sha3(seed))
+
+
+def _sha3(b: bytes) -> bytes:
+    return hashlib.sha3_256(b).digest()
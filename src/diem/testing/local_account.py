@@ -127,7 +127,7 @@ class LocalAccount:
         """submit transaction with the given script
 
         This function creates transaction with current account sequence number (by json-rpc `get_account`
-        method).
+        method). Use `submitter` for submitting multiple transactions of the account concurrently.
         """
 
         seq = await client.get_account_sequence(self.account_address)
@@ -135,6 +135,14 @@ class LocalAccount:
         await client.submit(txn)
         return txn
 
+    def submitter(self, client: AsyncClient) -> jsonrpc.AsyncAccountSubmitter:
+        """create `jsonrpc.AsyncAccountSubmitter` allocating sequence numbers of the account locally
+
+        The submitter should be shared by all coroutines submitting transactions of the account.
+        """
+
+        return jsonrpc.AsyncAccountSubmitter(client, self.account_address, self.create_signed_txn)
+
     async def submit_and_wait_for_txn(
         self, client: AsyncClient, payload: diem_types.TransactionPayload
     ) -> jsonrpc.Transaction:
@@ -76,7 +76,7 @@ class Endpoints:
         input_data = await req.read()
 
         resp_obj = await self.offchain_api_v2.process(request_id, request_sender_address, input_data)
-        body = self.offchain_api_v2.jws_serialize(resp_obj)
+        body = await self.offchain_api_v2.jws_serialize(resp_obj)
         status = 400 if resp_obj.error is not None else 200
         headers = {offchain.X_REQUEST_ID: request_id}
         return web.Response(body=body, status=status, headers=headers)
@@ -109,6 +109,7 @@ async def web_api(app: App, disable_events_api: bool = False) -> web.Application
     async def on_cleanup(ap: web.Application) -> None:
         ap["worker"].cancel()
         await ap["worker"]
+        await app.offchain.close()
 
     api.on_startup.append(on_startup)
     api.on_cleanup.append(on_cleanup)
@@ -33,9 +33,12 @@ class App:
         self.store = InMemoryStore()
         self.store.create(Account, id=PENDING_INBOUND_ACCOUNT_ID)
         self.diem_client = client
+        self.vasp_domains = jsonrpc.VaspDomainIndex(client, logger=logger)
         self.offchain = offchain.Client(account.account_address, client, account.hrp)
         self.kyc_sample: KycSample = KycSample.gen(name)
-        self.event_puller = EventPuller(client=client, store=self.store, hrp=account.hrp, logger=logger)
+        self.event_puller = EventPuller(
+            client=client, store=self.store, hrp=account.hrp, logger=logger, key_cache=self.offchain.key_cache
+        )
         self.bg_tasks: List[Callable[[], Awaitable[None]]] = []
         self.dual_attestation_txn_senders: Dict[str, Callable[[Transaction], Awaitable[None]]] = {}
 
@@ -289,8 +292,7 @@ class App:
 
     async def _find_diem_id_account_address(self, diem_id: str) -> str:
         domain = identifier.diem_id.get_vasp_identifier_from_diem_id(diem_id)
-        domain_map = await self.diem_client.get_vasp_domain_map()
-        account_address = domain_map.get(domain)
+        account_address = await self.vasp_domains.find(domain)
         if account_address is None:
             raise ValueError("could not find onchain account address by diem id: %s" % diem_id)
         return account_address
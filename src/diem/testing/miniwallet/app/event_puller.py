@@ -2,8 +2,8 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from dataclasses import dataclass, field
-from typing import Dict, Any, AsyncIterator
-from diem import jsonrpc, diem_types, txnmetadata, identifier, utils
+from typing import Dict, Any, AsyncIterator, Optional
+from diem import jsonrpc, diem_types, txnmetadata, identifier, offchain, utils
 from diem.jsonrpc import AsyncClient
 from .store import InMemoryStore, NotFoundError
 from .pending_account import PENDING_INBOUND_ACCOUNT_ID
@@ -19,13 +19,20 @@ class EventPuller:
     hrp: str
     logger: logging.Logger
     state: Dict[str, int] = field(default_factory=dict)
+    key_cache: Optional[offchain.CounterpartyKeyCache] = field(default=None)
 
     async def add_received_events_key(self, address: diem_types.AccountAddress) -> None:
         account = await self.client.must_get_account(address)
         self.state[account.received_events_key] = 0
 
     async def process(self) -> None:
+        if self.key_cache:
+            # follow rotation events of counterparties, so that rotated base url and compliance key are refetched
+            for key in self.key_cache.rotation_event_keys():
+                self.state.setdefault(key, 0)
         async for event in self.pull_events():
+            if self.key_cache:
+                self.key_cache.process_event(event)
             if event.data.type == jsonrpc.EVENT_DATA_RECEIVED_PAYMENT:
                 await self.save_payment_txn(event)
 
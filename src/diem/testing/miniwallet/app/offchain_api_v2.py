@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from dataclasses import asdict
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from diem import offchain, utils
 from diem.offchain import (
     Status,
@@ -17,6 +17,7 @@ from diem.offchain import (
     to_dict,
 )
 from diem.jsonrpc.async_client import Retry
+from diem.jsonrpc.retry import RetryPolicy
 from .store import NotFoundError
 from .models import Account, Subaddress, PaymentCommand, Transaction, ReferenceID
 from .app import App
@@ -25,9 +26,10 @@ import functools
 
 
 class OffChainAPIv2:
-    def __init__(self, app: App) -> None:
+    def __init__(self, app: App, retry: Optional[RetryPolicy] = None) -> None:
         self.app = app
         self.cache: Dict[str, CommandResponseObject] = {}
+        self.retry: RetryPolicy = retry or Retry(5, 0.1, Exception)
 
     async def process(self, request_id: str, sender_address: str, request_bytes: bytes) -> CommandResponseObject:
         try:
@@ -52,8 +54,9 @@ class OffChainAPIv2:
         self.cache[request.cid] = response
         return response
 
-    def jws_serialize(self, resp: CommandResponseObject) -> bytes:
-        return offchain.jws.serialize(resp, self.app.diem_account.sign_by_compliance_key)
+    async def jws_serialize(self, resp: CommandResponseObject) -> bytes:
+        sign = self.app.diem_account.sign_by_compliance_key
+        return await offchain.jws.serialize_async(resp, sign, self.app.offchain.executor)
 
     async def send_dual_attestation_transaction(self, txn: Transaction) -> None:
         try:
@@ -203,8 +206,7 @@ class OffChainAPIv2:
         counterparty service temporarily not available case.
         """
 
-        retry = Retry(5, 0.1, Exception)
-        return await retry.execute(functools.partial(self.send_offchain_command_without_retries, command))
+        return await self.retry.execute_async(functools.partial(self.send_offchain_command_without_retries, command))
 
     async def send_offchain_command_without_retries(self, command: offchain.Command) -> CommandResponseObject:
         return await self.app.offchain.send_command(command, self.app.diem_account.sign_by_compliance_key)
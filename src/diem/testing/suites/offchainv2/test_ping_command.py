@@ -30,16 +30,16 @@ async def test_send_ping_command(
 
     receiver_account = await target_client.create_account()
     receiver_address = await receiver_account.generate_account_identifier()
-    offchain_client = offchain.Client(stub_config.account.account_address, diem_client, hrp)
-    cid = str(uuid.uuid4())
-    resp = await offchain_client.ping(receiver_address, stub_config.account.compliance_key.sign, cid=cid)
-    assert resp.cid == cid
-    assert resp.status == "success"
-    assert resp.error is None
-
-    resp2 = await offchain_client.ping(receiver_address, stub_config.account.compliance_key.sign)
-    assert resp2.cid
-    assert resp2.status == "success"
-    assert resp2.error is None
-
-    assert resp.cid != resp2.cid
+    async with offchain.Client(stub_config.account.account_address, diem_client, hrp) as offchain_client:
+        cid = str(uuid.uuid4())
+        resp = await offchain_client.ping(receiver_address, stub_config.account.compliance_key.sign, cid=cid)
+        assert resp.cid == cid
+        assert resp.status == "success"
+        assert resp.error is None
+
+        resp2 = await offchain_client.ping(receiver_address, stub_config.account.compliance_key.sign)
+        assert resp2.cid
+        assert resp2.status == "success"
+        assert resp2.error is None
+
+        assert resp.cid != resp2.cid
@@ -91,11 +91,11 @@ class Faucet:
         self,
         client: jsonrpc.Client,
         url: typing.Union[str, None] = None,
-        retry: typing.Union[jsonrpc.Retry, None] = None,
+        retry: typing.Union[jsonrpc.RetryPolicy, None] = None,
     ) -> None:
         self._client: jsonrpc.Client = client
         self._url: str = url or FAUCET_URL
-        self._retry: jsonrpc.Retry = retry or jsonrpc.Retry(5, 0.2, Exception)
+        self._retry: jsonrpc.RetryPolicy = retry or jsonrpc.Retry(5, 0.2, Exception)
         self._session: requests.Session = requests.Session()
 
     def gen_account(self, currency_code: str = TEST_CURRENCY_CODE, dd_account: bool = False) -> LocalAccount:
@@ -112,9 +112,14 @@ class Faucet:
         vasp_domain: typing.Optional[str] = None,
         is_remove_domain: bool = False,
     ) -> None:
-        self._retry.execute(
-            lambda: self._mint_without_retry(authkey, amount, currency_code, dd_account, vasp_domain, is_remove_domain)
-        )
+        def fn() -> None:
+            self._mint_without_retry(authkey, amount, currency_code, dd_account, vasp_domain, is_remove_domain)
+
+        # `Retry.execute` may be overridden by subclasses
+        if isinstance(self._retry, jsonrpc.Retry):
+            self._retry.execute(fn)
+        else:
+            self._retry.execute_sync(fn)
 
     def _mint_without_retry(
         self,
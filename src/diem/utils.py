@@ -231,15 +231,10 @@ def shutdown_event_loop(loop: asyncio.events.AbstractEventLoop) -> None:
         loop.close()
 
 
-async def with_retry(coroutine, max_retries=5, delay_secs=0.1, exception=Exception) -> None:  # pyre-ignore
-    tries = 0
-    while tries < max_retries:
-        tries += 1
-        try:
-            return await coroutine()
-        except exception as e:
-            if tries < max_retries:
-                # simplest backoff strategy: tries * delay
-                await asyncio.sleep(delay_secs * tries)
-            else:
-                raise e
+async def with_retry(coroutine, max_retries=5, delay_secs=0.1, exception=Exception, **kwargs) -> None:  # pyre-ignore
+    """Call the coroutine function with retry
+
+    Extra keyword arguments (e.g. `backoff`, `budget`) are passed to `jsonrpc.RetryPolicy`.
+    """
+
+    return await jsonrpc.RetryPolicy(max_retries, delay_secs, exception, **kwargs).execute_async(coroutine)
@@ -8,16 +8,27 @@ import pytest
 
 
 @pytest.fixture
-def factory():
-    return Factory()
+async def factory():
+    factory = Factory()
+    yield factory
+    await factory.close()
 
 
 class Factory:
+    def __init__(self):
+        self.offchain_clients = []
+
+    async def close(self):
+        for client in self.offchain_clients:
+            await client.close()
+
     def hrp(self) -> str:
         return identifier.TDM
 
     def create_offchain_client(self, account, client):
-        return offchain.Client(account.account_address, client, self.hrp())
+        offchain_client = offchain.Client(account.account_address, client, self.hrp())
+        self.offchain_clients.append(offchain_client)
+        return offchain_client
 
     def new_payment_object(self, sender=LocalAccount.generate(), receiver=LocalAccount.generate()):
         amount = 1_000_000_000_000
@@ -0,0 +1,44 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark JSON-RPC response decoders over recorded responses
+
+Usage: python tests/jsonrpc/bench_decoders.py [recorded response json file] [number of iterations]
+
+Defaults to `testdata/get_transactions.json`, the transactions are repeated into a 1000 transactions page.
+"""
+
+from diem import jsonrpc
+from diem.jsonrpc import jsonrpc_pb2 as rpc
+import json, os, sys, timeit
+
+
+def main() -> None:
+    path = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else os.path.join(os.path.dirname(__file__), "testdata", "get_transactions.json")
+    )
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    with open(path) as f:
+        response = json.load(f)
+    result = response["result"]
+    if path.endswith("get_transactions.json"):
+        response["result"] = (result * (1000 // len(result) + 1))[:1000]
+    body = json.dumps(response).encode("utf-8")
+    print("response: %s bytes, %s transactions" % (len(body), len(response["result"])))
+
+    for decoder in [jsonrpc.Decoder(), jsonrpc.FastDecoder(), jsonrpc.LazyDecoder()]:
+        parse = decoder.parse_list(lambda: rpc.Transaction())
+
+        def decode() -> None:
+            # read the fields a history pager usually needs
+            for txn in parse(decoder.loads(body)["result"]):
+                txn.version, txn.hash
+
+        secs = min(timeit.repeat(decode, number=number, repeat=3)) / number
+        print("%s: %.2f ms per response" % (type(decoder).__name__, secs * 1000))
+
+
+if __name__ == "__main__":
+    main()
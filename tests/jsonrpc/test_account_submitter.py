@@ -0,0 +1,140 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import diem_types, jsonrpc, stdlib, utils, testing
+from diem.testing import LocalAccount
+import asyncio, time
+import pytest
+
+
+class FakeChain:
+    def __init__(self) -> None:
+        self.seq = 0
+        self.executed = {}
+        self.mempool = {}
+        self.dropped = set()
+        self.time_offset = 0
+        self.calls = []
+
+    def now(self) -> float:
+        return time.time() + self.time_offset
+
+    def execute(self) -> None:
+        while self.seq in self.mempool:
+            txn = self.mempool.pop(self.seq)
+            if txn.raw_txn.expiration_timestamp_secs < self.now():
+                return
+            self.executed[self.seq] = {
+                "version": len(self.executed) + 1,
+                "hash": utils.transaction_hash(txn),
+                "transaction": {"type": "user", "sequence_number": self.seq},
+                "vm_status": {"type": "executed"},
+            }
+            self.seq += 1
+
+    def handle(self, request):
+        method, params = request["method"], request["params"]
+        self.calls.append(method)
+        error, result = None, None
+        if method == "get_account":
+            result = {"address": params[0], "sequence_number": self.seq}
+        elif method == "submit":
+            txn = diem_types.SignedTransaction.bcs_deserialize(bytes.fromhex(params[0]))
+            seq = txn.raw_txn.sequence_number
+            if seq < self.seq:
+                error = {"code": -32001, "message": "Server error: VM Validation error: SEQUENCE_NUMBER_TOO_OLD"}
+            elif seq not in self.dropped:
+                self.mempool[seq] = txn
+                self.execute()
+        elif method == "get_account_transaction":
+            result = self.executed.get(params[1])
+        response = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "diem_chain_id": 2,
+            "diem_ledger_version": len(self.executed),
+            "diem_ledger_timestampusec": int(self.now() * 1_000_000),
+        }
+        if error:
+            response["error"] = error
+        else:
+            response["result"] = result
+        return response
+
+
+def payload(i: int) -> diem_types.TransactionPayload:
+    return stdlib.encode_peer_to_peer_with_metadata_script_function(
+        currency=utils.currency_code(testing.XUS),
+        payee=utils.account_address("00" * 16),
+        amount=i,
+        metadata=b"",
+        metadata_signature=b"",
+    )
+
+
+@pytest.fixture
+async def client_and_chain():
+    chain = FakeChain()
+    async with jsonrpc.AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            response = chain.handle(request)
+            client.update_last_known_state(
+                response["diem_chain_id"], response["diem_ledger_version"], response["diem_ledger_timestampusec"]
+            )
+            return response
+
+        client._send_http_request = send_request
+        yield client, chain
+
+
+@pytest.mark.asyncio
+async def test_submit_many_transactions_concurrently(client_and_chain):
+    client, chain = client_and_chain
+    submitter = LocalAccount.generate().submitter(client)
+    txns = await asyncio.gather(*[submitter.submit_and_wait(payload(i)) for i in range(20)])
+
+    assert sorted(txn.transaction.sequence_number for txn in txns) == list(range(20))
+    assert chain.calls.count("get_account") == 1
+    assert submitter.stats.executed == 20
+    assert submitter.stats.submitted == 20
+    assert submitter.in_flight == 0
+    assert submitter.stats.throughput() == 20 / jsonrpc.account_submitter.DEFAULT_THROUGHPUT_WINDOW_SECS
+
+
+@pytest.mark.asyncio
+async def test_resync_on_sequence_number_too_old(client_and_chain):
+    client, chain = client_and_chain
+    submitter = LocalAccount.generate().submitter(client)
+    await submitter.submit_and_wait(payload(0))
+    # transactions submitted by other process
+    chain.seq += 3
+
+    txn = await submitter.submit_and_wait(payload(1))
+    assert txn.transaction.sequence_number == 4
+    assert submitter.stats.resyncs == 1
+    assert submitter.stats.resubmitted == 1
+
+
+@pytest.mark.asyncio
+async def test_fill_gaps_of_expired_transactions(client_and_chain):
+    client, chain = client_and_chain
+    account = LocalAccount.generate()
+    submitter = account.submitter(client)
+    chain.dropped.add(2)
+    for i in range(5):
+        await submitter.submit(payload(i))
+    assert chain.seq == 2
+    assert submitter.in_flight == 5
+
+    chain.time_offset = 100
+    account.txn_expire_duration_secs = 200
+    await submitter.resync()
+    assert submitter.stats.gaps_detected == 3
+    assert submitter.in_flight == 0
+
+    chain.dropped.clear()
+    txns = await asyncio.gather(*[submitter.submit_and_wait(payload(i)) for i in range(4)])
+    assert sorted(txn.transaction.sequence_number for txn in txns) == [2, 3, 4, 5]
+    assert chain.seq == 6
@@ -16,7 +16,7 @@ from diem.jsonrpc import AsyncClient
 from diem.testing import LocalAccount, Faucet, create_client, XUS, DD_ADDRESS
 from typing import AsyncGenerator
 
-import time, aiohttp, asyncio
+import time, aiohttp, asyncio, gc
 import pytest
 
 
@@ -481,3 +481,102 @@ def create_transaction(
         expiration_timestamp_secs=int(time.time()) + 30,
         chain_id=chain_ids.TESTNET,
     )
+
+
+async def test_iter_events_prefetch_pages_and_yields_events_in_order():
+    async with AsyncClient("url") as client:
+        stream = gen_event_stream(client, 25)
+        events = [e async for e in client.iter_events("key", 3, page_size=5, prefetch=3)]
+        assert [e.sequence_number for e in events] == list(range(3, 25))
+        assert stream.max_in_flight == 3
+
+        events = [e async for e in client.iter_events("key", 20, page_size=5)]
+        assert [e.sequence_number for e in events] == list(range(20, 25))
+
+        events = [e async for e in client.iter_events("key", 30, page_size=5)]
+        assert events == []
+
+
+async def test_iter_events_follow_new_events():
+    async with AsyncClient("url") as client:
+        stream = gen_event_stream(client, 3)
+        events = []
+        async for event in client.iter_events("key", page_size=2, follow=True, poll_interval_secs=0.01):
+            events.append(event.sequence_number)
+            if len(events) == 3:
+                stream.size = 6
+            if len(events) == 6:
+                break
+        assert events == list(range(6))
+
+
+async def test_iter_events_retrieves_results_of_abandoned_prefetch_requests():
+    errors = []
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+    async with AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            _, start, limit = request["params"]
+            if start > 0:
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    # transports may turn the cancellation into a connection error
+                    raise ValueError("failed to get events from %s" % start)
+            return {"jsonrpc": "2.0", "id": 1, "result": [{"key": "key", "sequence_number": i} for i in range(limit)]}
+
+        client._send_http_request = send_request
+        events = client.iter_events("key", 0, page_size=2, prefetch=3)
+        assert (await events.__anext__()).sequence_number == 0
+        await events.aclose()
+
+    del events
+    gc.collect()
+    await asyncio.sleep(0.01)
+    loop.set_exception_handler(None)
+    assert errors == []
+
+
+def gen_event_stream(client, size):
+    class Stream:
+        def __init__(self):
+            self.size = size
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+        async def send_request(self, url, request, ignore_stale_response):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            _, start, limit = request["params"]
+            result = [{"key": "key", "sequence_number": i} for i in range(start, min(start + limit, self.size))]
+            return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+    stream = Stream()
+    client._send_http_request = stream.send_request
+    return stream
+
+
+async def test_get_accounts():
+    in_flight, max_in_flight, requested = 0, 0, []
+    async with AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            nonlocal in_flight, max_in_flight
+            address = request["params"][0]
+            requested.append(address)
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            result = {"address": address} if address != "00" * 16 else None
+            return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+        client._send_http_request = send_request
+        addresses = ["%032x" % (i % 7) for i in range(20)]
+        accounts = await client.get_accounts(addresses, concurrency=3)
+        assert [a.address if a else None for a in accounts] == [None if i % 7 == 0 else addresses[i] for i in range(20)]
+        assert sorted(requested) == sorted(set(addresses))
+        assert max_in_flight == 3
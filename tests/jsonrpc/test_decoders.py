@@ -0,0 +1,103 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc
+from diem.jsonrpc import jsonrpc_pb2 as rpc
+import google.protobuf.json_format as parser
+import json, os
+import pytest
+
+
+def load_response(name):
+    with open(os.path.join(os.path.dirname(__file__), "testdata", name)) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("decoder", [jsonrpc.Decoder(), jsonrpc.FastDecoder()])
+def test_parse_transactions(decoder):
+    result = load_response("get_transactions.json")["result"]
+    expected = [parser.ParseDict(txn, rpc.Transaction()) for txn in result]
+
+    assert decoder.parse_list(lambda: rpc.Transaction())(result) == expected
+    assert decoder.parse_list(lambda: rpc.Transaction())([]) == []
+    assert decoder.parse_obj(lambda: rpc.Transaction())(result[1]) == expected[1]
+    assert decoder.parse_obj(lambda: rpc.Transaction())(None) is None
+
+
+def test_fast_decoder_ignores_unknown_fields_and_null_values():
+    decoder = jsonrpc.FastDecoder()
+    metadata = decoder.parse(
+        {"version": 1, "unknown": [1], "chain_id": None, "dual_attestation_limit": 3}, rpc.Metadata()
+    )
+    assert metadata == rpc.Metadata(version=1, dual_attestation_limit=3)
+
+    account = decoder.parse({"role": {}}, rpc.Account())
+    assert account.HasField("role")
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        {"version": "abc"},
+        {"version": -1},
+        {"version": True},
+        {"version": []},
+        {"script_hash_allow_list": "abc"},
+        {"module_publishing_allowed": "true"},
+        {"accumulator_root_hash": 1},
+    ],
+)
+def test_fast_decoder_raises_parse_error_for_invalid_result(result):
+    with pytest.raises(parser.ParseError):
+        jsonrpc.FastDecoder().parse(result, rpc.Metadata())
+    with pytest.raises(parser.ParseError):
+        jsonrpc.Decoder().parse(result, rpc.Metadata())
+
+
+@pytest.mark.asyncio
+async def test_select_decoder_per_client():
+    response = load_response("get_transactions.json")
+    async with jsonrpc.AsyncClient("url", decoder=jsonrpc.FastDecoder()) as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            return response
+
+        client._send_http_request = send_request
+        txns = await client.get_transactions(3062800, 3, True)
+        assert [txn.version for txn in txns] == [3062800, 3062801, 3062802]
+        assert txns[1].events[1].data.amount.amount == 1000000
+
+        response = {"jsonrpc": "2.0", "id": 1, "result": {"version": "invalid"}}
+        with pytest.raises(jsonrpc.InvalidServerResponse):
+            await client.get_metadata()
+
+
+def test_lazy_decoder():
+    result = load_response("get_transactions.json")["result"]
+    expected = [parser.ParseDict(txn, rpc.Transaction()) for txn in result]
+    txns = jsonrpc.LazyDecoder().parse_list(lambda: rpc.Transaction())(result)
+
+    assert [txn.version for txn in txns] == [txn.version for txn in expected]
+    assert [txn.hash for txn in txns] == [txn.hash for txn in expected]
+    assert txns[1].events[1].data.amount.amount == expected[1].events[1].data.amount.amount
+    assert txns[1].vm_status.type == "executed"
+    assert txns[1].events is txns[1].events
+    assert txns[0].transaction.HasField("script") == expected[0].transaction.HasField("script")
+    assert [txn.materialize() for txn in txns] == expected
+    assert txns == expected
+
+    empty = jsonrpc.LazyDecoder().parse_obj(lambda: rpc.Account())({"role": None, "version": 1})
+    assert empty.sequence_number == 0
+    assert empty.role.type == ""
+    assert empty.balances == []
+    assert not empty.HasField("role")
+    with pytest.raises(AttributeError):
+        empty.unknown
+
+
+def test_lazy_decoder_raises_parse_error_on_access():
+    metadata = jsonrpc.LazyDecoder().parse_obj(lambda: rpc.Metadata())({"version": "abc", "chain_id": 2})
+    assert metadata.chain_id == 2
+    with pytest.raises(parser.ParseError):
+        metadata.version
@@ -0,0 +1,107 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json, requests, socket, threading, time
+import pytest
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(0.02)
+        response = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "result": {"version": 1},
+            "diem_chain_id": 2,
+            "diem_ledger_version": 1,
+            "diem_ledger_timestampusec": 1,
+        }
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%s" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_pool_metrics(server_url):
+    client = jsonrpc.Client(server_url, pool=jsonrpc.HTTPPoolConfig(pool_maxsize=2))
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda _: client.get_metadata(), range(8)))
+
+    metrics = client.pool_metrics()
+    assert list(metrics.keys()) == [server_url[len("http://") :]]
+    m = metrics[server_url[len("http://") :]]
+    assert m.maxsize == 2
+    assert m.requests == 8
+    assert m.in_use == 0
+    assert m.peak_in_use > 2
+    assert m.pool_full > 0
+    assert m.idle == 2
+
+
+def test_connection_is_in_use_until_response_is_read_or_closed(server_url):
+    session = jsonrpc.HTTPPoolConfig(pool_maxsize=2).session()
+    adapter = session.get_adapter(server_url)
+    host = server_url[len("http://") :]
+
+    resp = session.post(server_url, json={}, stream=True)
+    assert adapter.metrics()[host].in_use == 1
+    assert adapter.metrics()[host].idle == 0
+    resp.json()
+    assert adapter.metrics()[host].in_use == 0
+    assert adapter.metrics()[host].idle == 1
+
+    resp = session.post(server_url, json={}, stream=True)
+    assert adapter.metrics()[host].in_use == 1
+    resp.close()
+    resp.close()
+    assert adapter.metrics()[host].in_use == 0
+
+    session.post(server_url, json={}).json()
+    assert adapter.metrics()[host].in_use == 0
+    assert adapter.metrics()[host].requests == 3
+
+
+def test_pool_size_from_request_with_backups_executor(server_url):
+    executor = ThreadPoolExecutor(16)
+    client = jsonrpc.Client(server_url, rs=jsonrpc.RequestWithBackups(backups=[server_url], executor=executor))
+    adapter = client._session.get_adapter(server_url)
+    assert isinstance(adapter, jsonrpc.PooledHTTPAdapter)
+    assert adapter.pool_maxsize == 16
+    assert client.get_metadata().version == 1
+    executor.shutdown()
+
+
+def test_socket_options():
+    options = jsonrpc.HTTPPoolConfig().socket_options()
+    assert (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) in options
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options
+    assert jsonrpc.HTTPPoolConfig(keep_alive=False, tcp_nodelay=False).socket_options() == []
+
+
+def test_given_session_is_not_changed_without_pool_config():
+    session = jsonrpc.HTTPPoolConfig().session()
+    client = jsonrpc.Client("http://localhost", session=session)
+    assert client._session is session
+    assert jsonrpc.Client("http://localhost", session=requests.Session()).pool_metrics() == {}
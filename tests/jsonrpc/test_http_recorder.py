@@ -0,0 +1,165 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import identifier, jsonrpc, offchain
+from diem.testing import Faucet, Fullnode, LocalAccount, XUS
+from aiohttp import web
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json, os, threading, time
+import pytest
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    version = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(0.05)
+        Handler.version += 1
+        response = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "result": {"version": Handler.version, "timestamp": Handler.version, "chain_id": 2},
+            "diem_chain_id": 2,
+            "diem_ledger_version": Handler.version,
+            "diem_ledger_timestampusec": Handler.version,
+        }
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%s" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_record_and_replay_sync_client(server_url, tmp_path):
+    path = os.path.join(tmp_path, "traffic.jsonl.gz")
+    with jsonrpc.Recorder(path) as recorder:
+        client = jsonrpc.Client(server_url, session=recorder.session())
+        recorded = [client.get_metadata().version for _ in range(2)]
+        assert client.get_metadata(1).version == 3
+    assert recorder.count == 3
+
+    replay = jsonrpc.Replay.load(path)
+    (exchange, *_) = replay.exchanges.values()
+    assert exchange[0].status == 200
+    assert exchange[0].elapsed >= 0.05
+
+    client = jsonrpc.Client(server_url, session=replay.session())
+    start = time.perf_counter()
+    assert [client.get_metadata().version for _ in range(2)] == recorded
+    assert client.get_metadata(1).version == 3
+    assert time.perf_counter() - start >= 0.15
+    with pytest.raises(jsonrpc.ReplayMissError):
+        client.get_metadata()
+
+    client = jsonrpc.Client(server_url, session=jsonrpc.Replay.load(path, time_scale=0, repeat=True).session())
+    start = time.perf_counter()
+    assert [client.get_metadata(1).version for _ in range(3)] == [3, 3, 3]
+    assert time.perf_counter() - start < 0.05
+
+
+@pytest.mark.asyncio
+async def test_record_and_replay_async_client_and_faucet(tmp_path):
+    path = os.path.join(tmp_path, "traffic.jsonl.gz")
+    account = LocalAccount.from_private_key_hex("11" * 32)
+
+    async def run(client: jsonrpc.AsyncClient, faucet_url: str) -> jsonrpc.Account:
+        await Faucet(client, faucet_url).mint(account.auth_key.hex(), 100, XUS)
+        return await client.must_get_account(account.account_address)
+
+    async with Fullnode() as fullnode:
+        with jsonrpc.Recorder(path) as recorder:
+            async with fullnode.create_client(session_factory=recorder.session_factory()) as client:
+                recorded = await run(client, fullnode.faucet_url)
+        json_rpc_url, faucet_url = fullnode.json_rpc_url, fullnode.faucet_url
+
+    replay = jsonrpc.Replay.load(path, time_scale=0)
+    assert any(key.startswith(f"POST {faucet_url}?") for key in replay.exchanges)
+    async with jsonrpc.AsyncClient(json_rpc_url, session_factory=replay.session_factory()) as client:
+        assert await run(client, faucet_url) == recorded
+        with pytest.raises(jsonrpc.ReplayMissError):
+            await client.get_account(LocalAccount.generate().account_address)
+
+
+def test_default_matcher_ignores_non_deterministic_request_bodies():
+    def rpc(method, params):
+        return json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}).encode()
+
+    key = jsonrpc.http_recorder.request_key
+    assert key("post", "url", rpc("get_account", ["a"])) != key("post", "url", rpc("get_account", ["b"]))
+    assert key("post", "url", rpc("submit", ["txn1"])) == key("post", "url", rpc("submit", ["txn2"]))
+    assert key("post", "url", b"jws.one") == key("POST", "url", b"jws.two") == "POST url"
+    assert jsonrpc.http_recorder.ordered_key("post", "url", rpc("get_account", ["a"])) == "POST url"
+
+    exchanges = [jsonrpc.Exchange("POST", "url", rpc("get_account", [str(i)]), 200, b"%d" % i) for i in range(2)]
+    replay = jsonrpc.Replay(exchanges, matcher=jsonrpc.http_recorder.ordered_key)
+    assert [replay.find("POST", "url", rpc("get_account", ["x"])).response_body for _ in range(2)] == [b"0", b"1"]
+    with pytest.raises(jsonrpc.ReplayMissError):
+        replay.find("POST", "url", b"")
+
+
+@pytest.mark.asyncio
+async def test_record_and_replay_offchain_requests(tmp_path):
+    path = os.path.join(tmp_path, "traffic.jsonl.gz")
+
+    async with Fullnode() as fullnode:
+        async with fullnode.create_client() as client:
+            faucet = fullnode.create_faucet(client)
+            sender, _ = await faucet.gen_vasp()
+            receiver, _ = await faucet.gen_vasp()
+            receiver_client = offchain.Client(receiver.account_address, client, identifier.TDM)
+
+            async def handle(request: web.Request) -> web.Response:
+                sender_address = request.headers[offchain.http_header.X_REQUEST_SENDER_ADDRESS]
+                cmd = await receiver_client.deserialize_inbound_request(sender_address, await request.read())
+                resp = offchain.reply_request(cid=cmd.cid)
+                return web.Response(body=offchain.jws.serialize(resp, receiver.compliance_key.sign))
+
+            app = web.Application()
+            app.router.add_post("/v2/command", handle)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            base_url = "http://127.0.0.1:%s" % site._server.sockets[0].getsockname()[1]
+            await sender.rotate_dual_attestation_info(client, base_url)
+            await receiver.rotate_dual_attestation_info(client, base_url)
+
+            async def ping(session_factory) -> offchain.CommandResponseObject:
+                async with fullnode.create_client(session_factory=session_factory) as jsonrpc_client:
+                    sender_client = offchain.Client(
+                        sender.account_address, jsonrpc_client, identifier.TDM, session_factory=session_factory
+                    )
+                    try:
+                        receiver_id = sender_client.account_id(receiver.account_address)
+                        return await sender_client.ping(receiver_id, sender.compliance_key.sign)
+                    finally:
+                        await sender_client.close()
+
+            try:
+                with jsonrpc.Recorder(path) as recorder:
+                    recorded = await ping(recorder.session_factory())
+            finally:
+                await runner.cleanup()
+
+            replay = jsonrpc.Replay.load(path, time_scale=0)
+            assert f"POST {base_url}/v2/command" in replay.exchanges
+            assert await ping(replay.session_factory()) == recorded
+            with pytest.raises(jsonrpc.ReplayMissError):
+                await ping(replay.session_factory())
@@ -0,0 +1,122 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc
+import os
+import pytest
+
+
+EVENT_KEY = "00000000000000000000000000000000000000000a550c18"
+
+
+def handle(calls, request):
+    method, params = request["method"], request["params"]
+    calls.append(params)
+    if method == "get_transactions":
+        start, limit, include_events = params
+        events = [{"key": EVENT_KEY, "sequence_number": 1}] if include_events else []
+        result = [{"version": v, "hash": "h%s" % v, "events": events} for v in range(start, min(start + limit, 100))]
+    else:
+        _, start, limit = params
+        result = [{"key": EVENT_KEY, "sequence_number": s} for s in range(start, min(start + limit, 20))]
+    return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+
+def test_cache_transactions_and_events(tmp_path):
+    calls = []
+    client = jsonrpc.Client("url", cache=jsonrpc.LedgerCache(str(tmp_path)))
+    client._send_http_request = lambda url, request, ignore_stale_response: handle(calls, request)
+
+    assert [t.version for t in client.get_transactions(10, 5)] == list(range(10, 15))
+    assert [t.version for t in client.get_transactions(11, 3)] == list(range(11, 14))
+    assert len(calls) == 1
+    assert client.get_transactions(11, 3)[0].hash == "h11"
+
+    # cached transactions have no events
+    assert len(client.get_transactions(11, 3, True)[0].events) == 1
+    assert len(calls) == 2
+    assert len(client.get_transactions(12, 2, True)[1].events) == 1
+    assert len(client.get_transactions(12, 2)[1].events) == 0
+    assert len(calls) == 2
+
+    # partially covered
+    assert [t.version for t in client.get_transactions(13, 4)] == list(range(13, 17))
+    assert len(calls) == 3
+    # end of ledger
+    assert [t.version for t in client.get_transactions(98, 5)] == [98, 99]
+    assert [t.version for t in client.get_transactions(98, 5)] == [98, 99]
+    assert len(calls) == 5
+
+    assert [e.sequence_number for e in client.get_events(EVENT_KEY, 3, 4)] == [3, 4, 5, 6]
+    assert [e.sequence_number for e in client.get_events(EVENT_KEY, 4, 2)] == [4, 5]
+    assert len(calls) == 6
+
+
+@pytest.mark.asyncio
+async def test_async_client_reopen_cache(tmp_path):
+    calls = []
+    cache = jsonrpc.LedgerCache(str(tmp_path))
+    async with jsonrpc.AsyncClient("url", cache=cache) as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            return handle(calls, request)
+
+        client._send_http_request = send_request
+        await client.get_transactions(0, 10, True)
+        await client.get_events(EVENT_KEY, 0, 10)
+    cache.close()
+
+    # simulate crash: incomplete index record
+    with open(os.path.join(tmp_path, "transactions.idx"), "ab") as f:
+        f.write(b"\x01\x02")
+
+    cache = jsonrpc.LedgerCache(str(tmp_path))
+    async with jsonrpc.AsyncClient("url", cache=cache) as client:
+        client._send_http_request = send_request
+        txns = await client.get_transactions(0, 10, True)
+        assert [t.version for t in txns] == list(range(10))
+        assert txns[9].events[0].key == EVENT_KEY
+        assert len(await client.get_events(EVENT_KEY, 0, 10)) == 10
+        assert len(calls) == 2
+        await client.get_transactions(10, 1)
+        assert len(calls) == 3
+    cache.close()
+
+    cache = jsonrpc.LedgerCache(str(tmp_path))
+    assert cache.get_transactions(0, 11, False) is not None
+    cache.close()
+
+
+def test_invalid_cached_results_are_fetched_from_server(tmp_path):
+    calls = []
+    cache = jsonrpc.LedgerCache(str(tmp_path))
+    client = jsonrpc.Client("url", cache=cache)
+    client._send_http_request = lambda url, request, ignore_stale_response: handle(calls, request)
+
+    cache.put_transactions([{"version": 0, "hash": 0}], include_events=False)
+    assert client.get_transactions(0, 1)[0].hash == "h0"
+    assert client.get_transactions(0, 1)[0].hash == "h0"
+    assert len(calls) == 1
+
+    client.get_events(EVENT_KEY, 0, 2)
+    assert len(calls) == 2
+    cache.close()
+
+    data_path = os.path.join(tmp_path, "events.dat")
+    size = os.path.getsize(data_path)
+    with open(data_path, "r+b") as f:
+        f.write(b"\xff" * size)
+
+    cache = jsonrpc.LedgerCache(str(tmp_path))
+    client = jsonrpc.Client("url", cache=cache)
+    client._send_http_request = lambda url, request, ignore_stale_response: handle(calls, request)
+    assert [e.sequence_number for e in client.get_events(EVENT_KEY, 0, 2)] == [0, 1]
+    assert len(calls) == 3
+    cache.close()
+
+    # records fetched again override the invalid ones
+    cache = jsonrpc.LedgerCache(str(tmp_path))
+    assert [e["sequence_number"] for e in cache.get_events(EVENT_KEY, 0, 2)] == [0, 1]
+    assert cache.get_transactions(0, 1, False)[0]["hash"] == "h0"
+    cache.close()
@@ -0,0 +1,95 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc
+import asyncio, os
+import pytest
+
+
+class FakeLedger:
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.calls = []
+
+    def handle(self, request):
+        method, params = request["method"], request["params"]
+        self.calls.append(method)
+        if method == "get_metadata":
+            result = {"version": self.size - 1}
+        else:
+            start, limit, _ = params
+            result = [{"version": v} for v in range(start, min(start + limit, self.size))]
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+
+@pytest.fixture
+async def client_and_ledger():
+    ledger = FakeLedger(25)
+    async with jsonrpc.AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            return ledger.handle(request)
+
+        client._send_http_request = send_request
+        yield client, ledger
+
+
+@pytest.mark.asyncio
+async def test_tail_and_resume_from_checkpoint(client_and_ledger, tmp_path):
+    client, ledger = client_and_ledger
+    store = jsonrpc.FileCheckpointStore(os.path.join(tmp_path, "checkpoint.json"))
+    tailer = jsonrpc.LedgerTailer(client, 3, store, page_size=4, checkpoint_interval=5, min_poll_interval_secs=0.01)
+
+    versions = []
+    async for txn in tailer:
+        versions.append(txn.version)
+        if txn.version == 9:
+            ledger.size = 30
+        if txn.version == 29:
+            tailer.stop()
+    assert versions == list(range(3, 30))
+    assert await store.load() == 29
+
+    ledger.size = 40
+    tailer = jsonrpc.LedgerTailer(client, 0, store, page_size=4)
+    versions = []
+    async for txn in tailer:
+        versions.append(txn.version)
+        if txn.version == 35:
+            break
+    await tailer.aclose()
+    assert versions == list(range(30, 36))
+    # the transaction yielded last is not processed until consumer asks for next one
+    assert await store.load() == 34
+    assert tailer.lag == 5
+
+
+@pytest.mark.asyncio
+async def test_adaptive_polling(client_and_ledger):
+    client, ledger = client_and_ledger
+    tailer = jsonrpc.LedgerTailer(client, 25, min_poll_interval_secs=0.01, max_poll_interval_secs=0.04)
+
+    async def consume():
+        return [txn.version async for txn in tailer]
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.3)
+    # polling interval backs off to max interval: 0.01, 0.02, 0.04, 0.04...
+    assert 5 <= ledger.calls.count("get_metadata") <= 10
+    ledger.size = 28
+    await asyncio.sleep(0.1)
+    tailer.stop()
+    assert await asyncio.wait_for(task, 1) == [25, 26, 27]
+
+
+@pytest.mark.asyncio
+async def test_backpressure(client_and_ledger):
+    client, ledger = client_and_ledger
+    ledger.size = 1000
+    tailer = jsonrpc.LedgerTailer(client, 0, page_size=10, concurrency=3)
+    async for txn in tailer:
+        await asyncio.sleep(0.05)
+        break
+    # at most `concurrency` pages are fetched ahead of the consumer
+    assert ledger.calls.count("get_transactions") <= 3
@@ -0,0 +1,93 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json, threading
+import pytest
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    versions = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        version = self.versions.pop(0)
+        response = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "result": {"version": version},
+            "diem_chain_id": 2,
+            "diem_ledger_version": version,
+            "diem_ledger_timestampusec": version,
+        }
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%s" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_metrics(server_url):
+    metrics = jsonrpc.InMemoryMetrics()
+    client = jsonrpc.Client(server_url, retry=jsonrpc.RetryPolicy(3, 0, jsonrpc.StaleResponseError), metrics=metrics)
+    Handler.versions = [10, 9, 11]
+    assert client.get_metadata().version == 10
+    assert client.get_metadata().version == 11
+
+    snapshot = metrics.snapshot()["get_metadata"]
+    assert snapshot["retries"] == {"StaleResponseError": 1}
+    assert snapshot["stale_responses"] == 1
+    assert snapshot["in_flight"] == 0
+    assert snapshot["response_size"]["count"] == 3
+    assert snapshot["latency"]["total"]["count"] == 2
+    assert snapshot["latency"]["send"]["count"] == 3
+    assert snapshot["latency"]["receive"]["count"] == 3
+    assert snapshot["latency"]["decode"]["count"] == 3
+    assert snapshot["latency"]["parse"]["count"] == 2
+    assert json.loads(json.dumps(metrics.snapshot())) == metrics.snapshot()
+
+    text = metrics.prometheus_text()
+    assert 'diem_jsonrpc_retries_total{method="get_metadata",error="StaleResponseError"} 1' in text
+    assert 'diem_jsonrpc_stale_responses_total{method="get_metadata"} 1' in text
+    assert 'diem_jsonrpc_latency_seconds_count{method="get_metadata",phase="total"} 2' in text
+    assert 'diem_jsonrpc_latency_seconds_bucket{method="get_metadata",phase="parse",le="+Inf"} 2' in text
+    assert 'diem_jsonrpc_in_flight_requests{method="get_metadata"} 0' in text
+
+
+@pytest.mark.asyncio
+async def test_async_client_metrics(server_url):
+    metrics = jsonrpc.InMemoryMetrics()
+    Handler.versions = [5, 6]
+    async with jsonrpc.AsyncClient(server_url, metrics=metrics) as client:
+        await client.get_metadata()
+        await client.get_metadata()
+
+    snapshot = metrics.snapshot()["get_metadata"]
+    assert snapshot["retries"] == {}
+    assert snapshot["stale_responses"] == 0
+    for phase in ["send", "receive", "decode", "parse", "total"]:
+        assert snapshot["latency"][phase]["count"] == 2
+
+
+def test_histogram():
+    histogram = jsonrpc.Histogram([1, 10])
+    for value in [0.5, 1, 5, 20]:
+        histogram.observe(value)
+    assert histogram.to_dict() == {"buckets": {"1": 2, "10": 3, "+Inf": 4}, "sum": 26.5, "count": 4}
@@ -0,0 +1,80 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc
+from concurrent.futures import ThreadPoolExecutor
+import asyncio, time
+import pytest
+
+
+def test_no_limit_configured():
+    limiter = jsonrpc.RateLimiter()
+    start = time.monotonic()
+    for _ in range(100):
+        limiter.acquire("url", "get_metadata")
+        limiter.acquire("url", "submit")
+    assert time.monotonic() - start < 0.1
+    assert limiter.queue_depth() == 0
+
+
+def test_limit_requests_rate_with_burst():
+    limiter = jsonrpc.RateLimiter(read=jsonrpc.RateLimit(rate=20, burst=5))
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire("url", "get_metadata")
+    assert time.monotonic() - start < 0.05
+
+    for _ in range(4):
+        limiter.acquire("url", "get_metadata")
+    assert time.monotonic() - start >= 0.15
+
+
+def test_limits_per_endpoint_and_method_class():
+    limiter = jsonrpc.RateLimiter(
+        read=jsonrpc.RateLimit(rate=1000),
+        submit=jsonrpc.RateLimit(rate=5),
+        endpoints={"backup": {jsonrpc.METHOD_CLASS_READ: jsonrpc.RateLimit(rate=5)}},
+    )
+    start = time.monotonic()
+    for _ in range(10):
+        limiter.acquire("primary", "get_events")
+    assert time.monotonic() - start < 0.1
+
+    start = time.monotonic()
+    for _ in range(2):
+        limiter.acquire("primary", "submit")
+        limiter.acquire("backup", "get_events")
+    assert time.monotonic() - start >= 0.19
+
+
+def test_queue_requests_in_arrival_order_across_threads():
+    limiter = jsonrpc.RateLimiter(read=jsonrpc.RateLimit(rate=50))
+    released = []
+
+    def acquire(i: int) -> None:
+        limiter.acquire("url", "get_metadata")
+        released.append(i)
+
+    with ThreadPoolExecutor(10) as executor:
+        for i in range(10):
+            executor.submit(acquire, i)
+            time.sleep(0.001)
+        time.sleep(0.05)
+        assert limiter.queue_depth("url", jsonrpc.METHOD_CLASS_READ) > 0
+        assert limiter.queue_depth("url", jsonrpc.METHOD_CLASS_SUBMIT) == 0
+    assert released == list(range(10))
+    assert limiter.queue_depths() == {("url", jsonrpc.METHOD_CLASS_READ): 0}
+
+
+@pytest.mark.asyncio
+async def test_async_client_rate_limit():
+    limiter = jsonrpc.RateLimiter(read=jsonrpc.RateLimit(rate=20))
+    async with jsonrpc.AsyncClient("url", rate_limiter=limiter) as client:
+        start = time.monotonic()
+        tasks = [asyncio.create_task(client.get_currencies()) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        assert limiter.queue_depth() == 4
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert time.monotonic() - start >= 0.19
+        assert limiter.queue_depth() == 0
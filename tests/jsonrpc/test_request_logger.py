@@ -0,0 +1,69 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc
+from datetime import timedelta
+import json, logging, requests
+
+
+def test_lazy_body_truncates():
+    assert str(jsonrpc.LazyBody(b"abc", 5)) == "abc"
+    assert str(jsonrpc.LazyBody(b"abcdefgh", 5)) == "abcde...(truncated, 8 total)"
+    assert str(jsonrpc.LazyBody({"a": 1}, 100)) == '{"a": 1}'
+    assert str(jsonrpc.LazyBody("abcdef", 3)) == "abc...(truncated, 6 total)"
+
+
+def test_sample():
+    logger = logging.getLogger("test_sample")
+    logger.setLevel(logging.INFO)
+    assert not jsonrpc.RequestLogger(logger).sample("get_metadata")
+
+    request_logger = jsonrpc.RequestLogger(
+        logger, level=logging.INFO, sample_rate=0, method_sample_rates={"submit": 1, "get_events": 0.5}
+    )
+    assert not request_logger.sample("get_metadata")
+    assert request_logger.sample("submit")
+    sampled = [request_logger.sample("get_events") for _ in range(1000)]
+    assert 300 < sampled.count(True) < 700
+
+
+def test_client_logs_sampled_requests(caplog):
+    logger = logging.getLogger("test_client_logs_sampled_requests")
+    request_logger = jsonrpc.RequestLogger(logger, level=logging.INFO, max_body_size=50)
+    client = jsonrpc.Client("http://localhost", request_logger=request_logger)
+    result = [{"version": i, "hash": "00" * 32} for i in range(10)]
+    body = json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "result": result,
+            "diem_chain_id": 2,
+            "diem_ledger_version": 10,
+            "diem_ledger_timestampusec": 10,
+        }
+    ).encode()
+
+    def post(url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.elapsed = timedelta(seconds=0.01)
+        response._content = body
+        return response
+
+    client._session.post = post
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        assert len(client.get_transactions(0, 10)) == 10
+
+    request, response = caplog.records
+    assert request.jsonrpc == {"url": "http://localhost", "method": "get_transactions"}
+    assert request.getMessage().startswith('jsonrpc request get_transactions: {"jsonrpc": "2.0", "id": 1')
+    assert request.getMessage().endswith("...(truncated, 83 total)")
+    assert response.jsonrpc["status"] == 200
+    assert response.jsonrpc["size"] > 50
+    assert response.getMessage().endswith("...(truncated, %s total)" % len(body))
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger=logger.name):
+        client.get_transactions(0, 10)
+    assert caplog.records == []
@@ -0,0 +1,170 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc, utils
+from diem.jsonrpc import async_client
+from diem.jsonrpc.retry import retry_after_secs
+from email.utils import formatdate
+import aiohttp, requests, time
+import pytest
+
+
+def test_exponential_backoff():
+    backoff = jsonrpc.ExponentialBackoff(base_secs=0.1, max_secs=1, jitter=False)
+    assert [backoff.delay(i) for i in range(1, 6)] == [0.1, 0.2, 0.4, 0.8, 1]
+    assert backoff.delay(10000) == 1
+
+    backoff = jsonrpc.ExponentialBackoff(base_secs=0.1, max_secs=1)
+    for i in range(1, 10):
+        assert 0 <= backoff.delay(i) <= min(1, 0.1 * 2 ** (i - 1))
+
+
+def test_retry_budget():
+    budget = jsonrpc.RetryBudget(ratio=0.5, min_tokens=1, max_tokens=2)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
+
+
+def test_retry_after_secs():
+    assert retry_after_secs(ValueError()) is None
+
+    err = aiohttp.ClientResponseError(None, (), status=429, headers={"Retry-After": "3"})
+    assert retry_after_secs(err) == 3
+
+    response = requests.Response()
+    response.headers["Retry-After"] = formatdate(time.time() + 100, usegmt=True)
+    try:
+        try:
+            raise requests.HTTPError(response=response)
+        except requests.HTTPError as e:
+            raise jsonrpc.NetworkError("error") from e
+    except jsonrpc.NetworkError as e:
+        assert 90 < retry_after_secs(e) <= 100
+
+    response.headers["Retry-After"] = "invalid"
+    assert retry_after_secs(requests.HTTPError(response=response)) is None
+
+
+def test_retry_policy_respects_max_retries_and_exception_type():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise jsonrpc.StaleResponseError()
+
+    retry = jsonrpc.Retry(3, 0, jsonrpc.StaleResponseError)
+    with pytest.raises(jsonrpc.StaleResponseError):
+        retry.execute(fn)
+    assert len(calls) == 3
+
+    calls.clear()
+    retry = jsonrpc.Retry(3, 0, jsonrpc.NetworkError)
+    with pytest.raises(jsonrpc.StaleResponseError):
+        retry.execute(fn)
+    assert len(calls) == 1
+
+
+def test_retry_policy_stops_retry_when_budget_is_drained():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise jsonrpc.StaleResponseError()
+
+    budget = jsonrpc.RetryBudget(ratio=0, min_tokens=2)
+    retry = jsonrpc.Retry(10, 0, jsonrpc.StaleResponseError, budget=budget)
+    with pytest.raises(jsonrpc.StaleResponseError):
+        retry.execute(fn)
+    assert len(calls) == 3
+
+    calls.clear()
+    with pytest.raises(jsonrpc.StaleResponseError):
+        retry.execute(fn)
+    assert len(calls) == 1
+
+
+def test_retry_policy_next_delay():
+    err = jsonrpc.StaleResponseError()
+    assert jsonrpc.RetryPolicy(5, 0.1, Exception).next_delay(2, err) == 0.2
+    assert jsonrpc.RetryPolicy(5, 0.1, Exception).next_delay(5, err) is None
+
+    backoff = jsonrpc.ExponentialBackoff(base_secs=1, jitter=False)
+    assert jsonrpc.RetryPolicy(5, 0.1, Exception, backoff=backoff).next_delay(3, err) == 4
+
+    err = aiohttp.ClientResponseError(None, (), status=503, headers={"Retry-After": "120"})
+    assert jsonrpc.RetryPolicy(5, 0.1, Exception, backoff=backoff).next_delay(1, err) == 60
+
+
+@pytest.mark.asyncio
+async def test_shared_policy_with_async_client_and_utils():
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) < 3:
+            raise jsonrpc.StaleResponseError()
+        return "done"
+
+    retry = jsonrpc.Retry(5, 0, jsonrpc.StaleResponseError)
+    assert await retry.execute_async(fn) == "done"
+    assert len(calls) == 3
+
+    calls.clear()
+    assert await utils.with_retry(fn, 5, 0, jsonrpc.StaleResponseError) == "done"
+    assert len(calls) == 3
+
+
+def stale_then_metadata(calls):
+    def send_request(url, request, ignore_stale_response):
+        calls.append(request["method"])
+        if len(calls) < 2:
+            raise jsonrpc.StaleResponseError()
+        return {"jsonrpc": "2.0", "id": 1, "result": {"version": 1, "timestamp": 1, "chain_id": 2}}
+
+    return send_request
+
+
+def test_client_calls_overridden_retry_execute():
+    class CountingRetry(jsonrpc.Retry):
+        def execute(self, fn):
+            self.executed = getattr(self, "executed", 0) + 1
+            return super().execute(fn)
+
+    calls, metrics, retry = [], jsonrpc.InMemoryMetrics(), CountingRetry(3, 0, jsonrpc.StaleResponseError)
+    client = jsonrpc.Client("url", retry=retry, metrics=metrics)
+    client._send_http_request = stale_then_metadata(calls)
+    assert client.get_metadata().version == 1
+    assert retry.executed == 1
+    assert len(calls) == 2
+    assert metrics.snapshot()["get_metadata"]["retries"] == {"StaleResponseError": 1}
+
+
+@pytest.mark.asyncio
+async def test_async_client_calls_overridden_retry_execute():
+    class CountingRetry(async_client.Retry):
+        async def execute(self, fn):
+            self.executed = getattr(self, "executed", 0) + 1
+            return await super().execute(fn)
+
+    calls, metrics, retry = [], jsonrpc.InMemoryMetrics(), CountingRetry(3, 0, jsonrpc.StaleResponseError)
+    send_request = stale_then_metadata(calls)
+
+    async def async_send_request(url, request, ignore_stale_response):
+        return send_request(url, request, ignore_stale_response)
+
+    async with jsonrpc.AsyncClient("url", retry=retry, metrics=metrics) as client:
+        client._send_http_request = async_send_request
+        assert (await client.get_metadata()).version == 1
+    assert retry.executed == 1
+    assert len(calls) == 2
+    assert metrics.snapshot()["get_metadata"]["retries"] == {"StaleResponseError": 1}
@@ -0,0 +1,177 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc
+from diem.testing import LocalAccount
+import asyncio, time
+import pytest
+
+
+class FakeLedger:
+    def __init__(self) -> None:
+        self.txns = [{"version": 0, "hash": "genesis", "transaction": {"type": "writeset"}}]
+        self.calls = []
+
+    def commit(self, sender, seq, hash, vm_status="executed") -> None:
+        self.txns.append(
+            {
+                "version": len(self.txns),
+                "hash": hash,
+                "transaction": {"type": "user", "sender": sender.account_address.to_hex(), "sequence_number": seq},
+                "vm_status": {"type": vm_status},
+            }
+        )
+
+    def timestamp(self) -> int:
+        return len(self.txns) * 1_000_000
+
+    def handle(self, request):
+        method, params = request["method"], request["params"]
+        self.calls.append(method)
+        if method == "get_metadata":
+            result = {"version": len(self.txns) - 1, "timestamp": self.timestamp(), "chain_id": 2}
+        elif method == "get_account_transaction":
+            result = next(
+                (
+                    t
+                    for t in self.txns
+                    if t["transaction"].get("sender") == params[0]
+                    and t["transaction"].get("sequence_number") == params[1]
+                ),
+                None,
+            )
+        elif method == "get_transactions":
+            result = self.txns[params[0] : params[0] + params[1]]
+        return {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "result": result,
+            "diem_chain_id": 2,
+            "diem_ledger_version": len(self.txns) - 1,
+            "diem_ledger_timestampusec": self.timestamp(),
+        }
+
+
+@pytest.mark.asyncio
+async def test_async_waiter_resolves_many_transactions_with_one_polling_loop():
+    ledger = FakeLedger()
+    sender = LocalAccount.generate()
+    async with jsonrpc.AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            return ledger.handle(request)
+
+        client._send_http_request = send_request
+        waiter = client.transaction_waiter()
+        assert waiter is client.transaction_waiter()
+
+        ledger.commit(sender, 0, "h0")
+        futures = [waiter.wait(sender.account_address, i, 1000, "h%s" % i, 5) for i in range(100)]
+        await asyncio.sleep(0.05)
+        assert futures[0].done()
+        assert waiter.pending_count == 99
+        for i in range(1, 100):
+            ledger.commit(sender, i, "h%s" % i)
+
+        txns = await asyncio.gather(*futures)
+        assert [txn.transaction.sequence_number for txn in txns] == list(range(100))
+        assert waiter.pending_count == 0
+        assert ledger.calls.count("get_account_transaction") == 100
+        assert ledger.calls.count("get_transactions") < 10
+
+
+@pytest.mark.asyncio
+async def test_async_waiter_errors():
+    ledger = FakeLedger()
+    sender = LocalAccount.generate()
+    async with jsonrpc.AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            return ledger.handle(request)
+
+        client._send_http_request = send_request
+        waiter = client.transaction_waiter()
+
+        mismatch = waiter.wait(sender.account_address, 0, 1000, "hash")
+        failed = waiter.wait(sender.account_address, 1, 1000, "h1")
+        expired = waiter.wait(sender.account_address, 2, 4, "h2")
+        timeout = waiter.wait(sender.account_address, 3, 1000, "h3", timeout_secs=0.5)
+        await asyncio.sleep(0.05)
+        ledger.commit(sender, 0, "h0")
+        ledger.commit(sender, 1, "h1", vm_status="move_abort")
+        ledger.commit(sender, 4, "h4")
+
+        with pytest.raises(jsonrpc.TransactionHashMismatchError):
+            await mismatch
+        with pytest.raises(jsonrpc.TransactionExecutionFailed):
+            await failed
+        with pytest.raises(jsonrpc.TransactionExpired):
+            await expired
+        with pytest.raises(jsonrpc.WaitForTransactionTimeout):
+            await timeout
+
+
+def test_sync_waiter():
+    ledger = FakeLedger()
+    sender = LocalAccount.generate()
+    client = jsonrpc.Client("url")
+    client._send_http_request = lambda url, request, ignore_stale_response: ledger.handle(request)
+    waiter = client.transaction_waiter()
+
+    futures = [waiter.wait(sender.account_address, i, 1000, "h%s" % i, 5) for i in range(10)]
+    time.sleep(0.05)
+    for i in range(10):
+        ledger.commit(sender, i, "h%s" % i if i else "mismatch")
+
+    with pytest.raises(jsonrpc.TransactionHashMismatchError):
+        futures[0].result()
+    assert [f.result().transaction.sequence_number for f in futures[1:]] == list(range(1, 10))
+    assert ledger.calls.count("get_account_transaction") == 10
+
+
+@pytest.mark.asyncio
+async def test_async_waiter_checks_new_transactions_on_idle_ledger():
+    ledger = FakeLedger()
+    a, b = LocalAccount.generate(), LocalAccount.generate()
+    async with jsonrpc.AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            return ledger.handle(request)
+
+        client._send_http_request = send_request
+        waiter = client.transaction_waiter()
+
+        pending = waiter.wait(a.account_address, 0, 1000, "a0", 5)
+        ledger.commit(b, 0, "b0")
+        await asyncio.sleep(0.2)
+        committed = waiter.wait(b.account_address, 0, 1000, "b0", 1)
+        expired = waiter.wait(b.account_address, 1, 1, "b1", 1)
+
+        assert (await committed).hash == "b0"
+        with pytest.raises(jsonrpc.TransactionExpired):
+            await expired
+        assert not pending.done()
+        ledger.commit(a, 0, "a0")
+        assert (await pending).hash == "a0"
+
+
+def test_sync_waiter_checks_new_transactions_on_idle_ledger():
+    ledger = FakeLedger()
+    a, b = LocalAccount.generate(), LocalAccount.generate()
+    client = jsonrpc.Client("url")
+    client._send_http_request = lambda url, request, ignore_stale_response: ledger.handle(request)
+    waiter = client.transaction_waiter()
+
+    pending = waiter.wait(a.account_address, 0, 1000, "a0", 5)
+    ledger.commit(b, 0, "b0")
+    time.sleep(0.2)
+    committed = waiter.wait(b.account_address, 0, 1000, "b0", 1)
+    expired = waiter.wait(b.account_address, 1, 1, "b1", 1)
+
+    assert committed.result().hash == "b0"
+    with pytest.raises(jsonrpc.TransactionExpired):
+        expired.result()
+    assert not pending.done()
+    ledger.commit(a, 0, "a0")
+    assert pending.result().hash == "a0"
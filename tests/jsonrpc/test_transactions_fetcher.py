@@ -0,0 +1,104 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc
+import asyncio, gc, random, time
+import pytest
+
+
+class FakeLedger:
+    def __init__(self, size: int, max_page_size: int = 7) -> None:
+        self.size = size
+        self.max_page_size = max_page_size
+        self.failed = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def handle(self, request):
+        method, params = request["method"], request["params"]
+        if method == "get_metadata":
+            return self.response({"version": self.size - 1})
+        start, limit, _ = params
+        # fail the first request of every 3rd chunk
+        if start % 30 == 0 and start not in self.failed:
+            self.failed.add(start)
+            raise jsonrpc.NetworkError("error")
+        end = min(start + min(limit, self.max_page_size), self.size)
+        return self.response([{"version": v, "hash": str(v)} for v in range(start, end)])
+
+    def response(self, result):
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+
+@pytest.mark.asyncio
+async def test_async_iter_transactions():
+    ledger = FakeLedger(305)
+    async with jsonrpc.AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            ledger.in_flight += 1
+            ledger.max_in_flight = max(ledger.max_in_flight, ledger.in_flight)
+            await asyncio.sleep(random.random() * 0.01)
+            ledger.in_flight -= 1
+            return ledger.handle(request)
+
+        client._send_http_request = send_request
+        retry = jsonrpc.RetryPolicy(3, 0, Exception)
+        txns = [t async for t in client.iter_transactions(3, 250, chunk_size=10, concurrency=4, retry=retry)]
+        assert [t.version for t in txns] == list(range(3, 250))
+        assert ledger.max_in_flight == 4
+
+        txns = [t async for t in client.iter_transactions(290, chunk_size=10, retry=retry)]
+        assert [t.version for t in txns] == list(range(290, 305))
+
+        txns = [t async for t in client.iter_transactions(295, 400, chunk_size=10, retry=retry)]
+        assert [t.version for t in txns] == list(range(295, 305))
+
+
+@pytest.mark.asyncio
+async def test_async_iter_transactions_retrieves_results_of_abandoned_chunks():
+    errors = []
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+    async with jsonrpc.AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            start, limit, _ = request["params"]
+            if start > 0:
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    # transports may turn the cancellation into a connection error
+                    raise jsonrpc.NetworkError("failed to get transactions from %s" % start)
+            return {"jsonrpc": "2.0", "id": 1, "result": [{"version": v} for v in range(start, start + limit)]}
+
+        client._send_http_request = send_request
+        retry = jsonrpc.RetryPolicy(1, 0, Exception)
+        txns = client.iter_transactions(0, 100, chunk_size=10, concurrency=4, retry=retry)
+        assert (await txns.__anext__()).version == 0
+        await txns.aclose()
+
+    del txns
+    gc.collect()
+    await asyncio.sleep(0.01)
+    loop.set_exception_handler(None)
+    assert errors == []
+
+
+def test_iter_transactions():
+    ledger = FakeLedger(305)
+    client = jsonrpc.Client("url")
+
+    def send_request(url, request, ignore_stale_response):
+        time.sleep(random.random() * 0.01)
+        return ledger.handle(request)
+
+    client._send_http_request = send_request
+    retry = jsonrpc.RetryPolicy(3, 0, Exception)
+    txns = list(client.iter_transactions(0, chunk_size=10, concurrency=3, retry=retry))
+    assert [t.version for t in txns] == list(range(0, 305))
+
+    ledger.failed.clear()
+    with pytest.raises(jsonrpc.NetworkError):
+        list(client.iter_transactions(30, 40, chunk_size=10, retry=jsonrpc.RetryPolicy(1, 0, Exception)))
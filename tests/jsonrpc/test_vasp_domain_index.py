@@ -0,0 +1,96 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import jsonrpc
+import os
+import pytest
+
+
+EVENTS_KEY = "00" * 24
+
+
+class FakeLedger:
+    def __init__(self) -> None:
+        self.events = []
+        self.calls = []
+
+    def add(self, domain: str, address: str, removed: bool = False) -> None:
+        data = {"type": "vaspdomain", "domain": domain, "address": address, "removed": removed}
+        self.events.append({"key": EVENTS_KEY, "sequence_number": len(self.events), "data": data})
+
+    def handle(self, request):
+        method, params = request["method"], request["params"]
+        self.calls.append((method, params))
+        if method == "get_account":
+            result = {
+                "address": params[0],
+                "role": {"type": "treasury_compliance", "vasp_domain_events_key": EVENTS_KEY},
+            }
+        else:
+            key, start, limit = params
+            assert key == EVENTS_KEY
+            result = self.events[start : start + limit]
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+
+@pytest.fixture
+async def client_and_ledger():
+    ledger = FakeLedger()
+    async with jsonrpc.AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            return ledger.handle(request)
+
+        client._send_http_request = send_request
+        yield client, ledger
+
+
+@pytest.mark.asyncio
+async def test_refresh_fetches_new_events_only(client_and_ledger, tmp_path):
+    client, ledger = client_and_ledger
+    for i in range(5):
+        ledger.add(f"domain{i}", f"{i}" * 32)
+    ledger.add("domain1", "00" * 16, removed=True)
+
+    path = os.path.join(tmp_path, "domains.json")
+    index = jsonrpc.VaspDomainIndex(client, path, batch_size=2)
+    assert await index.refresh() == 6
+    assert index.next_sequence_number == 6
+    assert index.domain_map() == await client.get_vasp_domain_map()
+    assert index.get("domain1") is None
+    assert index.get("domain2") == "2" * 32
+
+    ledger.calls.clear()
+    assert await index.refresh() == 0
+    assert ledger.calls[0] == ("get_events", [EVENTS_KEY, 6, 2])
+    assert "get_account" not in [method for method, _ in ledger.calls]
+
+    ledger.add("domain9", "9" * 32)
+    assert await index.find("domain9") == "9" * 32
+    assert await index.find("domain0") == "0" * 32
+    assert await index.find("unknown") is None
+    assert index.next_sequence_number == 7
+
+    ledger.calls.clear()
+    index = jsonrpc.VaspDomainIndex(client, path)
+    assert await index.find("domain9") == "9" * 32
+    assert ledger.calls[0] == ("get_events", [EVENTS_KEY, 7, 100])
+    assert "get_account" not in [method for method, _ in ledger.calls]
+
+
+@pytest.mark.asyncio
+async def test_find_serves_fresh_index_from_memory(client_and_ledger):
+    client, ledger = client_and_ledger
+    ledger.add("domain", "1" * 32)
+    index = jsonrpc.VaspDomainIndex(client)
+    assert await index.find("domain") == "1" * 32
+
+    ledger.calls.clear()
+    for _ in range(10):
+        assert await index.find("domain") == "1" * 32
+    assert ledger.calls == []
+
+    ledger.add("domain", "1" * 32, removed=True)
+    index.max_staleness_secs = 0
+    assert await index.find("domain") is None
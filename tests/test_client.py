@@ -121,3 +121,40 @@ def gen_metadata_response(client, fail=None, snap=None):
         }
 
     return send_request
+
+
+def test_iter_events():
+    client = jsonrpc.Client("url")
+
+    def send_request(url, request, ignore_stale_response):
+        _, start, limit = request["params"]
+        result = [{"key": "key", "sequence_number": i} for i in range(start, min(start + limit, 23))]
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+    client._send_http_request = send_request
+    events = list(client.iter_events("key", 1, page_size=5, prefetch=3))
+    assert [e.sequence_number for e in events] == list(range(1, 23))
+
+    executor = ThreadPoolExecutor(2)
+    events = list(client.iter_events("key", 20, page_size=3, executor=executor))
+    assert [e.sequence_number for e in events] == [20, 21, 22]
+    executor.shutdown()
+
+
+def test_get_accounts():
+    client = jsonrpc.Client("url")
+    requested = []
+
+    def send_request(url, request, ignore_stale_response):
+        address = request["params"][0]
+        requested.append(address)
+        time.sleep(0.01)
+        result = {"address": address, "sequence_number": 1} if address != "00" * 16 else None
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+    client._send_http_request = send_request
+    addresses = ["%032x" % (i % 5) for i in range(12)]
+    accounts = client.get_accounts(addresses, concurrency=3)
+    assert [a.address if a else None for a in accounts] == [None if i % 5 == 0 else addresses[i] for i in range(12)]
+    assert sorted(requested) == sorted(set(addresses))
+    assert client.get_accounts([]) == []
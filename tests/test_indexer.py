@@ -0,0 +1,201 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import diem_types, indexer, jsonrpc, stdlib, txnmetadata, utils
+from diem.testing import Fullnode, LocalAccount, XUS
+import asyncio, os, types
+import pytest
+
+
+SENDER = "f72589b71ff4f8d139674a3f7369c69b"
+RECEIVER = "c5ab123458df0003415689adbb47326d"
+REFERENCE_ID = "4185027f-0574-6f55-2668-3a38fdb5de98"
+
+
+def received_payment(metadata: bytes, receiver: str = RECEIVER, amount: int = 100) -> dict:
+    return {
+        "key": "00" * 24,
+        "sequence_number": 0,
+        "transaction_version": 0,
+        "data": {
+            "type": jsonrpc.EVENT_DATA_RECEIVED_PAYMENT,
+            "sender": SENDER.upper(),
+            "receiver": receiver,
+            "amount": {"amount": amount, "currency": "XUS"},
+            "metadata": metadata.hex(),
+        },
+    }
+
+
+class FakeLedger:
+    def __init__(self) -> None:
+        self.txns = [
+            {"version": 0, "events": [{"data": {"type": "newblock"}}]},
+            {"version": 1, "events": [received_payment(txnmetadata.general_metadata(b"\x01" * 8, b"\x02" * 8))]},
+            {
+                "version": 2,
+                "events": [received_payment(txnmetadata.travel_rule("ref", utils.account_address(SENDER), 100)[0])],
+            },
+            {"version": 3, "events": [received_payment(txnmetadata.payment_metadata(REFERENCE_ID))]},
+            {
+                "version": 4,
+                "events": [
+                    received_payment(txnmetadata.refund_metadata(1, diem_types.RefundReason__InvalidSubaddress())),
+                    received_payment(b"", receiver=SENDER, amount=5),
+                ],
+            },
+        ]
+
+    def handle(self, request):
+        method, params = request["method"], request["params"]
+        if method == "get_metadata":
+            result = {"version": len(self.txns) - 1}
+        else:
+            start, limit, include_events = params
+            assert include_events
+            result = self.txns[start : start + limit]
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+
+@pytest.fixture
+async def client_and_ledger():
+    ledger = FakeLedger()
+    async with jsonrpc.AsyncClient("url") as client:
+
+        async def send_request(url, request, ignore_stale_response):
+            return ledger.handle(request)
+
+        client._send_http_request = send_request
+        yield client, ledger
+
+
+@pytest.mark.asyncio
+async def test_index_payments(client_and_ledger):
+    client, _ = client_and_ledger
+    index = indexer.Indexer(client, page_size=2)
+    assert index.last_version is None
+    assert await index.catch_up() == 5
+    assert index.last_version == 4
+
+    received = index.received_payments(RECEIVER)
+    assert [(p.version, p.event_index) for p in received] == [(1, 0), (2, 0), (3, 0), (4, 0)]
+    assert received[0].sender == SENDER
+    assert received[0].from_subaddress == "01" * 8
+    assert received[0].to_subaddress == "02" * 8
+    assert received[0].amount == 100
+    assert received[0].currency == "XUS"
+    assert received[1].reference_id == "ref"
+    assert received[2].reference_id == REFERENCE_ID
+    assert received[3].refund_version == 1
+    assert [p.version for p in index.received_payments(RECEIVER, since_version=3)] == [3, 4]
+
+    assert [(p.version, p.event_index) for p in index.received_payments(SENDER)] == [(4, 1)]
+    assert len(index.sent_payments(SENDER)) == 5
+    assert index.sent_payments(RECEIVER) == []
+    assert [p.version for p in index.payments_to_subaddress("02" * 8)] == [1]
+    assert [p.version for p in index.payments_to_subaddress(b"\x02" * 8)] == [1]
+    assert [p.version for p in index.payments_by_reference_id(REFERENCE_ID)] == [3]
+    assert index.payment(4).event_index == 0
+    assert index.payment(0) is None
+
+
+@pytest.mark.asyncio
+async def test_catch_up_resumes_from_last_indexed_version(client_and_ledger, tmp_path):
+    client, ledger = client_and_ledger
+    path = os.path.join(tmp_path, "payments.db")
+    index = indexer.Indexer(client, path)
+    assert await index.catch_up(end_version=2) == 1
+    assert index.last_version == 1
+    index.close()
+
+    ledger.txns.append({"version": 5, "events": [received_payment(b"")]})
+    index = indexer.Indexer(client, path)
+    assert await index.catch_up() == 5
+    assert index.last_version == 5
+    assert await index.catch_up() == 0
+    assert [p.version for p in index.received_payments(RECEIVER)] == [1, 2, 3, 4, 5]
+    index.close()
+
+
+def test_decode_payments_ignores_undecodable_metadata():
+    txn = jsonrpc.Transaction(version=7)
+    event = txn.events.add()
+    event.data.type = jsonrpc.EVENT_DATA_RECEIVED_PAYMENT
+    event.data.sender = SENDER
+    event.data.receiver = RECEIVER
+    event.data.amount.amount = 1
+    event.data.amount.currency = "XUS"
+    event.data.metadata = "ffff"
+    (payment,) = indexer.decode_payments(txn)
+    assert payment == indexer.Payment(7, 0, SENDER, RECEIVER, None, None, 1, "XUS", None, None)
+
+
+@pytest.fixture
+async def fullnode():
+    async with Fullnode() as fullnode:
+        yield fullnode
+
+
+@pytest.fixture
+async def client(fullnode):
+    async with fullnode.create_client() as client:
+        yield client
+
+
+def p2p(receiver: LocalAccount, amount: int, metadata: bytes = b""):
+    return stdlib.encode_peer_to_peer_with_metadata_script_function(
+        utils.currency_code(XUS), receiver.account_address, amount, metadata, b""
+    )
+
+
+@pytest.mark.asyncio
+async def test_index_payments_on_fullnode(fullnode, client):
+    faucet = fullnode.create_faucet(client)
+    sender = await faucet.gen_account()
+    receiver = await faucet.gen_account()
+    metadata = txnmetadata.general_metadata(b"\x01" * 8, b"\x02" * 8)
+    txn = await sender.submit_and_wait_for_txn(client, p2p(receiver, 1000, metadata))
+
+    index = indexer.Indexer(client, page_size=2)
+    assert await index.catch_up() > 0
+    assert index.last_version == txn.version
+    (payment,) = index.payments_to_subaddress(b"\x02" * 8)
+    assert payment.version == txn.version
+    assert payment.sender == sender.account_address.to_hex()
+    assert payment.receiver == receiver.account_address.to_hex()
+    assert payment.amount == 1000
+    assert index.sent_payments(sender.account_address) == [payment]
+    assert index.received_payments(receiver.account_address, since_version=txn.version) == [payment]
+
+
+@pytest.mark.asyncio
+async def test_follow_sleeps_only_when_no_new_version_is_indexed(fullnode, client, monkeypatch):
+    faucet = fullnode.create_faucet(client)
+    parent, _ = await faucet.gen_vasp()
+    index = indexer.Indexer(client)
+    calls = []
+
+    catch_up = index.catch_up
+
+    async def record_catch_up():
+        count = await catch_up()
+        calls.append(("catch_up", index.last_version))
+        return count
+
+    async def sleep(secs):
+        calls.append(("sleep", secs))
+        if len([c for c in calls if c[0] == "sleep"]) > 1:
+            raise asyncio.CancelledError()
+        # new transactions without payments
+        await parent.rotate_dual_attestation_info(client, "http://vasp")
+
+    index.catch_up = record_catch_up
+    monkeypatch.setattr(indexer, "asyncio", types.SimpleNamespace(sleep=sleep))
+    with pytest.raises(asyncio.CancelledError):
+        await index.follow(poll_interval_secs=1)
+
+    tip = (await client.get_metadata()).version
+    assert [c[0] for c in calls] == ["catch_up", "catch_up", "sleep", "catch_up", "catch_up", "sleep"]
+    assert calls[2:] == [("sleep", 1), ("catch_up", tip), ("catch_up", tip), ("sleep", 1)]
+    assert calls[0][1] == calls[1][1] < tip
@@ -109,5 +109,38 @@ def test_decode_error_for_mismatched_protected_header_alg():
         jws.decode(b".".join(map(jws.base64.urlsafe_b64encode, [b'{"alg": "none"}', b"{}", b"sig"])), PUBLIC_KEY.verify)
 
 
+def test_decode_verifies_signing_message_slice_of_the_message():
+    msg = jws.encode(MSG, KEY.sign)
+    verified = []
+
+    def verify(sig: bytes, signing_msg: bytes) -> None:
+        assert isinstance(signing_msg, bytes)
+        verified.append(signing_msg)
+        PUBLIC_KEY.verify(sig, signing_msg)
+
+    headers, body = jws.decode(msg, verify)
+    assert verified == [msg.rsplit(b".", 1)[0]]
+    headers["alg"] = "none"
+    assert jws.decode(msg, PUBLIC_KEY.verify) == ({"alg": "EdDSA"}, MSG)
+
+
+def test_encode_with_default_headers_matches_encoded_headers():
+    for msg in ["", "a", "ab", "abc", '{"cid": "中"}' * 10]:
+        sig = jws.encode(msg, KEY.sign)
+        assert sig == jws.encode(msg, KEY.sign, headers={"alg": "EdDSA"})
+        header, payload, signature = sig.split(b".")
+        assert header == jws.encode_b64url(b'{"alg":"EdDSA"}')
+        assert payload == jws.encode_b64url(msg.encode("utf-8"))
+        assert jws.decode_b64url(signature) == KEY.sign(header + b"." + payload)
+        assert jws.decode(sig, PUBLIC_KEY.verify) == ({"alg": "EdDSA"}, msg)
+
+
 def b64_urlsafe(data):
     return list(map(jws.base64.urlsafe_b64encode, data))
+
+
+def test_default_headers_are_read_only():
+    with pytest.raises(TypeError):
+        jws.DEFAULT_HEADERS["alg"] = "none"
+    assert jws.encode_headers({"alg": "EdDSA"}) == jws.encode_headers(jws.DEFAULT_HEADERS)
+    assert jws.encode_headers({"alg": "EdDSA", "kid": "1"}) == jws.encode_b64url(b'{"alg":"EdDSA","kid":"1"}')
@@ -0,0 +1,157 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import identifier, jsonrpc, offchain
+from diem.testing import LocalAccount
+from aiohttp import web
+import aiohttp, asyncio
+import pytest
+
+
+async def start_server(delay: float):
+    state = {"in_flight": 0, "peak": 0}
+
+    async def handle(request: web.Request) -> web.Response:
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            await asyncio.sleep(delay)
+            return web.Response(body=await request.read())
+        finally:
+            state["in_flight"] -= 1
+
+    app = web.Application()
+    app.router.add_post("/v2/command", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v2/command", state
+
+
+@pytest.fixture
+async def fast():
+    runner, url, state = await start_server(0.01)
+    yield url, state
+    await runner.cleanup()
+
+
+@pytest.fixture
+async def slow():
+    runner, url, state = await start_server(1)
+    yield url, state
+    await runner.cleanup()
+
+
+async def post(sessions: offchain.OutboundSessions, url: str, body: bytes) -> bytes:
+    async with sessions.post(url, data=body) as response:
+        return await response.read()
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused_and_limited_per_host(fast):
+    url, state = fast
+    sessions = offchain.OutboundSessions(offchain.OutboundHTTPConfig(limit_per_host=2))
+    try:
+        for i in range(3):
+            assert await post(sessions, url, b"%d" % i) == b"%d" % i
+        await asyncio.gather(*[post(sessions, url, b"hello") for _ in range(10)])
+        assert state["peak"] == 2
+
+        (host, metrics), *_ = sessions.metrics().items()
+        assert host == offchain.http_pool.host_key(url)
+        assert metrics.limit == 2
+        assert metrics.requests == 13
+        assert metrics.peak_in_flight == 10
+        assert metrics.in_flight == 0
+        assert metrics.connections_created == 2
+        assert metrics.connections_reused == 11
+    finally:
+        await sessions.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_counterparty_timeout_does_not_block_other_counterparties(fast, slow):
+    fast_url, _ = fast
+    slow_url, slow_state = slow
+    slow_host = offchain.http_pool.host_key(slow_url)
+    config = offchain.OutboundHTTPConfig(limit_per_host=1, host_timeouts={slow_host: 0.2})
+    sessions = offchain.OutboundSessions(config)
+    try:
+        slow_requests = asyncio.gather(*[post(sessions, slow_url, b"slow") for _ in range(3)], return_exceptions=True)
+        await asyncio.sleep(0.05)
+        assert await post(sessions, fast_url, b"fast") == b"fast"
+        errors = await slow_requests
+        assert all(isinstance(e, asyncio.TimeoutError) for e in errors)
+        assert slow_state["peak"] == 1
+
+        metrics = sessions.metrics()
+        assert metrics[slow_host].errors == 3
+        assert metrics[offchain.http_pool.host_key(fast_url)].errors == 0
+    finally:
+        await sessions.close()
+
+
+@pytest.mark.asyncio
+async def test_errors_raised_by_caller_are_not_counted_as_transport_errors(fast):
+    url, _ = fast
+    sessions = offchain.OutboundSessions()
+    try:
+        with pytest.raises(ValueError):
+            async with sessions.post(url, data=b"hello") as response:
+                await response.read()
+                raise ValueError("invalid response")
+        metrics = sessions.metrics()[offchain.http_pool.host_key(url)]
+        assert metrics.errors == 0
+        assert metrics.in_flight == 0
+
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await post(sessions, "http://127.0.0.1:1/v2/command", b"hello")
+        assert sessions.metrics()["127.0.0.1:1"].errors == 1
+    finally:
+        await sessions.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_and_least_recently_used_sessions_are_evicted(fast, slow):
+    fast_url, _ = fast
+    slow_url, _ = slow
+    now = [0]
+    config = offchain.OutboundHTTPConfig(max_sessions=2, session_idle_timeout_secs=10)
+    sessions = offchain.OutboundSessions(config, clock=lambda: now[0])
+    host = offchain.http_pool.host_key
+    try:
+        slow_request = asyncio.ensure_future(post(sessions, slow_url, b"slow"))
+        await post(sessions, fast_url, b"fast")
+        assert set(sessions.metrics()) == {host(slow_url), host(fast_url)}
+
+        # the slow session has a request in flight, the idle fast session is evicted
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await post(sessions, "http://127.0.0.1:1/v2/command", b"hello")
+        assert set(sessions.metrics()) == {host(slow_url), "127.0.0.1:1"}
+
+        assert await slow_request == b"slow"
+        now[0] = 10
+        await sessions.evict()
+        assert sessions.metrics() == {}
+    finally:
+        await sessions.close()
+
+
+@pytest.mark.asyncio
+async def test_offchain_client_closes_sessions_on_exit(fast):
+    url, _ = fast
+    created = []
+
+    def session_factory(**kwargs):
+        created.append(aiohttp.ClientSession(**kwargs))
+        return created[-1]
+
+    address = LocalAccount.generate().account_address
+    async with jsonrpc.AsyncClient("http://localhost") as jsonrpc_client:
+        async with offchain.Client(address, jsonrpc_client, identifier.TDM, session_factory=session_factory) as client:
+            assert await post(client.sessions, url, b"hello") == b"hello"
+            assert not created[0].closed
+    assert created[0].closed
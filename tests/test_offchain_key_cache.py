@@ -0,0 +1,199 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import identifier, offchain
+from diem.testing import Fullnode, LocalAccount
+from diem.testing.miniwallet.app.event_puller import EventPuller
+from diem.testing.miniwallet.app.store import InMemoryStore
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from aiohttp import web
+import aiohttp, logging, typing, uuid
+import pytest
+
+
+@pytest.fixture
+async def fullnode():
+    async with Fullnode() as fullnode:
+        yield fullnode
+
+
+@pytest.fixture
+async def client(fullnode):
+    async with fullnode.create_client() as client:
+        calls = []
+        must_get_account = client.must_get_account
+
+        async def count_must_get_account(address):
+            calls.append(address)
+            return await must_get_account(address)
+
+        client.must_get_account = count_must_get_account
+        client.calls = calls
+        yield client
+
+
+def public_key_hex(key) -> str:
+    return key.public_bytes(Encoding.Raw, PublicFormat.Raw).hex()
+
+
+@pytest.mark.asyncio
+async def test_cache_resolves_child_account_and_invalidates_on_rotation(fullnode, client):
+    parent, child = await fullnode.create_faucet(client).gen_vasp()
+    await parent.rotate_dual_attestation_info(client, "http://vasp-1")
+    client.calls.clear()
+
+    cache = offchain.CounterpartyKeyCache(client)
+    base_url, public_key = await cache.get(child.account_address)
+    assert base_url == "http://vasp-1"
+    assert public_key_hex(public_key) == parent.compliance_public_key_bytes.hex()
+    assert (await cache.get(parent.account_address.to_hex())) == (base_url, public_key)
+    assert (await cache.get(child.account_address)) == (base_url, public_key)
+    assert len(client.calls) == 2
+
+    new_key = LocalAccount.generate().compliance_public_key_bytes
+    txn = await parent.rotate_dual_attestation_info(client, "http://vasp-2", new_key)
+    assert await cache.get(child.account_address) == (base_url, public_key)
+    cache.process_transaction(txn)
+    base_url, public_key = await cache.get(child.account_address)
+    assert base_url == "http://vasp-2"
+    assert public_key_hex(public_key) == new_key.hex()
+    assert len(client.calls) == 3
+
+    account = await fullnode.create_faucet(client).gen_account()
+    with pytest.raises(ValueError, match="could not find base_url"):
+        await cache.get(account.account_address)
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl(fullnode, client):
+    parent, _ = await fullnode.create_faucet(client).gen_vasp()
+    await parent.rotate_dual_attestation_info(client, "http://vasp")
+    now = [0]
+    cache = offchain.CounterpartyKeyCache(client, ttl_secs=10, clock=lambda: now[0])
+    client.calls.clear()
+
+    await cache.get(parent.account_address)
+    now[0] = 9
+    await cache.get(parent.account_address)
+    assert len(client.calls) == 1
+    now[0] = 10
+    await cache.get(parent.account_address)
+    assert len(client.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_offchain_client_verifies_request_signed_by_rotated_key(fullnode, client):
+    faucet = fullnode.create_faucet(client)
+    sender, _ = await faucet.gen_vasp()
+    receiver, _ = await faucet.gen_vasp()
+    await sender.rotate_dual_attestation_info(client, "http://sender")
+    offchain_client = offchain.Client(receiver.account_address, client, identifier.TDM)
+    sender_id = offchain_client.account_id(sender.account_address)
+
+    def ping(account: LocalAccount) -> bytes:
+        cid = str(uuid.uuid4())
+        request = offchain.CommandRequestObject(
+            cid=cid, command_type="PingCommand", command={"_ObjectType": "PingCommand"}
+        )
+        return offchain.jws.serialize(request, account.compliance_key.sign)
+
+    assert (await offchain_client.deserialize_inbound_request(sender_id, ping(sender))).command_type == "PingCommand"
+
+    rotated = LocalAccount.generate()
+    await sender.rotate_dual_attestation_info(client, "http://sender", rotated.compliance_public_key_bytes)
+    client.calls.clear()
+    assert (await offchain_client.deserialize_inbound_request(sender_id, ping(rotated))).command_type == "PingCommand"
+    assert len(client.calls) == 1
+
+    with pytest.raises(offchain.Error, match="invalid_jws_signature"):
+        await offchain_client.deserialize_inbound_request(sender_id, ping(sender))
+    assert len(client.calls) == 2
+
+
+async def start_receiver(receiver_client: offchain.Client, sign) -> typing.Tuple[web.AppRunner, str]:
+    async def handle(request: web.Request) -> web.Response:
+        sender_address = request.headers[offchain.http_header.X_REQUEST_SENDER_ADDRESS]
+        cmd = await receiver_client.deserialize_inbound_request(sender_address, await request.read())
+        return web.Response(body=offchain.jws.serialize(offchain.reply_request(cid=cmd.cid), sign[0]))
+
+    app = web.Application()
+    app.router.add_post("/v2/command", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, "http://127.0.0.1:%s" % site._server.sockets[0].getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_offchain_client_retries_request_with_rotated_base_url_and_key(fullnode, client):
+    faucet = fullnode.create_faucet(client)
+    sender, _ = await faucet.gen_vasp()
+    receiver, _ = await faucet.gen_vasp()
+    sign = [receiver.compliance_key.sign]
+    runner, base_url = await start_receiver(offchain.Client(receiver.account_address, client, identifier.TDM), sign)
+    sender_client = offchain.Client(sender.account_address, client, identifier.TDM)
+    try:
+        await sender.rotate_dual_attestation_info(client, base_url)
+        await receiver.rotate_dual_attestation_info(client, "http://127.0.0.1:1")
+        receiver_id = sender_client.account_id(receiver.account_address)
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await sender_client.ping(receiver_id, sender.compliance_key.sign)
+
+        await receiver.rotate_dual_attestation_info(client, base_url)
+        client.calls.clear()
+        assert (await sender_client.ping(receiver_id, sender.compliance_key.sign)).status == "success"
+        assert client.calls.count(receiver.account_address.to_hex()) == 1
+
+        rotated = LocalAccount.generate()
+        await receiver.rotate_dual_attestation_info(client, base_url, rotated.compliance_public_key_bytes)
+        sign[0] = rotated.compliance_key.sign
+        client.calls.clear()
+        assert (await sender_client.ping(receiver_id, sender.compliance_key.sign)).status == "success"
+        assert client.calls.count(receiver.account_address.to_hex()) == 1
+    finally:
+        await sender_client.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_miniwallet_event_puller_invalidates_cache_by_rotation_events(fullnode, client):
+    parent, _ = await fullnode.create_faucet(client).gen_vasp()
+    await parent.rotate_dual_attestation_info(client, "http://vasp-1")
+    cache = offchain.CounterpartyKeyCache(client)
+    puller = EventPuller(
+        client=client, store=InMemoryStore(), hrp=identifier.TDM, logger=logging.getLogger(), key_cache=cache
+    )
+
+    assert (await cache.get(parent.account_address))[0] == "http://vasp-1"
+    await puller.process()
+    assert (await cache.get(parent.account_address))[0] == "http://vasp-1"
+
+    await parent.rotate_dual_attestation_info(client, "http://vasp-2")
+    assert (await cache.get(parent.account_address))[0] == "http://vasp-1"
+    await puller.process()
+    assert (await cache.get(parent.account_address))[0] == "http://vasp-2"
+
+
+@pytest.mark.asyncio
+async def test_rotation_events_before_entry_fetched_are_ignored(fullnode, client):
+    parent, _ = await fullnode.create_faucet(client).gen_vasp()
+    await parent.rotate_dual_attestation_info(client, "http://vasp-1")
+    await parent.rotate_dual_attestation_info(client, "http://vasp-2")
+    cache = offchain.CounterpartyKeyCache(client)
+    puller = EventPuller(
+        client=client, store=InMemoryStore(), hrp=identifier.TDM, logger=logging.getLogger(), key_cache=cache
+    )
+
+    client.calls.clear()
+    assert (await cache.get(parent.account_address))[0] == "http://vasp-2"
+    await puller.process()
+    assert (await cache.get(parent.account_address))[0] == "http://vasp-2"
+    assert len(client.calls) == 1
+
+    txn = await parent.rotate_dual_attestation_info(client, "http://vasp-3")
+    await puller.process()
+    assert (await cache.get(parent.account_address))[0] == "http://vasp-3"
+    assert len(client.calls) == 2
+    assert not any(cache.process_event(event) for event in txn.events)
@@ -16,7 +16,7 @@ from diem.offchain.payment_state import (
     R_SEND,
     R_ABORT,
 )
-import dataclasses, pytest
+import dataclasses, pytest, typing
 
 
 def test_initial_state(factory):
@@ -63,3 +63,23 @@ def test_follow_up_action():
     assert follow_up_action(Actor.RECEIVER, R_SEND) is None
     assert follow_up_action(Actor.SENDER, R_ABORT) is None
     assert follow_up_action(Actor.RECEIVER, R_ABORT) is None
+
+
+def test_candidate_states_by_sender_and_receiver_status(factory):
+    payment = factory.new_payment_object()
+    assert machine.candidate_states(payment) == [S_INIT]
+
+    def candidates(sender_status: str, receiver_status: str) -> typing.List[str]:
+        ret = dataclasses.replace(
+            payment,
+            sender=replace_payment_actor(payment.sender, status=sender_status),
+            receiver=replace_payment_actor(payment.receiver, status=receiver_status),
+        )
+        return [s.id for s in machine.candidate_states(ret)]
+
+    assert candidates(Status.needs_kyc_data, Status.ready_for_settlement) == ["R_SEND"]
+    assert sorted(candidates(Status.needs_kyc_data, Status.soft_match)) == ["R_SOFT", "S_SOFT_SEND"]
+    assert candidates(Status.abort, Status.ready_for_settlement) == ["S_ABORT"]
+    assert candidates(Status.needs_kyc_data, Status.abort) == ["R_ABORT"]
+    assert sorted(candidates(Status.abort, Status.abort)) == ["R_ABORT", "S_ABORT"]
+    assert candidates(Status.none, Status.none) == []
@@ -0,0 +1,74 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import identifier, offchain
+from diem.testing import Fullnode, LocalAccount
+from concurrent.futures import ThreadPoolExecutor
+import asyncio, threading
+import pytest
+
+
+def ping_request() -> offchain.CommandRequestObject:
+    return offchain.CommandRequestObject(
+        cid="3185027f-0574-6f55-2668-3a38fdb5de98", command_type="PingCommand", command={"_ObjectType": "PingCommand"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_sign_with_sync_and_coroutine_signers():
+    account = LocalAccount.generate()
+    threads = []
+
+    def sync_sign(msg: bytes) -> bytes:
+        threads.append(threading.get_ident())
+        return account.compliance_key.sign(msg)
+
+    async def async_sign(msg: bytes) -> bytes:
+        await asyncio.sleep(0)
+        return account.compliance_key.sign(msg)
+
+    class AsyncSigner:
+        async def __call__(self, msg: bytes) -> bytes:
+            return account.compliance_key.sign(msg)
+
+    expected = offchain.jws.serialize(ping_request(), account.compliance_key.sign)
+    assert await offchain.jws.serialize_async(ping_request(), sync_sign) == expected
+    assert threads == [threading.get_ident()]
+    assert await offchain.jws.serialize_async(ping_request(), async_sign) == expected
+    assert await offchain.jws.serialize_async(ping_request(), AsyncSigner()) == expected
+
+    with ThreadPoolExecutor(1) as executor:
+        assert await offchain.jws.serialize_async(ping_request(), sync_sign, executor) == expected
+        assert await offchain.jws.serialize_async(ping_request(), async_sign, executor) == expected
+        assert threads[-1] != threading.get_ident()
+
+        public_key = account.compliance_key.public_key()
+        request = await offchain.jws.deserialize_async(
+            expected, offchain.CommandRequestObject, public_key.verify, executor
+        )
+        assert request == ping_request()
+
+
+@pytest.mark.asyncio
+async def test_offchain_client_verifies_inbound_request_in_executor():
+    async with Fullnode() as fullnode:
+        async with fullnode.create_client() as client:
+            faucet = fullnode.create_faucet(client)
+            sender, _ = await faucet.gen_vasp()
+            receiver, _ = await faucet.gen_vasp()
+            await sender.rotate_dual_attestation_info(client, "http://sender")
+
+            with ThreadPoolExecutor(1) as executor:
+                offchain_client = offchain.Client(receiver.account_address, client, identifier.TDM, executor=executor)
+                sender_id = offchain_client.account_id(sender.account_address)
+
+                async def sign(msg: bytes) -> bytes:
+                    return sender.compliance_key.sign(msg)
+
+                request_bytes = await offchain.jws.serialize_async(ping_request(), sign)
+                assert await offchain_client.deserialize_inbound_request(sender_id, request_bytes) == ping_request()
+
+                request_bytes = offchain.jws.serialize(ping_request(), LocalAccount.generate().compliance_key.sign)
+                with pytest.raises(offchain.Error, match="invalid_jws_signature"):
+                    await offchain_client.deserialize_inbound_request(sender_id, request_bytes)
@@ -12,6 +12,7 @@ from diem.offchain.state import (
     TooManyStatesMatchedError,
     NoStateMatchedError,
     ConditionValidationError,
+    MAX_INDEX_KEYS,
 )
 import dataclasses, pytest, typing
 
@@ -170,3 +171,66 @@ def test_require_empty_matches_anything():
 
     assert a.match(None) == MatchResult(success=True)
     assert a.match(Object()) == MatchResult(success=True)
+
+
+def test_candidate_states_are_indexed_by_required_values():
+    a = State(id="a", require=require(Value(path="a", value="hello"), Value(path="b.a", value="world")))
+    b = State(id="b", require=require(Value(path="a", value="hello")))
+    c = State(id="c", require=require(Field(path="c")))
+    d = State(id="d", require=require(Value(path="b.a", value="world"), validation=Field(path="c")))
+
+    m = build_machine([new_transition(a, b), new_transition(b, c), new_transition(c, d)])
+    assert m.candidate_states(Object(a="hello", b=Object(a="world"))) == [a, b, c, d]
+    assert m.candidate_states(Object(a="hello")) == [b, c]
+    assert m.candidate_states(Object(a="world", b=Object(a="world"))) == [c, d]
+    assert m.candidate_states(Object()) == [c]
+    assert m.candidate_states(None) == [c]
+
+    assert m.match_states(Object(a="hello", c=Object())) == [b, c]
+    # validation of a state is only evaluated when its required values match
+    assert m.match_states(Object(a="world")) == []
+    with pytest.raises(ConditionValidationError):
+        m.match_states(Object(a="world", b=Object(a="world")))
+
+
+def test_candidate_states_for_unhashable_values():
+    a = State(id="a", require=require(Value(path="a", value="hello")))
+    b = State(id="b", require=require(Value(path="a", value=["hello"])))
+    m = build_machine([new_transition(a, b)])
+    assert m.candidate_states(Object(a="hello")) == [a, b]
+    assert m.match_states(Object(a=["hello"])) == [b]
+    assert m.is_valid_transition(a, b, None)
+    assert not m.is_valid_transition(b, a, None)
+
+    m = build_machine([new_transition(a, a)])
+    assert m.candidate_states(Object(a=["hello"])) == [a]
+    assert m.match_states(Object(a=["hello"])) == []
+
+
+def test_machine_reindexes_changed_states_and_transitions():
+    a = State(id="a", require=require(Value(path="a", value="hello")))
+    b = State(id="b", require=require(Value(path="a", value="world")))
+    c = State(id="c", require=require(Value(path="b.a", value="world")))
+    m = build_machine([new_transition(a, b)])
+    assert m.match_states(Object(a="world", b=Object(a="world"))) == [b]
+
+    m.states.append(c)
+    m.transitions.append(new_transition(b, c))
+    assert m.match_states(Object(a="world", b=Object(a="world"))) == [b, c]
+    assert m.is_valid_transition(b, c, None)
+
+    m.states[1] = State(id="b2", require=require(Value(path="a", value="hello")))
+    assert m.match_states(Object(a="hello")) == [a, m.states[1]]
+
+
+def test_machine_does_not_index_states_requiring_too_many_values():
+    paths = ["a", "b.a", "c.a", "b.b.a", "c.c.a"]
+    a = State(id="a", require=require(*[Value(path=p, value="hello") for p in paths]))
+    b = State(id="b", require=require(Value(path="a", value="world")))
+    m = build_machine([new_transition(a, b)])
+    assert len(paths) > MAX_INDEX_KEYS
+    assert m.candidate_states(Object(a="world")) == [a, b]
+    assert m.match_states(Object(a="world")) == [b]
+
+    o = Object(a="hello", b=Object(a="hello", b=Object(a="hello")), c=Object(a="hello", c=Object(a="hello")))
+    assert m.match_states(o) == [a]
@@ -421,6 +421,56 @@ def test_missing_required_field():
     )
 
 
+def test_invalid_field_value_type():
+    cases = [
+        (
+            "command.payment.sender.metadata",
+            ["hello", 1],
+            "command.payment.sender.metadata",
+            "expect type str, but got int",
+        ),
+        (
+            "command.payment.sender.metadata",
+            "hello",
+            "command.payment.sender.metadata",
+            "expect type list, but got str",
+        ),
+        (
+            "command.payment.sender.status",
+            "ready",
+            "command.payment.sender.status",
+            "expect type StatusObject, but got str",
+        ),
+        ("command.payment.action.amount", "100", "command.payment.action.amount", "expect type int, but got str"),
+    ]
+    for path, value, field, match in cases:
+        request_json = set_field(sample_request_json(), {path: value})
+        assert_field_error(request_json, "invalid_field_value", field, match)
+
+
+def test_to_json_matches_asdict_without_none_values():
+    request = offchain.CommandRequestObject(
+        cid="3185027f-0574-6f55-2668-3a38fdb5de98",
+        command_type="PaymentCommand",
+        command={"a": None, "b": [{"c": None, "d": 1}, None], "e": {"f": None, "g": "ü"}},
+    )
+    expected = {
+        "cid": "3185027f-0574-6f55-2668-3a38fdb5de98",
+        "command_type": "PaymentCommand",
+        "command": {"b": [{"d": 1}, None], "e": {"g": "ü"}},
+        "_ObjectType": "CommandRequestObject",
+    }
+    assert offchain.to_dict(request) == expected
+    assert offchain.to_json(request) == json.dumps(expected)
+    assert offchain.to_json(request, indent=2) == json.dumps(expected, indent=2)
+    assert offchain.to_dict([request]) == [expected]
+
+    # to_dict returns a copy, the request is not changed
+    offchain.to_dict(request)["command"]["b"].append(1)
+    assert request.command["a"] is None
+    assert len(request.command["b"]) == 2
+
+
 def test_reference_id_command_result_object():
     # Test can encode and decode correct response format
     ref_id_command_result = offchain.ReferenceIDCommandResultObject(
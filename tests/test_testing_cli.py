@@ -31,7 +31,7 @@ def test_version(runner: CliRunner) -> None:
 
 
 def test_help_shortcut(runner: CliRunner) -> None:
-    for fn in [cli.main, cli.start_server, cli.test, cli.gen_diem_account_config]:
+    for fn in [cli.main, cli.start_server, cli.test, cli.gen_diem_account_config, cli.start_fullnode]:
         result = runner.invoke(fn, ["-h"])
         assert result.exit_code == 0
         assert ("-h, --help") in result.output
@@ -0,0 +1,199 @@
+# Copyright (c) The Diem Core Contributors
+# SPDX-License-Identifier: Apache-2.0
+
+
+from diem import diem_types, jsonrpc, stdlib, txnmetadata, utils
+from diem.testing import Fullnode, LocalAccount, XUS
+from diem.testing import fullnode as simulator
+from diem.testing.fullnode import Ledger
+import asyncio, pytest
+
+
+@pytest.fixture
+async def fullnode():
+    async with Fullnode() as fullnode:
+        yield fullnode
+
+
+@pytest.fixture
+async def client(fullnode):
+    async with fullnode.create_client() as client:
+        yield client
+
+
+def p2p(receiver: LocalAccount, amount: int, metadata: bytes = b"", signature: bytes = b""):
+    return stdlib.encode_peer_to_peer_with_metadata_script_function(
+        utils.currency_code(XUS), receiver.account_address, amount, metadata, signature
+    )
+
+
+@pytest.mark.asyncio
+async def test_mint_and_transfer(fullnode, client):
+    faucet = fullnode.create_faucet(client)
+    sender = await faucet.gen_account()
+    parent, child = await faucet.gen_vasp()
+    assert (await client.get_parent_vasp_account(child.account_address)).address == parent.account_address.to_hex()
+
+    txn = await sender.submit_and_wait_for_txn(client, p2p(child, 1000, b"\x01"))
+    assert txn.transaction.script.type == "peer_to_peer_with_metadata"
+    assert txn.transaction.script.amount == 1000
+    assert [e.data.type for e in txn.events] == ["sentpayment", "receivedpayment"]
+    assert await client.get_account_transaction(sender.account_address, 0, True) == txn
+    assert await client.get_account_transactions(sender.account_address, 0, 10, True) == [txn]
+
+    account = await client.get_account(child.account_address)
+    assert utils.balance(account, XUS) == 1000
+    (event,) = await client.get_events(account.received_events_key, 0, 10)
+    assert event.data.sender == sender.account_address.to_hex()
+    assert event.data.metadata == "01"
+    assert event.transaction_version == txn.version
+    assert utils.balance(await client.get_account(sender.account_address), XUS) == 100_000_000_000 - 1000
+
+    txns = await client.get_transactions(0, 100, True)
+    assert [t.version for t in txns] == list(range(txn.version + 1))
+    assert txns[-1] == txn
+    assert (await client.get_metadata()).version == txn.version
+    assert [c.code for c in await client.get_currencies()] == [XUS]
+
+
+@pytest.mark.asyncio
+async def test_transaction_aborted(fullnode, client):
+    sender = await fullnode.create_faucet(client).gen_account()
+    receiver = LocalAccount.generate()
+    with pytest.raises(jsonrpc.TransactionExecutionFailed) as e:
+        await sender.submit_and_wait_for_txn(client, p2p(receiver, 1))
+    assert e.value.txn.vm_status.explanation.reason == "EPAYEE_DOES_NOT_EXIST"
+    assert len(e.value.txn.events) == 0
+
+    with pytest.raises(jsonrpc.TransactionExecutionFailed) as e:
+        await sender.submit_and_wait_for_txn(client, p2p(sender, 200_000_000_000))
+    assert e.value.txn.vm_status.explanation.reason == "EINSUFFICIENT_BALANCE"
+    assert e.value.txn.vm_status.abort_code == 1288
+    assert await client.get_account_sequence(sender.account_address) == 2
+
+
+@pytest.mark.asyncio
+async def test_submit_validation(fullnode, client):
+    sender = await fullnode.create_faucet(client).gen_account()
+    receiver = await fullnode.create_faucet(client).gen_account()
+
+    with pytest.raises(jsonrpc.JsonRpcError, match="SENDING_ACCOUNT_DOES_NOT_EXIST"):
+        await client.submit(LocalAccount.generate().create_signed_txn(0, p2p(receiver, 1)))
+    with pytest.raises(jsonrpc.JsonRpcError, match="BAD_CHAIN_ID"):
+        await client.submit(sender.create_signed_txn(0, p2p(receiver, 1), chain_id=4))
+    with pytest.raises(jsonrpc.JsonRpcError, match="UNKNOWN_SCRIPT"):
+        await client.submit(
+            sender.create_signed_txn(0, stdlib.encode_add_currency_to_account_script_function(utils.currency_code(XUS)))
+        )
+
+    other = LocalAccount.generate()
+    txn = other.create_signed_txn(0, p2p(receiver, 1))
+    raw = diem_types.RawTransaction(**{**txn.raw_txn.__dict__, "sender": sender.account_address})
+    with pytest.raises(jsonrpc.JsonRpcError, match="INVALID_AUTH_KEY"):
+        await client.submit(other.sign(raw))
+
+    # future sequence numbers wait in mempool, and are executed after the gap is filled
+    txn1 = sender.create_signed_txn(1, p2p(receiver, 1))
+    await client.submit(txn1)
+    await client.submit(txn1)
+    assert await client.get_account_sequence(sender.account_address) == 0
+    txn0 = sender.create_signed_txn(0, p2p(receiver, 1))
+    await client.submit(txn0)
+    assert (await client.wait_for_transaction(txn1)).transaction.sequence_number == 1
+    with pytest.raises(jsonrpc.JsonRpcError, match="SEQUENCE_NUMBER_TOO_OLD"):
+        await client.submit(txn0)
+
+
+@pytest.mark.asyncio
+async def test_dual_attestation(fullnode, client):
+    faucet = fullnode.create_faucet(client)
+    sender_parent, sender = await faucet.gen_vasp()
+    receiver_parent, receiver = await faucet.gen_vasp()
+    await receiver_parent.rotate_dual_attestation_info(client, "http://localhost")
+    parent = await client.get_account(receiver_parent.account_address)
+    assert parent.role.base_url == "http://localhost"
+    assert parent.role.compliance_key == receiver_parent.compliance_public_key_bytes.hex()
+
+    await faucet.mint(sender.auth_key.hex(), 4_000_000_000, XUS)
+    amount = 1_500_000_000
+    metadata, signing_msg = txnmetadata.travel_rule("ref", sender.account_address, amount)
+    with pytest.raises(jsonrpc.TransactionExecutionFailed) as e:
+        await sender.submit_and_wait_for_txn(client, p2p(receiver, amount, metadata, b"\x00" * 64))
+    assert e.value.txn.vm_status.explanation.reason == "EINVALID_METADATA_SIGNATURE"
+
+    signature = receiver_parent.compliance_key.sign(signing_msg)
+    txn = await sender.submit_and_wait_for_txn(client, p2p(receiver, amount, metadata, signature))
+    assert txn.vm_status.type == jsonrpc.VM_STATUS_EXECUTED
+
+    # no dual attestation required for payments between accounts of same VASP
+    await sender.submit_and_wait_for_txn(client, p2p(sender_parent, amount))
+
+
+@pytest.mark.asyncio
+async def test_account_submitter_throughput(fullnode, client):
+    faucet = fullnode.create_faucet(client)
+    sender = await faucet.gen_account()
+    receiver = await faucet.gen_account()
+    submitter = sender.submitter(client)
+    await asyncio.gather(*[submitter.submit(p2p(receiver, 1)) for _ in range(50)])
+    assert await client.get_account_sequence(sender.account_address) == 50
+    account = await client.get_account(receiver.account_address)
+    assert utils.balance(account, XUS) == 100_000_000_050
+    assert len(await client.get_events(account.received_events_key, 0, 100)) == 51
+
+
+def test_ledger_is_deterministic():
+    sender = LocalAccount.from_private_key_hex("11" * 32)
+    receiver = LocalAccount.from_private_key_hex("22" * 32)
+    txns = [sender.create_signed_txn(i, p2p(receiver, i + 1)) for i in range(3)]
+
+    def run() -> Ledger:
+        ledger = Ledger(clock=lambda: 1_000_000)
+        ledger.mint(sender.auth_key.hex(), 100, XUS)
+        ledger.mint(receiver.auth_key.hex(), 100, XUS)
+        for txn in reversed(txns):
+            ledger.submit(txn)
+        return ledger
+
+    ledger1, ledger2 = run(), run()
+    assert ledger1.transactions == ledger2.transactions
+    assert ledger1.events == ledger2.events
+    assert [t["transaction"].get("sequence_number") for t in ledger1.transactions[-3:]] == [0, 1, 2]
+    assert ledger1.get_account(receiver.account_address.to_hex())["balances"] == [{"amount": 106, "currency": XUS}]
+
+
+def test_decode_submitted_transactions():
+    sender, receiver = LocalAccount.generate(), LocalAccount.generate()
+    payloads = [
+        p2p(receiver, 1),
+        p2p(receiver, 2**64 - 1, b"\x01" * 300, b"\x02" * 64),
+        stdlib.encode_create_child_vasp_account_script_function(
+            utils.currency_code(XUS), receiver.account_address, receiver.auth_key.prefix(), False, 0
+        ),
+        diem_types.TransactionPayload__Script(
+            stdlib.encode_peer_to_peer_with_metadata_script(
+                utils.currency_code(XUS), receiver.account_address, 1, b"", b""
+            )
+        ),
+    ]
+    for payload in payloads:
+        txn = sender.create_signed_txn(0, payload)
+        data = txn.bcs_serialize()
+        assert simulator._decode_signed_transaction(data) == txn
+        if isinstance(payload, diem_types.TransactionPayload__ScriptFunction):
+            call = stdlib.decode_script_function_payload(payload)
+            assert simulator._decode_script_function_call(payload) == call
+
+    for data in [data[:-1], data + b"\x00", b""]:
+        with pytest.raises(ValueError):
+            simulator._decode_signed_transaction(data)
+
+
+@pytest.mark.asyncio
+async def test_json_rpc_errors(fullnode, client):
+    with pytest.raises(jsonrpc.JsonRpcError, match="Method not found"):
+        await client.execute("unknown", [])
+    with pytest.raises(jsonrpc.JsonRpcError, match="Invalid params"):
+        await client.execute("get_transactions", [0, 1001, False])
+    with pytest.raises(jsonrpc.JsonRpcError, match="Invalid params"):
+        await client.execute("get_account", [])